@@ -6,11 +6,13 @@ Este módulo usa FastF1 para cargar datos reales de la F1:
 - Graficar el ritmo por vuelta o velocidad promedio.
 """
 
+import os
+import sys
 import streamlit as st
-import fastf1
-import fastf1.plotting
-from matplotlib import pyplot as plt
-import pandas as pd
+
+# fuentes_datos.py vive en la carpeta raíz del proyecto
+# (se importa al pulsar 'Cargar': FastF1/pandas no retrasan el primer render)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # =========================
 # CONFIGURACIÓN INICIAL
@@ -19,9 +21,6 @@ st.set_page_config(page_title="Análisis F1 Real", page_icon="📊", layout="cen
 st.markdown("<h1 style='color:#3b82f6;text-align:center;'>📊 Análisis Real de Carreras F1</h1>", unsafe_allow_html=True)
 st.divider()
 
-# Activa la caché de FastF1 (acelera cargas futuras)
-fastf1.Cache.enable_cache("fastf1_cache")
-
 # =========================
 # SELECCIÓN DE TEMPORADA Y GRAN PREMIO
 # =========================
@@ -33,9 +32,14 @@ gp = st.text_input("Gran Premio (ejemplo: Monaco, Monza, Silverstone, Brazil, Sp
 if st.button("🔍 Cargar datos reales"):
     with st.spinner("Descargando datos reales... (puede tardar 10-20 seg)"):
         try:
+            import fuentes_datos
+
+            # Fuente de datos: FastF1 (con caché) o fixtures sin red (F1_FUENTE_DATOS=fixtures)
+            fuente = fuentes_datos.fuente_activa()
+
             # Cargar la sesión de carrera
-            session = fastf1.get_session(year, gp, 'R')
-            session.load()
+            session = fuente.get_session(year, gp, 'R')
+            session.load(telemetry=False, weather=False, messages=False)
 
             st.success(f"✅ Datos cargados: {session.event['EventName']} - {year}")
             st.markdown(f"**Fecha:** {session.event['EventDate']}  |  **Vueltas:** {len(session.laps)}")
@@ -51,6 +55,7 @@ if st.button("🔍 Cargar datos reales"):
             # =========================
             # GRÁFICO DE RITMO POR VUELTA
             # =========================
+            from matplotlib import pyplot as plt
             fig, ax = plt.subplots(figsize=(10, 4))
             ax.plot(laps['LapNumber'], laps['LapTime'].dt.total_seconds(), color='#3b82f6', marker='o', linewidth=1)
             ax.set_title(f"Tiempos por vuelta - {driver_selected} ({gp} {year})")
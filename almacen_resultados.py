@@ -0,0 +1,256 @@
+"""
+Almacén de resultados de simulación (Parquet columnar, solo se anexa)
+- Cada lote de simulaciones es un archivo nuevo en la partición
+  circuito=/fecha= de cada tabla: lo ya guardado nunca se reescribe
+- Cada carrera lleva su configuración y su semilla (se puede repetir)
+- EscritorResultados escribe por grupos de filas: un estudio Monte Carlo
+  grande nunca tiene todos sus resultados en memoria
+- Cada lote cerrado se indexa en el catálogo SQLite (catalogo.py)
+- Uso por consola: python almacen_resultados.py  (resumen de lotes guardados)
+"""
+
+import json
+import os
+import uuid
+from datetime import datetime
+from functools import lru_cache
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+RESULTADOS_DIR = os.path.join("resultados", "almacen")
+TABLAS = ("carreras", "vueltas")
+FILAS_POR_GRUPO = 65536  # vueltas por grupo de filas (lo que se retiene antes de escribir)
+
+# circuito y fecha van en la ruta (particiones), no dentro del archivo
+COLUMNAS = {
+    "carreras": [
+        ("id_lote", "string"),
+        ("carrera", "int32"),
+        ("semilla", "int64"),
+        ("motor", "string"),
+        ("alerones", "string"),
+        ("clima_inicial", "string"),
+        ("estrategia", "string"),
+        ("pitstops", "int8"),
+        ("total_time_s", "float64"),
+        ("clima_final", "string"),
+        ("eventos", "int16"),
+        ("creado", "timestamp[s]"),
+    ],
+    "vueltas": [
+        ("id_lote", "string"),
+        ("carrera", "int32"),
+        ("lap", "int16"),
+        ("stint", "int8"),  # 0 = parada en boxes
+        ("tyre", "string"),
+        ("grip", "float32"),
+        ("temp", "float32"),
+        ("lap_time_s", "float32"),
+        ("clima", "string"),
+    ],
+}
+
+
+@lru_cache(maxsize=None)
+def esquema(tabla):
+    """Esquema Arrow de una tabla (pyarrow se importa al escribir o leer, no antes)"""
+    import pyarrow as pa
+
+    return pa.schema([(nombre, pa.timestamp("s") if tipo == "timestamp[s]" else pa.type_for_alias(tipo))
+                      for nombre, tipo in COLUMNAS[tabla]])
+
+
+def ruta_particion(tabla, circuito, fecha, directorio=None):
+    """Carpeta de la partición circuito=/fecha= de una tabla"""
+    return os.path.join(directorio or RESULTADOS_DIR, tabla, f"circuito={circuito}", f"fecha={fecha}")
+
+
+def estrategia_texto(tyre_sequence):
+    return "-".join(tyre_sequence)
+
+
+class EscritorResultados:
+    """
+    Escribe un lote de carreras simuladas de un circuito.
+    Uso:
+        with EscritorResultados("Monza") as escritor:
+            for semilla in semillas:
+                escritor.agregar(resultado, config, semilla)
+    Los archivos se escriben con nombre temporal y aparecen al cerrar el
+    lote: quien lee el almacén nunca ve un lote a medias. Si el bloque with
+    termina con una excepción el lote se descarta.
+    """
+
+    def __init__(self, circuito, directorio=None, fecha=None, filas_por_grupo=FILAS_POR_GRUPO, catalogar=True):
+        self.id_lote = uuid.uuid4().hex[:12]
+        self.circuito = circuito
+        self.fecha = fecha or datetime.now().strftime("%Y-%m-%d")
+        self.directorio = directorio
+        self.filas_por_grupo = filas_por_grupo
+        self.catalogar = catalogar
+        self.carreras = 0
+        self.vueltas = 0
+        self._buffers = {tabla: {c: [] for c, _ in COLUMNAS[tabla]} for tabla in TABLAS}
+        self._writers = {}
+        self._configs = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self.cerrar()
+        else:
+            self.descartar()
+
+    def _ruta(self, tabla, temporal=False):
+        nombre = f"lote-{self.id_lote}.parquet"
+        if temporal:
+            nombre = f".{nombre}.tmp"
+        return os.path.join(ruta_particion(tabla, self.circuito, self.fecha, self.directorio), nombre)
+
+    def agregar(self, resultado, config, semilla=None):
+        """
+        Anexa una carrera: resultado de simulate_strategy_advanced y su
+        config (motor, alerones, clima, tyre_sequence) y semilla.
+        """
+        n = self.carreras
+        c = self._buffers["carreras"]
+        c["id_lote"].append(self.id_lote)
+        c["carrera"].append(n)
+        c["semilla"].append(semilla)
+        c["motor"].append(config["motor"])
+        c["alerones"].append(config["alerones"])
+        c["clima_inicial"].append(config["clima"])
+        c["estrategia"].append(estrategia_texto(config["tyre_sequence"]))
+        c["pitstops"].append(len(config["tyre_sequence"]) - 1)
+        c["total_time_s"].append(resultado["total_time_s"])
+        c["clima_final"].append(resultado["final_clima"])
+        c["eventos"].append(len(resultado["events"]))
+        c["creado"].append(datetime.now().replace(microsecond=0))
+        # la configuración completa del lote va también en los metadatos del archivo
+        self._configs[json.dumps(config, sort_keys=True)] = True
+
+        v = self._buffers["vueltas"]
+        for d in resultado["details"]:
+            v["id_lote"].append(self.id_lote)
+            v["carrera"].append(n)
+            v["lap"].append(d["lap"])
+            v["stint"].append(0 if d["stint"] == "PIT" else d["stint"])
+            v["tyre"].append(d["tyre"])
+            v["grip"].append(d["grip"])
+            v["temp"].append(d["temp"])
+            v["lap_time_s"].append(d["lap_time_s"])
+            v["clima"].append(d["clima"])
+
+        self.carreras += 1
+        self.vueltas += len(resultado["details"])
+        if len(v["lap"]) >= self.filas_por_grupo:
+            self._volcar()
+
+    def _volcar(self):
+        """Escribe lo retenido como un grupo de filas y vacía los buffers"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        for tabla in TABLAS:
+            buffer = self._buffers[tabla]
+            if not buffer["id_lote"]:
+                continue
+            lote = pa.RecordBatch.from_pydict(buffer, schema=esquema(tabla))
+            writer = self._writers.get(tabla)
+            if writer is None:
+                os.makedirs(os.path.dirname(self._ruta(tabla)), exist_ok=True)
+                writer = pq.ParquetWriter(self._ruta(tabla, temporal=True), esquema(tabla), compression="zstd")
+                self._writers[tabla] = writer
+            writer.write_batch(lote)
+            for columna in buffer.values():
+                columna.clear()
+
+    def cerrar(self):
+        self._volcar()
+        configs = [json.loads(c) for c in self._configs]
+        for tabla, writer in self._writers.items():
+            writer.add_key_value_metadata({"id_lote": self.id_lote, "configs": json.dumps(configs)})
+            writer.close()
+            os.replace(self._ruta(tabla, temporal=True), self._ruta(tabla))
+        if self.catalogar and "carreras" in self._writers:
+            import catalogo
+            catalogo.registrar_lote(self._ruta("carreras"), self._ruta("vueltas"),
+                                    self.circuito, self.fecha, self.directorio)
+        self._writers = {}
+
+    def descartar(self):
+        """Abandona el lote (error a medias): borra los temporales, no publica ni cataloga nada"""
+        for tabla, writer in self._writers.items():
+            try:
+                writer.close()
+            finally:
+                try:
+                    os.remove(self._ruta(tabla, temporal=True))
+                except FileNotFoundError:
+                    pass
+        self._writers = {}
+        for buffer in self._buffers.values():
+            for columna in buffer.values():
+                columna.clear()
+
+
+def guardar_carreras(circuito, corridas, directorio=None):
+    """Guarda [(resultado, config, semilla), ...] como un lote. Devuelve el id del lote."""
+    with EscritorResultados(circuito, directorio) as escritor:
+        for resultado, config, semilla in corridas:
+            escritor.agregar(resultado, config, semilla)
+    return escritor.id_lote
+
+
+def dataset(tabla, directorio=None):
+    """Dataset de Arrow (particiones circuito/fecha) de una tabla del almacén"""
+    import pyarrow.dataset as ds
+
+    base = os.path.join(directorio or RESULTADOS_DIR, tabla)
+    if not os.path.isdir(base):
+        return None
+    return ds.dataset(base, format="parquet", partitioning="hive",
+                      exclude_invalid_files=True, ignore_prefixes=[".", "_"])
+
+
+def leer(tabla, circuito=None, id_lote=None, columnas=None, directorio=None):
+    """DataFrame con las filas de una tabla (filtradas sin leer el resto del almacén)"""
+    import pyarrow.dataset as ds
+
+    datos = dataset(tabla, directorio)
+    if datos is None:
+        return esquema(tabla).empty_table().to_pandas()
+    filtro = None
+    if circuito is not None:
+        filtro = ds.field("circuito") == circuito
+    if id_lote is not None:
+        f = ds.field("id_lote") == id_lote
+        filtro = f if filtro is None else filtro & f
+    return datos.to_table(columns=columnas, filter=filtro).to_pandas()
+
+
+def resumen_lotes(directorio=None):
+    """Una fila por lote: circuito, fecha, carreras y mejor/mediana del tiempo total"""
+    carreras = leer("carreras", directorio=directorio)
+    if carreras.empty:
+        return carreras
+    return (carreras.groupby(["circuito", "fecha", "id_lote"], as_index=False, observed=True)
+            .agg(carreras=("carrera", "size"),
+                 mejor_s=("total_time_s", "min"),
+                 mediana_s=("total_time_s", "median"),
+                 creado=("creado", "min"))
+            .sort_values("creado"))
+
+
+# -----------------------------
+# USO POR CONSOLA
+# -----------------------------
+if __name__ == "__main__":
+    lotes = resumen_lotes()
+    if lotes.empty:
+        print(f"Almacén vacío ({RESULTADOS_DIR})")
+    else:
+        print(lotes.to_string(index=False))
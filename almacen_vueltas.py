@@ -0,0 +1,135 @@
+"""
+Almacén local de vueltas reales (FastF1)
+- Guarda las vueltas de cada carrera en Parquet particionado por año/GP
+  (con CorrectedLapTimeSeconds, ver combustible.py)
+- Calcula tablas pre-agregadas por carrera (pilotos y degradación por stint)
+- Uso por consola: python almacen_vueltas.py 2019 2024 [GP ...]
+"""
+
+import os
+import sys
+
+from degradacion import marcar_vueltas_limpias, ajustar_stints
+from combustible import vueltas_corregidas
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+TEMPORADA_DIR = os.path.join("data", "temporada")
+TABLAS = ("vueltas", "resumen_pilotos", "resumen_stints")
+
+# Columnas de FastF1 que conservamos (el resto ocupa mucho y no se consulta)
+COLUMNAS_VUELTAS = [
+    "Driver", "Team", "LapNumber", "Stint", "Compound", "TyreLife",
+    "Position", "TrackStatus", "IsAccurate"
+]
+
+
+def ruta_particion(tabla, year, gp, directorio=None):
+    """Carpeta de la partición year=/gp= de una tabla"""
+    return os.path.join(directorio or TEMPORADA_DIR, tabla, f"year={int(year)}", f"gp={gp}")
+
+
+def preparar_vueltas(laps):
+    """Tabla compacta de vueltas (ya corregidas por combustible), una fila por vuelta"""
+    laps = marcar_vueltas_limpias(laps)
+    df = laps[COLUMNAS_VUELTAS + ["LapTimeSeconds", "CorrectedLapTimeSeconds", "Limpia"]].copy()
+    df["LapNumber"] = df["LapNumber"].astype("int16")
+    df["Stint"] = df["Stint"].fillna(0).astype("int8")
+    df["TyreLife"] = df["TyreLife"].astype("float32")
+    df["Position"] = df["Position"].astype("float32")
+    df["LapTimeSeconds"] = df["LapTimeSeconds"].astype("float32")
+    df["CorrectedLapTimeSeconds"] = df["CorrectedLapTimeSeconds"].astype("float32")
+    df["TrackStatus"] = df["TrackStatus"].astype(str)
+    df["Compound"] = df["Compound"].fillna("UNKNOWN").astype(str)
+    df["IsAccurate"] = df["IsAccurate"].fillna(False).astype(bool)
+    return df
+
+
+def resumen_pilotos(vueltas, ronda, efecto_combustible):
+    """Pre-agregado por piloto: ritmo y delta a la mejor mediana de la carrera"""
+    limpias = vueltas[vueltas["Limpia"]]
+    res = limpias.groupby(["Driver", "Team"], as_index=False).agg(
+        vueltas_limpias=("LapTimeSeconds", "size"),
+        media_s=("LapTimeSeconds", "mean"),
+        mediana_s=("LapTimeSeconds", "median"),
+        mejor_s=("LapTimeSeconds", "min"),
+        mediana_corregida_s=("CorrectedLapTimeSeconds", "median"),
+    )
+    totales = vueltas.groupby("Driver")["LapNumber"].max().rename("vueltas")
+    res = res.merge(totales, on="Driver", how="left")
+    res["delta_mediana_s"] = res["mediana_s"] - res["mediana_s"].min()
+    res["efecto_combustible_s"] = float(efecto_combustible)
+    res["ronda"] = int(ronda)
+    return res
+
+
+def resumen_stints(laps, ronda):
+    """Pre-agregado por stint: degradación ajustada sobre tiempos corregidos"""
+    stints = ajustar_stints(laps, y_col="CorrectedLapTimeSeconds")
+    stints["ronda"] = int(ronda)
+    return stints
+
+
+def escribir_particion(df, tabla, year, gp, directorio=None):
+    carpeta = ruta_particion(tabla, year, gp, directorio)
+    os.makedirs(carpeta, exist_ok=True)
+    # una sola pieza por carrera: re-ingestar sobrescribe
+    df.to_parquet(os.path.join(carpeta, "part-0.parquet"), compression="zstd", index=False)
+
+
+def clave_carrera(session):
+    """(year, gp) de la partición; gp = EventName, estable entre temporadas"""
+    return int(session.event["EventDate"].year), str(session.event["EventName"])
+
+
+def ingestar_sesion(session, directorio=None):
+    """Guarda vueltas y pre-agregados de una sesión ya cargada. Devuelve nº de vueltas."""
+    year, gp = clave_carrera(session)
+    ronda = session.event["RoundNumber"]
+    laps, info = vueltas_corregidas(session.laps)
+    vueltas = preparar_vueltas(laps)
+    escribir_particion(vueltas, "vueltas", year, gp, directorio)
+    escribir_particion(resumen_pilotos(vueltas, ronda, info["efecto_s_vuelta"]), "resumen_pilotos", year, gp, directorio)
+    escribir_particion(resumen_stints(laps, ronda), "resumen_stints", year, gp, directorio)
+    return len(vueltas)
+
+
+def carreras_ingestadas(directorio=None):
+    """Lista de (year, gp) presentes en el almacén"""
+    base = os.path.join(directorio or TEMPORADA_DIR, "vueltas")
+    if not os.path.isdir(base):
+        return []
+    carreras = []
+    for carpeta_year in sorted(os.listdir(base)):
+        if not carpeta_year.startswith("year="):
+            continue
+        for carpeta_gp in sorted(os.listdir(os.path.join(base, carpeta_year))):
+            if carpeta_gp.startswith("gp="):
+                carreras.append((int(carpeta_year[5:]), carpeta_gp[3:]))
+    return carreras
+
+
+# -----------------------------
+# USO POR CONSOLA
+# -----------------------------
+if __name__ == "__main__":
+    import fuentes_datos
+
+    fuente = fuentes_datos.fuente_activa()
+    if len(sys.argv) < 3:
+        print("Uso: python almacen_vueltas.py AÑO_INICIO AÑO_FIN [GP ...]")
+        raise SystemExit(1)
+    year_ini, year_fin = int(sys.argv[1]), int(sys.argv[2])
+    gps_pedidos = sys.argv[3:]
+
+    for year in range(year_ini, year_fin + 1):
+        gps = gps_pedidos or fuente.calendario(year)
+        for gp in gps:
+            try:
+                session = fuente.get_session(year, gp, "R")
+                session.load(telemetry=False, weather=False, messages=False)
+                n = ingestar_sesion(session)
+                print(f"✔ {year} {gp}: {n} vueltas")
+            except Exception as e:
+                print(f"✘ {year} {gp}: {e}")
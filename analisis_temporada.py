@@ -0,0 +1,90 @@
+"""
+Analítica de temporada sobre el almacén de vueltas (almacen_vueltas.py)
+- Motor SQL embebido (DuckDB) leyendo directamente los Parquet particionados
+- Consultas entre carreras: degradación por compuesto y evolución de ritmo
+"""
+
+import os
+
+import almacen_vueltas
+from almacen_vueltas import TABLAS
+
+
+def conectar(directorio=None):
+    """Conexión DuckDB en memoria con una vista por tabla del almacén"""
+    import duckdb
+
+    directorio = directorio or almacen_vueltas.TEMPORADA_DIR
+    con = duckdb.connect(database=":memory:")
+    for tabla in TABLAS:
+        patron = os.path.join(directorio, tabla, "*", "*", "*.parquet")
+        if not os.path.isdir(os.path.join(directorio, tabla)):
+            continue
+        con.execute(
+            f"CREATE VIEW {tabla} AS SELECT * FROM read_parquet('{patron}', hive_partitioning = true)"
+        )
+    return con
+
+
+def consultar(con, sql, params=None):
+    """Ejecuta SQL libre sobre las vistas y devuelve un DataFrame"""
+    return con.execute(sql, params or []).df()
+
+
+def degradacion_compuesto(con, gp, compuesto, year_ini, year_fin):
+    """Pendiente media (s/vuelta) de un compuesto en un GP, por año"""
+    return consultar(con, """
+        SELECT year,
+               avg(pendiente_s_vuelta) AS degradacion_media_s,
+               median(pendiente_s_vuelta) AS degradacion_mediana_s,
+               count(*) AS stints,
+               sum(vueltas) AS vueltas
+        FROM resumen_stints
+        WHERE gp = ? AND Compound = ? AND year BETWEEN ? AND ?
+              AND pendiente_s_vuelta IS NOT NULL
+        GROUP BY year
+        ORDER BY year
+    """, [gp, compuesto, year_ini, year_fin])
+
+
+def tendencia_ritmo(con, year, pilotos=None, corregido=False):
+    """Delta de ritmo (mediana de vuelta limpia vs. la mejor) por carrera en una temporada
+
+    corregido=True compara las medianas corregidas por combustible; la mejor
+    referencia se toma siempre sobre toda la parrilla, no sobre los pilotos filtrados.
+    """
+    columna = "mediana_corregida_s" if corregido else "mediana_s"
+    sql = f"""
+        SELECT * FROM (
+            SELECT ronda, gp, Driver,
+                   {columna} - min({columna}) OVER (PARTITION BY ronda) AS delta_mediana_s,
+                   {columna} AS mediana_s
+            FROM resumen_pilotos
+            WHERE year = ?
+        )
+    """
+    params = [year]
+    if pilotos:
+        sql += " WHERE Driver IN (SELECT unnest(?))"
+        params.append(list(pilotos))
+    return consultar(con, sql + " ORDER BY ronda, Driver", params)
+
+
+def efecto_combustible(con, gp):
+    """Efecto del combustible (s/vuelta) estimado en cada edición de un GP"""
+    return consultar(con, """
+        SELECT year, any_value(efecto_combustible_s) AS efecto_combustible_s
+        FROM resumen_pilotos
+        WHERE gp = ?
+        GROUP BY year
+        ORDER BY year
+    """, [gp])
+
+
+def compuestos_disponibles(con, gp=None):
+    sql = "SELECT DISTINCT Compound FROM resumen_stints"
+    params = []
+    if gp:
+        sql += " WHERE gp = ?"
+        params.append(gp)
+    return consultar(con, sql + " ORDER BY Compound", params)["Compound"].tolist()
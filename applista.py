@@ -2,30 +2,121 @@
 con interfaz limpia y funcional"""
 
 import streamlit as st
-import fastf1
-import pandas as pd
-import matplotlib.pyplot as plt
-import logging
-import os
+import graficos
+import carga_sesion
 
-# Configuración de inicio
+# pandas, DuckDB y los módulos de análisis se importan al haber una carrera
+# cargada (ver 'Análisis'): el primer render de la página no los paga
 
-st.set_page_config(
-    page_title="F1 Analytics Pro",
-    page_icon="🏎️",
-    layout="centered"
-)
+# Configuración de inicio
 
 st.markdown("<h1 style='color:#3b82f6;text-align:center;'>🏎️ F1 Analytics Pro</h1>", unsafe_allow_html=True)
 st.divider()
 
-# Desactivar logs de FastF1
-logging.getLogger('fastf1').setLevel(logging.CRITICAL)
+# Los datos llegan por fuentes_datos (FastF1 con caché en data/raw/cache,
+# o fixtures sin red con F1_FUENTE_DATOS=fixtures)
+
+# Conexión al almacén de temporada (una por proceso)
+@st.cache_resource
+def conexion_temporada():
+    return analisis_temporada.conectar()
+
+# Vueltas corregidas por combustible (cacheado por carrera)
+@st.cache_data(show_spinner=False)
+def vueltas_sesion(_session, clave):
+    return combustible.vueltas_corregidas(_session.laps)
+
+# Stints y degradación de la carrera cargada (sobre tiempos corregidos)
+@st.cache_data(show_spinner=False)
+def stints_sesion(_session, clave):
+    laps_corr, _ = vueltas_sesion(_session, clave)
+    return degradacion.ajustar_stints(laps_corr, y_col='CorrectedLapTimeSeconds')
+
+# Trazas reducidas (LTTB) por (sesión, piloto, vuelta)
+@st.cache_data(show_spinner=False, max_entries=256)
+def trazas_cache(_session, clave, driver, lap_number, n_out):
+    return telemetria.trazas_vuelta(_session.laps, driver, lap_number, n_out)
+
+def telemetria_cargada(session):
+    try:
+        session.car_data
+        return True
+    except Exception:
+        return False
 
-# Habilitar cache (para crear carpeta si no existe)
-cache_dir = './data/raw/cache'
-os.makedirs(cache_dir, exist_ok=True)
-fastf1.Cache.enable_cache(cache_dir)
+# Gráficos (se dibujan vía graficos.grafico: PNG cacheado, figura cerrada tras dibujar)
+
+def dibujar_puntos_top10(fig, d):
+    ax = fig.subplots()
+    colors = ['#FFD700' if i == 0 else '#C0C0C0' if i == 1 else '#CD7F32' if i == 2 else '#3b82f6' for i in range(len(d['pilotos']))]
+    ax.barh(d['pilotos'], d['puntos'], color=colors, edgecolor='black')
+    ax.set_xlabel('Puntos')
+    ax.set_title('Clasificación Top 10')
+    ax.grid(axis='x', alpha=0.3)
+
+def dibujar_ritmo_piloto(fig, d):
+    ax = fig.subplots()
+    ax.plot(d['vueltas'], d['tiempos'], marker='o', linewidth=2, color='#3b82f6', markersize=4)
+    ax.axhline(y=d['tiempos'].mean(), color='#f59e0b', linestyle='--', label='Promedio', linewidth=2)
+    ax.set_xlabel('Número de Vuelta')
+    ax.set_ylabel('Tiempo (segundos)')
+    ax.set_title(f"Ritmo de Carrera - {d['piloto']}")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+# Colores por compuesto
+compound_colors = {
+    'SOFT': '#FF0000',
+    'MEDIUM': '#FFA500',
+    'HARD': '#FFFFFF',
+    'INTERMEDIATE': '#00FF00',
+    'WET': '#0000FF'
+}
+
+def dibujar_ritmo_neumatico(fig, d):
+    ax = fig.subplots()
+    for compound, (vueltas, tiempos) in d['series'].items():
+        ax.plot(vueltas, tiempos, marker='o', linewidth=2, markersize=5, label=compound,
+                color=compound_colors.get(compound, '#3b82f6'))
+    ax.set_xlabel('Número de Vuelta')
+    ax.set_ylabel('Tiempo (segundos)')
+    ax.set_title(f"Ritmo de Carrera por Neumático - {d['piloto']}")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+def dibujar_comparacion_pilotos(fig, d):
+    ax = fig.subplots()
+    for driver, (vueltas, tiempos) in d['series'].items():
+        ax.plot(vueltas, tiempos, marker='o', linewidth=2, markersize=4, label=driver, alpha=0.8)
+    ax.set_xlabel('Número de Vuelta')
+    ax.set_ylabel('Tiempo (segundos)')
+    ax.set_title('Comparación de Ritmo de Carrera')
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+def dibujar_tendencia_temporada(fig, d):
+    ax = fig.subplots()
+    for driver, (rondas, deltas) in d['series'].items():
+        ax.plot(rondas, deltas, marker='o', linewidth=2, markersize=4, label=driver)
+    ax.set_xlabel('Ronda')
+    ax.set_ylabel('Delta a la mejor mediana (s)')
+    ax.set_title(f"Delta de Ritmo por Carrera - {d['year']}")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+def dibujar_telemetria(fig, d):
+    axes = fig.subplots(3, 1, sharex=True)
+    canales = [('Speed', 'Velocidad (km/h)'), ('Throttle', 'Acelerador (%)'), ('Brake', 'Freno')]
+    for etiqueta_piloto, trazas in d['trazas'].items():
+        for ax, (canal, _) in zip(axes, canales):
+            distancia, valores = trazas[canal]
+            ax.plot(distancia, valores, linewidth=1.5, label=etiqueta_piloto)
+    for ax, (_, etiqueta) in zip(axes, canales):
+        ax.set_ylabel(etiqueta)
+        ax.grid(True, alpha=0.3)
+    axes[0].legend()
+    axes[0].set_title('Comparación de Telemetría')
+    axes[-1].set_xlabel('Distancia (m)')
 
 # Sidebar - para programar las configuraciones
 
@@ -43,6 +134,10 @@ gp_list = [
 ]
 gp = st.sidebar.selectbox("🏁 Gran Premio:", gp_list, index=13)
 
+# Corrección de combustible en neumáticos y comparación
+corregir_combustible = st.sidebar.checkbox("⛽ Corregir efecto combustible", value=True)
+col_tiempo = 'CorrectedLapTimeSeconds' if corregir_combustible else 'LapTimeSeconds'
+
 st.sidebar.divider()
 
 # Botones
@@ -52,28 +147,76 @@ clear_btn = st.sidebar.button("🔄 Limpiar", use_container_width=True)
 # Inicializar sesión
 if 'session' not in st.session_state:
     st.session_state.session = None
+if 'carga_id' not in st.session_state:
+    st.session_state.carga_id = None
+
+registro_cargas = carga_sesion.registro()
 
 if clear_btn:
+    registro_cargas.cancelar(st.session_state.carga_id)
+    st.session_state.carga_id = None
     st.session_state.session = None
     st.rerun()
 
-# Cargando datos - mientras se procesa
+# Cargando datos - en segundo plano, la página sigue respondiendo
 
 if load_btn:
-    with st.spinner(f"⏳ Cargando {gp} {year}..."):
-        try:
-            session = fastf1.get_session(year, gp, 'R')
-            session.load()
-            st.session_state.session = session
-            st.success(f"✅ Cargado: {gp} {year}")
-        except Exception as e:
-            st.error(f"❌ Error: {str(e)}")
-            st.session_state.session = None
+    # cambiar de GP cancela la carga anterior (si seguía en curso)
+    registro_cargas.cancelar(st.session_state.carga_id)
+    st.session_state.carga_id = registro_cargas.iniciar(year, gp)
+    st.session_state.session = None
+
+trabajo = registro_cargas.obtener(st.session_state.carga_id)
+if trabajo is not None:
+    if trabajo.error is not None:
+        st.error(f"❌ Error: {trabajo.error}")
+        st.session_state.session = None
+    elif trabajo.session is not None:
+        st.session_state.session = trabajo.session
+    if trabajo.terminado:
+        # la sesión completa queda en session_state; el registro ya no la necesita
+        registro_cargas.descartar(trabajo.id)
+        st.session_state.carga_id = None
+        if trabajo.vueltas_listas:
+            st.toast(f"✅ Cargado: {trabajo.gp} {trabajo.year}")
+
+# sin trabajo pendiente, la sesión guardada ya tiene vueltas
+vueltas_listas = trabajo is None or trabajo.vueltas_listas
+
+@st.fragment(run_every=1.0)
+def estado_carga(carga_id):
+    """Sondea el trabajo y relanza la página cuando avanza de etapa"""
+    trabajo_actual = registro_cargas.obtener(carga_id)
+    if trabajo_actual is None:
+        return
+    st.caption(f"⏳ {trabajo_actual.mensaje}")
+    if trabajo_actual.etapa != st.session_state.get('etapa_vista'):
+        st.session_state.etapa_vista = trabajo_actual.etapa
+        st.rerun()
+
+if trabajo is not None and not trabajo.terminado:
+    st.session_state.etapa_vista = trabajo.etapa
+    with st.sidebar:
+        estado_carga(trabajo.id)
 
 # Análisis
 
+if st.session_state.session is None and trabajo is not None and not trabajo.terminado:
+    st.info(f"⏳ Cargando {trabajo.gp} {trabajo.year}... la página sigue disponible mientras tanto")
+
 if st.session_state.session is not None:
+    import pandas as pd
+    import almacen_vueltas
+    import analisis_temporada
+    import degradacion
+    import combustible
+    import telemetria
+    import parametros
+
     session = st.session_state.session
+    clave_sesion = almacen_vueltas.clave_carrera(session)
+    # la barra lateral puede apuntar ya a otra carrera: todo se rotula con la sesión cargada
+    circuito_sesion = str(session.event['Location'])
     
     # Información básica
     st.markdown("### 📊 Información de la Carrera")
@@ -91,7 +234,7 @@ if st.session_state.session is not None:
     st.divider()
     
     # Tablas de Análisis
-    tab1, tab2, tab3, tab4 = st.tabs(["🏆 Resultados", "⏱️ Análisis por Piloto", "🛞 Neumáticos", "📈 Comparación"])
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["🏆 Resultados", "⏱️ Análisis por Piloto", "🛞 Neumáticos", "📈 Comparación", "📅 Temporada", "📡 Telemetría"])
     
     # Tabla 1-Resultados
     with tab1:
@@ -125,14 +268,21 @@ if st.session_state.session is not None:
         st.markdown("### 📊 Puntos Top 10")
         top10 = results.head(10)
         
-        fig, ax = plt.subplots(figsize=(10, 6))
-        colors = ['#FFD700' if i == 0 else '#C0C0C0' if i == 1 else '#CD7F32' if i == 2 else '#3b82f6' for i in range(len(top10))]
-        ax.barh(top10['Piloto'], top10['Puntos'].astype(float), color=colors, edgecolor='black')
-        ax.set_xlabel('Puntos')
-        ax.set_title('Clasificación Top 10')
-        ax.grid(axis='x', alpha=0.3)
-        st.pyplot(fig)
+        st.image(graficos.grafico("puntos_top10", {
+            'pilotos': top10['Piloto'].tolist(),
+            'puntos': top10['Puntos'].astype(float).to_numpy(),
+        }, dibujar_puntos_top10, figsize=(10, 6)), use_column_width=True)
     
+    # Resto de pestañas: necesitan las vueltas, que llegan en la segunda etapa
+    if not vueltas_listas:
+        for tab in (tab2, tab3, tab4, tab5, tab6):
+            with tab:
+                st.info("⏳ Cargando vueltas... los resultados ya están disponibles")
+        st.stop()
+
+    # Vueltas de toda la parrilla con la corrección de combustible
+    laps_sesion, info_combustible = vueltas_sesion(session, clave_sesion)
+
     # Tabla 2-Análisis por piloto
     with tab2:
         st.markdown("### ⏱️ Análisis de Tiempos por Piloto")
@@ -142,8 +292,7 @@ if st.session_state.session is not None:
         selected_driver = st.selectbox("Selecciona un piloto:", drivers)
         
         # Obtener vueltas del piloto
-        laps = session.laps.pick_driver(selected_driver)
-        laps['LapTimeSeconds'] = laps['LapTime'].dt.total_seconds()
+        laps = laps_sesion[laps_sesion['Driver'] == selected_driver]
         laps_clean = laps[laps['LapTimeSeconds'].notna()]
         
         # Métricas
@@ -161,17 +310,11 @@ if st.session_state.session is not None:
         
         # Gráfico de tiempos por vuelta
         st.markdown("### 📈 Tiempos por Vuelta")
-        fig, ax = plt.subplots(figsize=(10, 5))
-        ax.plot(laps_clean['LapNumber'], laps_clean['LapTimeSeconds'], 
-                marker='o', linewidth=2, color='#3b82f6', markersize=4)
-        ax.axhline(y=laps_clean['LapTimeSeconds'].mean(), 
-                   color='#f59e0b', linestyle='--', label='Promedio', linewidth=2)
-        ax.set_xlabel('Número de Vuelta')
-        ax.set_ylabel('Tiempo (segundos)')
-        ax.set_title(f'Ritmo de Carrera - {selected_driver}')
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-        st.pyplot(fig)
+        st.image(graficos.grafico("ritmo_piloto", {
+            'piloto': selected_driver,
+            'vueltas': laps_clean['LapNumber'].to_numpy(),
+            'tiempos': laps_clean['LapTimeSeconds'].to_numpy(),
+        }, dibujar_ritmo_piloto, figsize=(10, 5)), use_column_width=True)
         
         st.divider()
         
@@ -189,40 +332,27 @@ if st.session_state.session is not None:
         selected_driver_tyre = st.selectbox("Selecciona un piloto:", drivers, key="tyre_driver")
         
         # Obtener vueltas del piloto
-        laps_tyre = session.laps.pick_driver(selected_driver_tyre)
-        laps_tyre['LapTimeSeconds'] = laps_tyre['LapTime'].dt.total_seconds()
-        laps_tyre_clean = laps_tyre[laps_tyre['LapTimeSeconds'].notna()]
+        laps_tyre = laps_sesion[laps_sesion['Driver'] == selected_driver_tyre]
+        laps_tyre_clean = laps_tyre[laps_tyre[col_tiempo].notna()]
         
         st.markdown(f"**Vueltas totales registradas:** {len(laps_tyre_clean)}")
+        if corregir_combustible:
+            fuente = "ajustado a la carrera" if info_combustible['fuente'] == 'ajuste' else "referencia física"
+            st.caption(f"⛽ Tiempos corregidos a tanque vacío: {info_combustible['efecto_s_vuelta']:.3f} s/vuelta ({fuente})")
         
         st.divider()
         
         # Gráfico de ritmo por vuelta coloreado por neumático
         st.markdown("### 📊 Ritmo por Vuelta (coloreado por neumático)")
         
-        fig, ax = plt.subplots(figsize=(12, 5))
-        
-        # Colores por compuesto
-        compound_colors = {
-            'SOFT': '#FF0000',
-            'MEDIUM': '#FFA500',
-            'HARD': '#FFFFFF',
-            'INTERMEDIATE': '#00FF00',
-            'WET': '#0000FF'
-        }
-        
+        series_compuesto = {}
         for compound in laps_tyre_clean['Compound'].unique():
             compound_laps = laps_tyre_clean[laps_tyre_clean['Compound'] == compound]
-            color = compound_colors.get(compound, '#3b82f6')
-            ax.plot(compound_laps['LapNumber'], compound_laps['LapTimeSeconds'],
-                   marker='o', linewidth=2, markersize=5, label=compound, color=color)
-        
-        ax.set_xlabel('Número de Vuelta')
-        ax.set_ylabel('Tiempo (segundos)')
-        ax.set_title(f'Ritmo de Carrera por Neumático - {selected_driver_tyre}')
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-        st.pyplot(fig)
+            series_compuesto[compound] = (compound_laps['LapNumber'].to_numpy(), compound_laps[col_tiempo].to_numpy())
+        st.image(graficos.grafico("ritmo_neumatico", {
+            'piloto': selected_driver_tyre,
+            'series': series_compuesto,
+        }, dibujar_ritmo_neumatico, figsize=(12, 5)), use_column_width=True)
         
         st.divider()
         
@@ -235,9 +365,9 @@ if st.session_state.session is not None:
             tyre_stats.append({
                 'Neumático': compound,
                 'Vueltas': len(compound_laps),
-                'Tiempo Promedio': f"{compound_laps['LapTimeSeconds'].mean():.2f}s",
-                'Más Rápida': f"{compound_laps['LapTimeSeconds'].min():.2f}s",
-                'Más Lenta': f"{compound_laps['LapTimeSeconds'].max():.2f}s"
+                'Tiempo Promedio': f"{compound_laps[col_tiempo].mean():.2f}s",
+                'Más Rápida': f"{compound_laps[col_tiempo].min():.2f}s",
+                'Más Lenta': f"{compound_laps[col_tiempo].max():.2f}s"
             })
         
         tyre_stats_df = pd.DataFrame(tyre_stats)
@@ -245,15 +375,54 @@ if st.session_state.session is not None:
         
         st.divider()
         
-        # Recomendación
-        if len(tyre_stats) > 0:
-            avg_times = {stat['Neumático']: float(stat['Tiempo Promedio'].replace('s', '')) for stat in tyre_stats}
-            best_tyre = min(avg_times, key=avg_times.get)
-            st.success(f"💡 **Mejor rendimiento promedio:** {best_tyre} con {avg_times[best_tyre]:.2f}s por vuelta")
-        
+        # Degradación de toda la parrilla (stints limpios, ajuste vectorizado)
+        st.markdown("### 📉 Degradación por Compuesto (toda la parrilla)")
+        stints_carrera = stints_sesion(session, clave_sesion)
+        degr_tabla = degradacion.tabla_degradacion(stints_carrera)
+
+        if len(degr_tabla) > 0:
+            # ritmo esperado a mitad de un stint típico del compuesto
+            largo_tipico = stints_carrera.groupby('Compound')['vida_max'].median()
+            degr_tabla['Ritmo medio stint (s)'] = (
+                degr_tabla['intercepto_mediano_s']
+                + degr_tabla['pendiente_mediana_s'] * degr_tabla['Compound'].map(largo_tipico) / 2
+            )
+            best_row = degr_tabla.loc[degr_tabla['Ritmo medio stint (s)'].idxmin()]
+            st.success(f"💡 **Mejor rendimiento (corregido por desgaste):** {best_row['Compound']} con "
+                       f"{best_row['Ritmo medio stint (s)']:.2f}s por vuelta y "
+                       f"{best_row['pendiente_mediana_s']:.3f}s/vuelta de degradación")
+            tabla_vista = degr_tabla[['Compound', 'stints', 'vueltas', 'pendiente_mediana_s', 'intercepto_mediano_s', 'Ritmo medio stint (s)']].copy()
+            tabla_vista.columns = ['Neumático', 'Stints', 'Vueltas', 'Degradación (s/vuelta)', 'Ritmo inicial (s)', 'Ritmo medio stint (s)']
+            st.dataframe(tabla_vista.round(3), use_container_width=True, hide_index=True)
+
+            stints_piloto = stints_carrera[stints_carrera['Driver'] == selected_driver_tyre]
+            if len(stints_piloto) > 0:
+                st.markdown(f"**Stints de {selected_driver_tyre}:**")
+                stints_vista = stints_piloto[['Stint', 'Compound', 'vuelta_ini', 'vuelta_fin', 'vueltas', 'pendiente_s_vuelta', 'r2']].copy()
+                stints_vista.columns = ['Stint', 'Neumático', 'Desde', 'Hasta', 'Vueltas válidas', 'Degradación (s/vuelta)', 'R²']
+                st.dataframe(stints_vista.round(3), use_container_width=True, hide_index=True)
+
+            # Exportar al modelo del simulador si el circuito existe en circuitos.json
+            # HARD/MEDIUM/SOFT son C distintos en cada GP: se traduce con la asignación de ESTA carrera
+            circuitos_sim = parametros.circuitos()
+            if circuito_sesion in circuitos_sim:
+                duro = st.selectbox("Asignación Pirelli de este GP (duro / medio / blando):", [0, 1, 2, 3, 4],
+                                    index=None, placeholder="Elige los compuestos de esta carrera",
+                                    format_func=lambda n: f"C{n} / C{n + 1} / C{n + 2}", key="asignacion_gp")
+                if duro is not None:
+                    nuevos = degradacion.degradacion_para_neumaticos(
+                        degr_tabla, circuitos_sim[circuito_sesion], parametros.neumaticos(), degradacion.asignacion_compuestos(duro))
+                    if not nuevos:
+                        st.info("Ningún compuesto de esta asignación existe en neumaticos.json")
+                    elif st.button("📤 Aplicar degradación a neumaticos.json"):
+                        degradacion.actualizar_neumaticos(nuevos)
+                        st.success(f"✅ neumaticos.json actualizado: {nuevos}")
+        else:
+            st.warning("⚠️ No hay stints limpios suficientes para estimar degradación")
+
         # Tabla detallada de neumáticos
         st.markdown("### 🛞 Detalle de Neumáticos por Vuelta")
-        tyre_detail = laps_tyre_clean[['LapNumber', 'Compound', 'TyreLife', 'LapTimeSeconds']].copy()
+        tyre_detail = laps_tyre_clean[['LapNumber', 'Compound', 'TyreLife', col_tiempo]].copy()
         tyre_detail.columns = ['Vuelta', 'Neumático', 'Vida', 'Tiempo (s)']
         tyre_detail['Tiempo (s)'] = tyre_detail['Tiempo (s)'].round(3)
         st.dataframe(tyre_detail.head(20), use_container_width=True, hide_index=True)
@@ -273,22 +442,15 @@ if st.session_state.session is not None:
         
         if len(selected_drivers) >= 2:
             # Gráfico comparativo
-            fig, ax = plt.subplots(figsize=(12, 6))
-            
+            series_pilotos = {}
             for driver in selected_drivers:
-                driver_laps = session.laps.pick_driver(driver)
-                driver_laps['LapTimeSeconds'] = driver_laps['LapTime'].dt.total_seconds()
-                driver_laps_clean = driver_laps[driver_laps['LapTimeSeconds'].notna()]
-                
-                ax.plot(driver_laps_clean['LapNumber'], driver_laps_clean['LapTimeSeconds'],
-                       marker='o', linewidth=2, markersize=4, label=driver, alpha=0.8)
+                driver_laps = laps_sesion[laps_sesion['Driver'] == driver]
+                driver_laps_clean = driver_laps[driver_laps[col_tiempo].notna()]
+                series_pilotos[driver] = (driver_laps_clean['LapNumber'].to_numpy(), driver_laps_clean[col_tiempo].to_numpy())
             
-            ax.set_xlabel('Número de Vuelta')
-            ax.set_ylabel('Tiempo (segundos)')
-            ax.set_title('Comparación de Ritmo de Carrera')
-            ax.legend()
-            ax.grid(True, alpha=0.3)
-            st.pyplot(fig)
+            st.image(graficos.grafico("comparacion_pilotos", {
+                'series': series_pilotos,
+            }, dibujar_comparacion_pilotos, figsize=(12, 6)), use_column_width=True)
             
             st.divider()
             
@@ -297,16 +459,15 @@ if st.session_state.session is not None:
             
             stats_data = []
             for driver in selected_drivers:
-                driver_laps = session.laps.pick_driver(driver)
-                driver_laps['LapTimeSeconds'] = driver_laps['LapTime'].dt.total_seconds()
-                driver_laps_clean = driver_laps[driver_laps['LapTimeSeconds'].notna()]
+                driver_laps = laps_sesion[laps_sesion['Driver'] == driver]
+                driver_laps_clean = driver_laps[driver_laps[col_tiempo].notna()]
                 
                 stats_data.append({
                     'Piloto': driver,
                     'Vueltas': len(driver_laps_clean),
-                    'Más Rápida': f"{driver_laps_clean['LapTimeSeconds'].min():.2f}s",
-                    'Promedio': f"{driver_laps_clean['LapTimeSeconds'].mean():.2f}s",
-                    'Más Lenta': f"{driver_laps_clean['LapTimeSeconds'].max():.2f}s"
+                    'Más Rápida': f"{driver_laps_clean[col_tiempo].min():.2f}s",
+                    'Promedio': f"{driver_laps_clean[col_tiempo].mean():.2f}s",
+                    'Más Lenta': f"{driver_laps_clean[col_tiempo].max():.2f}s"
                 })
             
             stats_df = pd.DataFrame(stats_data)
@@ -315,6 +476,106 @@ if st.session_state.session is not None:
         else:
             st.warning("⚠️ Selecciona al menos 2 pilotos para comparar")
 
+    # Tabla 5-Análisis de temporada
+    with tab5:
+        st.markdown("### 📅 Análisis entre Carreras")
+
+        carreras = almacen_vueltas.carreras_ingestadas()
+        st.markdown(f"**Carreras en el almacén local:** {len(carreras)}")
+        if st.button("💾 Guardar esta carrera en el almacén"):
+            n = almacen_vueltas.ingestar_sesion(session)
+            conexion_temporada.clear()
+            st.success(f"✅ Guardadas {n} vueltas de {clave_sesion[1]} {clave_sesion[0]}")
+            carreras = almacen_vueltas.carreras_ingestadas()
+
+        if len(carreras) == 0:
+            st.info("El almacén está vacío. Guarda carreras aquí o ejecuta: python almacen_vueltas.py 2019 2024")
+        else:
+            con = conexion_temporada()
+            years_alm = sorted({c[0] for c in carreras})
+            gps_alm = sorted({c[1] for c in carreras})
+
+            st.divider()
+            st.markdown("### 🛞 Degradación por Compuesto")
+            col1, col2 = st.columns(2)
+            with col1:
+                gp_temp = st.selectbox("Gran Premio:", gps_alm, key="temp_gp")
+            with col2:
+                compuestos = analisis_temporada.compuestos_disponibles(con, gp_temp)
+                compuesto_temp = st.selectbox("Compuesto:", compuestos, key="temp_compuesto")
+            rango = st.select_slider("Temporadas:", options=years_alm, value=(years_alm[0], years_alm[-1]))
+
+            degr = analisis_temporada.degradacion_compuesto(con, gp_temp, compuesto_temp, rango[0], rango[1])
+            if len(degr) > 0:
+                media_total = (degr["degradacion_media_s"] * degr["stints"]).sum() / degr["stints"].sum()
+                st.success(f"💡 Degradación media de {compuesto_temp} en {gp_temp}: **{media_total:.3f} s/vuelta**")
+                degr.columns = ['Año', 'Media (s/vuelta)', 'Mediana (s/vuelta)', 'Stints', 'Vueltas']
+                st.dataframe(degr.round(4), use_container_width=True, hide_index=True)
+            else:
+                st.warning("⚠️ No hay stints válidos para esa combinación")
+
+            combustible_gp = analisis_temporada.efecto_combustible(con, gp_temp)
+            if len(combustible_gp) > 0:
+                st.caption("⛽ Efecto combustible estimado (s/vuelta): " + ", ".join(
+                    f"{int(r.year)}: {r.efecto_combustible_s:.3f}" for r in combustible_gp.itertuples()))
+
+            st.divider()
+            st.markdown("### 📈 Evolución del Ritmo en la Temporada")
+            year_temp = st.selectbox("Temporada:", years_alm, index=len(years_alm) - 1, key="temp_year")
+            tendencia = analisis_temporada.tendencia_ritmo(con, year_temp, corregido=corregir_combustible)
+            pilotos_temp = st.multiselect(
+                "Pilotos:",
+                sorted(tendencia["Driver"].unique()),
+                default=sorted(tendencia["Driver"].unique())[:3],
+                max_selections=5,
+                key="temp_pilotos"
+            )
+            if pilotos_temp:
+                series_temp = {}
+                for driver in pilotos_temp:
+                    d = tendencia[tendencia["Driver"] == driver]
+                    series_temp[driver] = (d["ronda"].to_numpy(), d["delta_mediana_s"].to_numpy())
+                st.image(graficos.grafico("tendencia_temporada", {
+                    'year': year_temp,
+                    'series': series_temp,
+                }, dibujar_tendencia_temporada, figsize=(12, 5)), use_column_width=True)
+
+    # Tabla 6-Telemetría
+    with tab6:
+        st.markdown("### 📡 Telemetría de Vuelta")
+
+        if not telemetria_cargada(session):
+            st.info("La telemetría sólo se descarga cuando se pide: son cientos de miles de puntos por piloto.")
+            if st.button("📡 Cargar telemetría"):
+                with st.spinner("⏳ Cargando telemetría..."):
+                    try:
+                        session.load(laps=True, telemetry=True, weather=False, messages=False)
+                    except Exception as e:
+                        st.error(f"❌ Error: {str(e)}")
+                st.rerun()
+        else:
+            pilotos_tel = st.multiselect("Pilotos (máximo 3):", drivers, default=drivers[:2], max_selections=3, key="tel_pilotos")
+            modo_vuelta = st.radio("Vuelta:", ["⚡ Más rápida", "🔢 Número de vuelta"], horizontal=True)
+            lap_number = None
+            if modo_vuelta == "🔢 Número de vuelta":
+                lap_number = st.number_input("Número de vuelta:", min_value=1,
+                                             max_value=int(laps_sesion['LapNumber'].max()), value=10)
+
+            if pilotos_tel:
+                trazas_pilotos = {}
+                for driver in pilotos_tel:
+                    try:
+                        trazas = trazas_cache(session, clave_sesion, driver, lap_number, telemetria.PUNTOS_PANTALLA)
+                    except Exception as e:
+                        st.warning(f"⚠️ Sin telemetría para {driver}: {e}")
+                        continue
+                    trazas_pilotos[f"{driver} (V{trazas['LapNumber']})"] = trazas
+                if trazas_pilotos:
+                    st.image(graficos.grafico("telemetria", {
+                        'trazas': trazas_pilotos,
+                    }, dibujar_telemetria, figsize=(12, 8)), use_column_width=True)
+                st.caption(f"Trazas reducidas a {telemetria.PUNTOS_PANTALLA} puntos con LTTB (conserva picos y frenadas)")
+
 else:
     # Mensaje inicial
     st.info("👈 Usa el panel lateral para seleccionar un año y Gran Premio, luego haz clic en 'Cargar Datos'")
@@ -326,6 +587,8 @@ else:
     - ⏱️ Analizar tiempos de vuelta por piloto
     - 🛞 Analizar estrategias de neumáticos y degradación
     - 📈 Comparar rendimiento entre pilotos
+    - 📅 Consultar degradación y ritmo entre carreras y temporadas
+    - 📡 Superponer telemetría (velocidad, acelerador, freno) de vueltas rápidas
     - 📊 Visualizar estadísticas detalladas de carrera
     
     Datos proporcionados por **FastF1** (datos oficiales de F1)
@@ -0,0 +1,94 @@
+"""
+Arranque en frío de las páginas Streamlit (cada medición en un proceso nuevo)
+- Tiempo del primer render de cada página, sin carrera cargada (AppTest)
+- Perfil de imports (python -X importtime): qué módulos paga cada página
+- Presupuesto por página: termina con código 1 si alguna lo supera
+Ejecuta desde la raíz del proyecto: python benchmarks/bench_arranque.py [repeticiones]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(RAIZ)
+
+# ms del primer render por encima de la importación de streamlit (mediana de las
+# repeticiones). Medido en 12 arranques: main 140-180, simulador 270-320,
+# applista 180-295, analisis_real 125-175 ms; el presupuesto deja ~50% sobre la
+# mediana para que sólo salte con una regresión real (p. ej. numpy en el login)
+PRESUPUESTO_MS = {
+    "main.py": 250,
+    "simulador.py": 450,
+    "applista.py": 400,
+    "F1_Simulator/analisis_real.py": 250,
+}
+TOP_IMPORTS = 5
+
+# Se ejecuta en el proceso hijo: mide streamlit por separado y luego la página
+SCRIPT_HIJO = """
+import json, sys, time
+t0 = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+t1 = time.perf_counter()
+antes = set(sys.modules)
+at = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+t2 = time.perf_counter()
+print(json.dumps({
+    "streamlit_ms": (t1 - t0) * 1000,
+    "pagina_ms": (t2 - t1) * 1000,
+    "modulos_nuevos": sorted(set(sys.modules) - antes),
+    "errores": [str(e.value) for e in at.exception],
+}))
+"""
+
+
+def ejecutar(pagina, perfil=False):
+    cmd = [sys.executable] + (["-X", "importtime"] if perfil else []) + ["-c", SCRIPT_HIJO, pagina]
+    proc = subprocess.run(cmd, capture_output=True, text=True, cwd=RAIZ)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{pagina}: {proc.stderr.strip().splitlines()[-1:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def imports_pesados(stderr, modulos_nuevos, n=TOP_IMPORTS):
+    """Imports de primer nivel que hizo la página, por tiempo acumulado (ms)"""
+    nuevos = set(modulos_nuevos)
+    pesados = []
+    for linea in stderr.splitlines():
+        if not linea.startswith("import time:") or "cumulative" in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        # sin sangría = import de primer nivel (no arrastrado por otro módulo)
+        if not nombre.startswith("  ") and nombre.strip() in nuevos:
+            pesados.append((nombre.strip(), int(acumulado) / 1000))
+    return sorted(pesados, key=lambda x: -x[1])[:n]
+
+
+def main(repeticiones=3):
+    excedidas = []
+    for pagina, presupuesto in PRESUPUESTO_MS.items():
+        mediciones = [ejecutar(pagina)[0] for _ in range(repeticiones)]
+        pagina_ms = statistics.median(m["pagina_ms"] for m in mediciones)
+        streamlit_ms = statistics.median(m["streamlit_ms"] for m in mediciones)
+        datos, stderr = ejecutar(pagina, perfil=True)
+
+        estado = "OK" if pagina_ms <= presupuesto else "EXCEDIDO"
+        if estado != "OK":
+            excedidas.append(pagina)
+        print(f"{pagina}: {pagina_ms:.0f} ms (presupuesto {presupuesto} ms) [{estado}]"
+              f"  + streamlit {streamlit_ms:.0f} ms, {len(datos['modulos_nuevos'])} módulos nuevos")
+        for error in datos["errores"]:
+            print(f"    error en la página: {error}")
+        for nombre, ms in imports_pesados(stderr, datos["modulos_nuevos"]):
+            print(f"    {ms:8.1f} ms  {nombre}")
+
+    if excedidas:
+        print(f"Presupuesto de arranque excedido: {', '.join(excedidas)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
@@ -0,0 +1,85 @@
+"""
+Benchmark de carga y analítica con datos de fixtures (sin red, determinista)
+- Carga de sesión (resultados, vueltas, telemetría)
+- Corrección de combustible, ajuste de stints, ingesta al almacén,
+  consulta DuckDB y reducción LTTB de telemetría
+Ejecuta desde la raíz del proyecto: python benchmarks/bench_datos.py [repeticiones]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+import fuentes_datos
+import combustible
+import degradacion
+import almacen_vueltas
+import analisis_temporada
+import telemetria
+
+CARRERAS = [(2024, "Monaco"), (2024, "Monza"), (2023, "Bahrain")]
+
+
+def medir(nombre, funcion, repeticiones, filas):
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+    filas.append((nombre, statistics.median(tiempos) * 1000, min(tiempos) * 1000))
+    return resultado
+
+
+def main(repeticiones=5):
+    fuente = fuentes_datos.FuenteFixtures()
+    filas = []
+
+    for year, gp in CARRERAS:
+        etiqueta = f"{gp} {year}"
+
+        def cargar(laps, telemetry):
+            session = fuente.get_session(year, gp)
+            session.load(laps=laps, telemetry=telemetry, weather=False, messages=False)
+            return session
+
+        medir(f"{etiqueta}: carga resultados", lambda: cargar(False, False), repeticiones, filas)
+        session = medir(f"{etiqueta}: carga vueltas", lambda: cargar(True, False), repeticiones, filas)
+        session_tel = medir(f"{etiqueta}: carga telemetría", lambda: cargar(True, True), repeticiones, filas)
+
+        laps, _ = medir(f"{etiqueta}: corrección combustible",
+                        lambda: combustible.vueltas_corregidas(session.laps), repeticiones, filas)
+        medir(f"{etiqueta}: ajuste de stints",
+              lambda: degradacion.ajustar_stints(laps, y_col="CorrectedLapTimeSeconds"), repeticiones, filas)
+        medir(f"{etiqueta}: trazas LTTB (vuelta rápida)",
+              lambda: telemetria.trazas_vuelta(session_tel.laps, session_tel.drivers[0]), repeticiones, filas)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sesiones = []
+        for year, gp in CARRERAS:
+            s = fuente.get_session(year, gp)
+            s.load(telemetry=False)
+            sesiones.append(s)
+        medir("Ingesta almacén (3 carreras)",
+              lambda: [almacen_vueltas.ingestar_sesion(s, tmp) for s in sesiones], repeticiones, filas)
+        con = analisis_temporada.conectar(tmp)
+        medir("Consulta degradación por compuesto",
+              lambda: analisis_temporada.degradacion_compuesto(con, "Monza Grand Prix", "HARD", 2019, 2024),
+              repeticiones, filas)
+        medir("Consulta tendencia de ritmo",
+              lambda: analisis_temporada.tendencia_ritmo(con, 2024), repeticiones, filas)
+
+    ancho = max(len(f[0]) for f in filas)
+    print(f"{'Operación':<{ancho}}  {'mediana (ms)':>12}  {'mínimo (ms)':>12}")
+    for nombre, mediana, minimo in filas:
+        print(f"{nombre:<{ancho}}  {mediana:>12.1f}  {minimo:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
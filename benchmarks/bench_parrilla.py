@@ -0,0 +1,51 @@
+"""
+Benchmark de la simulación de parrilla completa (parrilla.py)
+- 20 coches en cada circuito, con distinto nº de carreras por llamada
+- Imprime carreras/s y coche-vueltas/s (el trabajo útil del modelo)
+- Referencia: el mismo nº de coche-carreras con el motor escalar
+  (simulate_strategy_advanced, un coche sin tráfico) en una muestra pequeña
+Ejecuta desde la raíz del proyecto: python benchmarks/bench_parrilla.py
+"""
+
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+import motor_simulacion as motor
+import parametros
+import parrilla
+
+CARRERAS = (1, 100, 1000, 5000)
+MUESTRA_ESCALAR = 40  # coche-carreras del motor escalar para la referencia
+
+
+def medir(track, coches, n):
+    t0 = time.perf_counter()
+    parrilla.simular_parrilla(track, coches, "Seco", n=n, rng=0)
+    return time.perf_counter() - t0
+
+
+def referencia_escalar(track, coches):
+    car = coches[0]
+    setup = {"motor": motor.MOTOR_OPTIONS[car["motor"]], "aero": motor.AERO_OPTIONS[car["alerones"]]}
+    rng = motor.generador(0)
+    t0 = time.perf_counter()
+    for _ in range(MUESTRA_ESCALAR):
+        motor.simulate_strategy_advanced(track, setup, car["tyre_sequence"], track.pitlane_time_s, "Seco", rng=rng)
+    return (time.perf_counter() - t0) / MUESTRA_ESCALAR
+
+
+if __name__ == "__main__":
+    for nombre, track in parametros.circuitos().items():
+        coches = parrilla.parrilla_por_defecto(["C3", "C2"])
+        por_coche = referencia_escalar(track, coches)
+        print(f"== {nombre} ({track.vueltas} vueltas, {len(coches)} coches, adelantamiento {track.adelantamiento})")
+        print(f"  escalar (1 coche, sin tráfico): {1 / (por_coche * len(coches)):8.1f} carreras de parrilla/s")
+        for n in CARRERAS:
+            s = medir(track, coches, n)
+            print(f"  parrilla n={n:<5}: {s * 1000:8.1f} ms  {n / s:8.1f} carreras/s  "
+                  f"{n * len(coches) * track.vueltas / s / 1e6:6.2f} M coche-vueltas/s")
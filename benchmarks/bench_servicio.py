@@ -0,0 +1,67 @@
+"""
+Benchmark del servicio HTTP de simulación (solo localhost)
+- Arranca servicio.ServicioSimulacion en un puerto libre de 127.0.0.1
+- Lanza peticiones concurrentes (3 configuraciones que se repiten),
+  con y sin agrupación (sin agrupar = cada petición es su propio lote)
+- Imprime latencias, carreras/s y peticiones agrupadas por lote
+Ejecuta desde la raíz del proyecto: python benchmarks/bench_servicio.py [peticiones] [clientes]
+"""
+
+import json
+import os
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+import servicio
+
+PEDIDOS = [
+    {"circuito": "Monza", "estrategia": ["C3", "C2"], "carreras": 500},
+    {"circuito": "Monza", "estrategia": ["C2", "C1"], "motor": "Potente", "carreras": 500},
+    {"circuito": "Silverstone", "estrategia": ["C3", "C3", "C2"], "carreras": 500},
+]
+
+
+def post(url, pedido):
+    req = urllib.request.Request(f"{url}/simular", data=json.dumps(pedido).encode(),
+                                 headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=120) as r:
+        return json.loads(r.read())
+
+
+def get(url, ruta):
+    with urllib.request.urlopen(f"{url}{ruta}", timeout=30) as r:
+        return json.loads(r.read())
+
+
+def ronda(agrupar, peticiones, clientes):
+    srv = servicio.ServicioSimulacion(puerto=0, agrupar=agrupar).iniciar_en_hilo()
+    try:
+        post(srv.url, PEDIDOS[0])  # calienta el pool (importa el motor en los procesos)
+        srv.metricas.reiniciar()
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(clientes) as ex:
+            list(ex.map(lambda i: post(srv.url, PEDIDOS[i % len(PEDIDOS)]), range(peticiones)))
+        pared = time.perf_counter() - t0
+        return pared, get(srv.url, "/metricas")
+    finally:
+        srv.cerrar()
+
+
+def main(peticiones=300, clientes=32):
+    print(f"{peticiones} peticiones de {PEDIDOS[0]['carreras']} carreras, {clientes} clientes concurrentes")
+    for nombre, agrupar in (("sin agrupar", False), ("agrupando", True)):
+        pared, m = ronda(agrupar, peticiones, clientes)
+        lat = m["latencia_ms"]
+        print(f"{nombre:<12} {peticiones / pared:7.1f} pet/s  {m['carreras'] / pared:9.0f} carreras/s  "
+              f"lat p50 {lat['p50']:.1f} ms  p95 {lat['p95']:.1f} ms  "
+              f"{m['lotes']} lotes ({m['peticiones_por_lote']} pet/lote)")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
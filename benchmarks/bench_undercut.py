@@ -0,0 +1,38 @@
+"""
+Benchmark del análisis de undercut/overcut (undercut.py)
+- Dos coches con C3 de 20 vueltas en la vuelta 20 de cada circuito
+- Ventanas de parada y carreras por combinación crecientes, 3 compuestos
+- Imprime el tiempo total y las coche-vueltas simuladas por segundo; la
+  ventana completa (8 vueltas x 3 compuestos) debe quedarse en tiempo interactivo
+Ejecuta desde la raíz del proyecto: python benchmarks/bench_undercut.py
+"""
+
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+os.chdir(RAIZ)
+
+import parametros
+import undercut
+
+CASOS = ((4, 100), (8, 100), (8, 200), (12, 200))  # (ventana, carreras por combinación)
+PRESUPUESTO_S = 1.0  # ventana por defecto: respuesta interactiva
+
+
+if __name__ == "__main__":
+    delante, detras = undercut.estado_coche("C3", 20), undercut.estado_coche("C3", 20)
+    for nombre, track in parametros.circuitos().items():
+        print(f"== {nombre} ({track.vueltas} vueltas)")
+        for ventana, n in CASOS:
+            t0 = time.perf_counter()
+            res = undercut.analizar_undercut(track, delante, detras, 1.5, 20, ventana=ventana, n=n, rng=0)
+            s = time.perf_counter() - t0
+            combinaciones = len(res["opciones"]) ** 2
+            coche_vueltas = 2 * combinaciones * n * (track.vueltas - 20)
+            marca = "  ✘ supera el presupuesto" if (ventana, n) == (undercut.VENTANA_VUELTAS, undercut.CARRERAS) \
+                and s > PRESUPUESTO_S else ""
+            print(f"  ventana {ventana:>2}, {n:>3} carreras: {combinaciones:>5} combinaciones  {s * 1000:7.1f} ms  "
+                  f"{coche_vueltas / s / 1e6:6.2f} M coche-vueltas/s{marca}")
@@ -2,31 +2,30 @@
 # -------------------------
 # IMPORTANTE: adapta rutas si es necesario y asegúrate de tener fastf1 instalado.
 # Ejecuta: py -m python calibrar.py
+# Sin red (datos de fixtures): F1_FUENTE_DATOS=fixtures py -m python calibrar.py
 # -------------------------
 
-import fastf1
-import fastf1.core
 import numpy as np
-import pandas as pd
 import json
 import os
 from math import sqrt
-import random
 import time
+import combustible
+import fuentes_datos
+import parametros
 
 # -------- CONFIG ----------
-fastf1.Cache.enable_cache("fastf1_cache")  # ya la creaste
 YEAR = 2024
 GP = "Monza"           # cambia según lo que quieras calibrar
 DRIVER = None          # si None tomará el primer piloto de la carrera
 N_SIM_PER_CONFIG = 4   # repeticiones por configuración
-SIMULATOR_MODULE = "simulador"  # nombre del módulo/archivo si invocas función; en este script usaremos otra estrategia (ver abajo)
+SIMULATOR_MODULE = "motor_simulacion"  # módulo con el motor de simulación (sin interfaz)
 # --------------------------
 
-# Carga datos reales con FastF1
-print("Cargando datos reales (FastF1)... esto puede tardar...")
-session = fastf1.get_session(YEAR, GP, 'R')
-session.load()
+# Carga datos reales (FastF1 o fixtures, ver fuentes_datos.py)
+print(f"Cargando datos reales ({fuentes_datos.fuente_activa().nombre})... esto puede tardar...")
+session = fuentes_datos.get_session(YEAR, GP, 'R')
+session.load(telemetry=False, weather=False, messages=False)
 
 laps = session.laps
 # si DRIVER none, tomamos el primer driver de la lista
@@ -36,49 +35,40 @@ if DRIVER is None:
 else:
     driver = DRIVER
 
-laps_driver = session.laps.pick_driver(driver)
+# el simulador modela el combustible (circuitos.json): comparamos contra los tiempos reales
+# sin corregir; el efecto por vuelta ajustado con toda la parrilla calibra tiempo_por_kg_s
+laps_corr, info_combustible = combustible.vueltas_corregidas(laps)
+print(f"Efecto combustible: {info_combustible['efecto_s_vuelta']:.3f} s/vuelta ({info_combustible['fuente']})")
+
+laps_driver = laps_corr[laps_corr['DriverNumber'] == str(driver)] if str(driver).isdigit() else laps_corr[laps_corr['Driver'] == driver]
 # eliminar vueltas sin tiempo válido
-laps_driver = laps_driver[laps_driver['LapTime'].notnull()]
+laps_driver = laps_driver[laps_driver['LapTimeSeconds'].notnull()]
 
-mean_real = laps_driver['LapTime'].dt.total_seconds().mean()
-fastest_real = laps_driver['LapTime'].dt.total_seconds().min()
+mean_real = laps_driver['LapTimeSeconds'].mean()
+fastest_real = laps_driver['LapTimeSeconds'].min()
 print(f"Referencia real ({GP} {YEAR}, piloto {driver}): mean={mean_real:.3f}s, fastest={fastest_real:.3f}s, laps={len(laps_driver)}")
 
 # ------------------------------------------------------------
-# Función "wrapper" para simular: aquí simplificamos llamando
-# al simulador como un subprocess sería posible, pero lo más
-# sencillo para evitar integraciones complejas es importar la
-# función de simulación si la hiciste modular. Si no, puedes
-# adaptar la parte de simulación de tu simulador.py en una
-# función reutilizable y luego importarla aquí.
+# Función "wrapper" para simular: el motor vive en
+# motor_simulacion.py (sin Streamlit), así que se importa
+# directamente sin levantar la interfaz del simulador.
 # ------------------------------------------------------------
 
-# Para este ejemplo asumimos que en simulador.py definiste una función:
-# simulate_once(track_dict, motor_choice, aero_choice, tyre_seq, pitlane_time, clima_key)
-# que devuelve dict con 'lap_times' y 'total_time_s'.
-# Si no la tienes así, copia la lógica mínima de simulate_strategy_advanced
-# en una función aquí o adapta el script.
-
-# >>> ADAPTA LA SIGUIENTE FUNCION A TU IMPLEMENTACION LOCAL:
-def simulate_wrapper(track, motor_choice, aero_choice, tyre_seq, pitlane_time, clima_key, seed=None):
+def simulate_wrapper(track, motor_choice, aero_choice, tyre_seq, pitlane_time, clima_key, seed=None, tyres=None):
     """
-    Debes adaptar esta función: puede importar tu simulador.py si defines
-    simulate_strategy_advanced como función allí. Aquí mostramos una
-    versión de ejemplo que simplemente llama a simulador.simulate_strategy_advanced.
+    Ejecuta una simulación con motor_simulacion.simulate_strategy_advanced
+    (clima fijo, sin safety car ni barra de progreso). tyres: tabla de neumáticos candidata.
     """
-    import simulador as simmod  # tu archivo simulador.py debe estar en mismo folder
-    # fija semilla para reproducibilidad ligera
-    if seed is not None:
-        np.random.seed(seed)
-        random.seed(seed)
-    result = simmod.simulate_strategy_advanced(track, {"motor": simmod.MOTOR_OPTIONS[motor_choice], "aero": simmod.AERO_OPTIONS[aero_choice]}, tyre_seq, pitlane_time, clima_key, weather_dynamic=False, show_progress=False)
+    import motor_simulacion as simmod
+    # semilla fija (generador propio de la carrera) para reproducibilidad ligera
+    result = simmod.simulate_strategy_advanced(track, {"motor": simmod.MOTOR_OPTIONS[motor_choice], "aero": simmod.AERO_OPTIONS[aero_choice]}, tyre_seq, pitlane_time, clima_key, weather_dynamic=False, show_progress=False, tyres=tyres, neutralizaciones=False, rng=seed)
     return result
 
 # ------------------------------------------------------------
-# Preparar el objeto 'track' a usar (leer data/circuitos.json)
+# Preparar el objeto 'track' a usar (data/circuitos.json validado)
 # ------------------------------------------------------------
-with open("data/circuitos.json", "r", encoding="utf-8") as f:
-    circuits = json.load(f)
+circuits = parametros.circuitos()
+tyres_ref = parametros.neumaticos()
 
 # toma la referencia del circuito
 if GP not in circuits:
@@ -87,8 +77,14 @@ if GP not in circuits:
 
 track_ref = circuits[GP]
 
+# Coste del combustible: s/vuelta ajustados / kg quemados por vuelta (validado contra el esquema)
+fuel_per_kg = info_combustible["efecto_s_vuelta"] / track_ref.consumo_kg_vuelta if track_ref.consumo_kg_vuelta else 0.0
+fuel_per_kg = min(max(fuel_per_kg, 0.0), parametros.ESQUEMA_CIRCUITO["tiempo_por_kg_s"].maximo)
+track_ref = track_ref.reemplazar(tiempo_por_kg_s=float(fuel_per_kg))
+print(f"Tiempo por kg de combustible: {fuel_per_kg:.4f} s/kg (en JSON: {circuits[GP].tiempo_por_kg_s})")
+
 # Valores base actuales
-current_base = track_ref["tiempo_base_s"]
+current_base = track_ref.tiempo_base_s
 print(f"Tiempo base actual en JSON: {current_base}s")
 
 # Rango para buscar (ejemplo)
@@ -105,18 +101,11 @@ start_time = time.time()
 
 for base_c in base_candidates:
     # parche: actualizar temporalmente el campo en track_ref para la simulación
-    track_tmp = dict(track_ref)
-    track_tmp["tiempo_base_s"] = float(base_c)
+    track_tmp = track_ref.reemplazar(tiempo_base_s=float(base_c))
 
     for degr_c in degr_candidates:
-        # modificar temporalmente en el objeto global de neumáticos:
-        # aqui actualizamos el archivo neumaticos.json en memoria y luego lo restablecemos
-        with open("data/neumaticos.json", "r", encoding="utf-8") as f:
-            tyres_all = json.load(f)
-        tyres_all[tyre_to_calibrate]["degradation_per_lap"] = float(degr_c)
-        # Guardamos temporalmente en disco (opcional) o inyectamos en memoria
-        with open("data/neumaticos.json", "w", encoding="utf-8") as f:
-            json.dump(tyres_all, f, indent=2)
+        # tabla de neumáticos candidata en memoria (neumaticos.json no se toca)
+        tyres_tmp = tyres_ref.con_cambios(tyre_to_calibrate, degradation_per_lap=float(degr_c))
 
         # Ejecutar N_SIM_PER_CONFIG simulaciones y promediar
         means = []
@@ -128,7 +117,7 @@ for base_c in base_candidates:
             aero_choice = "Medio"
             # construir tyre_seq simple: repartir las vueltas en 1 stint (o pitstops según quieres medir)
             tyre_seq = ["C3"]  # para medir efecto, usa 1 stint para simplificar
-            res = simulate_wrapper(track_tmp, motor_choice, aero_choice, tyre_seq, track_tmp.get("pitlane_time_s",22.0), "Seco", seed=seed)
+            res = simulate_wrapper(track_tmp, motor_choice, aero_choice, tyre_seq, track_tmp.pitlane_time_s, "Seco", seed=seed, tyres=tyres_tmp)
             lap_times_only = [x for x in res["lap_times"] if isinstance(x, (int, float))]
             means.append(np.mean(lap_times_only))
             fastest.append(np.min(lap_times_only))
@@ -160,6 +149,8 @@ if apply_change == "s":
     with open("data/circuitos.json", "r", encoding="utf-8") as f:
         circuits_all = json.load(f)
     circuits_all[GP]["tiempo_base_s"] = float(best_config["base"])
+    circuits_all[GP]["tiempo_por_kg_s"] = float(fuel_per_kg)
+    parametros.CIRCUITOS.compilar(circuits_all)  # validar antes de escribir
     with open("data/circuitos.json", "w", encoding="utf-8") as f:
         json.dump(circuits_all, f, indent=2)
 
@@ -167,6 +158,7 @@ if apply_change == "s":
     with open("data/neumaticos.json", "r", encoding="utf-8") as f:
         tyres_all = json.load(f)
     tyres_all[tyre_to_calibrate]["degradation_per_lap"] = float(best_config["degradation"])
+    parametros.NEUMATICOS.compilar(tyres_all)
     with open("data/neumaticos.json", "w", encoding="utf-8") as f:
         json.dump(tyres_all, f, indent=2)
 
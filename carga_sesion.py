@@ -0,0 +1,187 @@
+"""
+Carga de sesiones (fuentes_datos: FastF1 o fixtures) en segundo plano
+- Registro de trabajos compartido por todo el proceso (todas las pestañas del navegador)
+- Cada carga avanza por etapas: primero resultados, luego vueltas,
+  y la interfaz pinta lo que ya está disponible mientras tanto (con las
+  vueltas ya en caché, una sola carga completa)
+- Cancelación cooperativa entre etapas (p. ej. al cambiar de GP); la
+  selección más reciente no espera detrás de las canceladas
+"""
+
+import logging
+import threading
+import uuid
+
+# Etapas en orden; 'vueltas' es la carga completa
+PENDIENTE = "pendiente"
+RESULTADOS = "resultados"
+VUELTAS = "vueltas"
+ERROR = "error"
+CANCELADO = "cancelado"
+
+MENSAJES = {
+    PENDIENTE: "En cola...",
+    RESULTADOS: "Resultados listos, cargando vueltas...",
+    VUELTAS: "Carga completa",
+    ERROR: "Error en la carga",
+    CANCELADO: "Carga cancelada",
+}
+
+MAX_CARGAS_SIMULTANEAS = 2
+MAX_CARGAS_ABANDONADAS = 4  # cargas canceladas que aún terminan su session.load en segundo plano
+
+
+class TrabajoCarga:
+    """Estado de la carga de una sesión de carrera (year, gp)"""
+
+    def __init__(self, year, gp):
+        self.id = uuid.uuid4().hex
+        self.year = year
+        self.gp = gp
+        self.etapa = PENDIENTE
+        self.session = None
+        self.error = None
+        self._cancelado = threading.Event()
+
+    @property
+    def cancelado(self):
+        return self._cancelado.is_set()
+
+    @property
+    def terminado(self):
+        return self.etapa in (VUELTAS, ERROR, CANCELADO)
+
+    @property
+    def vueltas_listas(self):
+        return self.etapa == VUELTAS
+
+    @property
+    def mensaje(self):
+        return f"{self.gp} {self.year}: {MENSAJES[self.etapa]}"
+
+    def cancelar(self):
+        self._cancelado.set()
+        if not self.terminado:
+            self.etapa = CANCELADO
+
+
+def _cargar(session, laps):
+    session.load(laps=laps, telemetry=False, weather=False, messages=False)
+    return session
+
+
+def _ejecutar(trabajo):
+    """
+    Hilo de trabajo. Con las vueltas ya en caché hay UNA carga (completa);
+    con caché fría, primero los resultados (pocos KB: salen mucho antes que
+    las vueltas) y luego la carga completa sobre otra sesión, que reutiliza
+    de la caché lo ya descargado. Cada etapa publica una sesión entera: la
+    interfaz nunca lee un objeto que se está modificando.
+    """
+    # import diferido: FastF1/pandas se cargan en el hilo de trabajo, no al abrir la página
+    import fuentes_datos
+
+    try:
+        session = fuentes_datos.get_session(trabajo.year, trabajo.gp, 'R')
+        if not fuentes_datos.vueltas_en_cache(session):
+            _cargar(session, laps=False)
+            if trabajo.cancelado:
+                return
+            trabajo.session = session
+            trabajo.etapa = RESULTADOS
+            session = fuentes_datos.get_session(trabajo.year, trabajo.gp, 'R')
+        if trabajo.cancelado:
+            return
+        _cargar(session, laps=True)
+        if trabajo.cancelado:
+            return
+        trabajo.session = session
+        trabajo.etapa = VUELTAS
+    except Exception as e:
+        logging.getLogger(__name__).debug("Error cargando %s %s", trabajo.gp, trabajo.year, exc_info=True)
+        trabajo.error = str(e)
+        trabajo.etapa = ERROR
+
+
+class RegistroCargas:
+    """
+    Trabajos activos por id, con como mucho max_simultaneas cargas en curso.
+    - Los pendientes arrancan del más reciente al más antiguo: la última
+      selección del usuario no espera detrás de las que ya dejó
+    - Una carga cancelada deja su hueco en el acto: su session.load no se
+      puede interrumpir y termina en su hilo, pero ya no bloquea a nadie
+      (como mucho MAX_CARGAS_ABANDONADAS a la vez, para no acumular hilos)
+    """
+
+    def __init__(self, max_simultaneas=MAX_CARGAS_SIMULTANEAS, max_abandonadas=MAX_CARGAS_ABANDONADAS):
+        self.max_simultaneas = max_simultaneas
+        self.max_abandonadas = max_abandonadas
+        self._trabajos = {}
+        self._pendientes = []
+        self._en_curso = set()     # ids de los trabajos que ocupan hueco
+        self._abandonadas = set()  # ids cancelados cuyo hilo sigue cargando
+        self._lock = threading.Lock()
+
+    def iniciar(self, year, gp):
+        trabajo = TrabajoCarga(year, gp)
+        with self._lock:
+            self._trabajos[trabajo.id] = trabajo
+            self._pendientes.append(trabajo)
+        self._lanzar()
+        return trabajo.id
+
+    def _lanzar(self):
+        """Arranca los pendientes más recientes mientras haya hueco"""
+        with self._lock:
+            while (self._pendientes and len(self._en_curso) < self.max_simultaneas
+                   and len(self._abandonadas) < self.max_abandonadas):
+                trabajo = self._pendientes.pop()
+                if trabajo.cancelado:
+                    continue
+                self._en_curso.add(trabajo.id)
+                threading.Thread(target=self._correr, args=(trabajo,), name="carga_sesion", daemon=True).start()
+
+    def _correr(self, trabajo):
+        try:
+            _ejecutar(trabajo)
+        finally:
+            with self._lock:
+                self._en_curso.discard(trabajo.id)
+                self._abandonadas.discard(trabajo.id)
+            self._lanzar()
+
+    def obtener(self, trabajo_id):
+        if trabajo_id is None:
+            return None
+        with self._lock:
+            return self._trabajos.get(trabajo_id)
+
+    def cancelar(self, trabajo_id):
+        """Cancela y olvida el trabajo; si ya estaba en curso, su resultado se descarta"""
+        with self._lock:
+            trabajo = self._trabajos.pop(trabajo_id, None)
+            if trabajo is None:
+                return
+            trabajo.cancelar()
+            if trabajo in self._pendientes:
+                self._pendientes.remove(trabajo)
+            if trabajo.id in self._en_curso:
+                self._en_curso.discard(trabajo.id)
+                self._abandonadas.add(trabajo.id)
+        self._lanzar()
+
+    def descartar(self, trabajo_id):
+        """Olvida un trabajo terminado (la sesión ya la guarda quien la pidió)"""
+        with self._lock:
+            self._trabajos.pop(trabajo_id, None)
+
+    def activos(self):
+        with self._lock:
+            return [t for t in self._trabajos.values() if not t.terminado]
+
+
+_registro = RegistroCargas()
+
+
+def registro():
+    return _registro
@@ -0,0 +1,179 @@
+"""
+Catálogo de simulaciones guardadas (índice SQLite junto al almacén de resultados)
+- Una fila por carrera simulada: circuito, setup, estrategia, clima,
+  semilla, tiempo total y ruta a sus vueltas en el almacén Parquet
+- Se actualiza al cerrar cada lote (almacen_resultados.EscritorResultados);
+  si se pierde, se reconstruye leyendo el almacén
+- Consultas indexadas: mejores estrategias por circuito sin re-simular
+- Uso por consola: python catalogo.py [circuito] | python catalogo.py --reconstruir
+"""
+
+import glob
+import os
+import sqlite3
+import sys
+
+import almacen_resultados
+
+CATALOGO = "catalogo.sqlite"
+FILAS_POR_LECTURA = 65536
+
+ESQUEMA_SQL = """
+CREATE TABLE IF NOT EXISTS simulaciones (
+    id_lote TEXT NOT NULL,
+    carrera INTEGER NOT NULL,
+    circuito TEXT NOT NULL,
+    fecha TEXT NOT NULL,
+    motor TEXT,
+    alerones TEXT,
+    clima_inicial TEXT,
+    estrategia TEXT,
+    pitstops INTEGER,
+    semilla INTEGER,
+    total_time_s REAL,
+    clima_final TEXT,
+    eventos INTEGER,
+    creado TEXT,
+    ruta_vueltas TEXT,
+    PRIMARY KEY (id_lote, carrera)
+);
+CREATE INDEX IF NOT EXISTS idx_circuito_tiempo ON simulaciones (circuito, total_time_s);
+CREATE INDEX IF NOT EXISTS idx_circuito_setup
+    ON simulaciones (circuito, motor, alerones, clima_inicial, estrategia);
+"""
+
+COLUMNAS = ("id_lote", "carrera", "circuito", "fecha", "motor", "alerones", "clima_inicial",
+            "estrategia", "pitstops", "semilla", "total_time_s", "clima_final", "eventos",
+            "creado", "ruta_vueltas")
+
+
+def ruta_catalogo(directorio=None):
+    return os.path.join(directorio or almacen_resultados.RESULTADOS_DIR, CATALOGO)
+
+
+def conectar(directorio=None):
+    """Conexión nueva (una por consulta: sirve desde cualquier hilo de Streamlit)"""
+    ruta = ruta_catalogo(directorio)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    con = sqlite3.connect(ruta, timeout=30)
+    con.row_factory = sqlite3.Row
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(ESQUEMA_SQL)
+    return con
+
+
+def registrar_lote(ruta_carreras, ruta_vueltas, circuito, fecha, directorio=None):
+    """Indexa las carreras de un archivo de lote. Repetirlo no duplica filas."""
+    import pyarrow.parquet as pq
+
+    archivo = pq.ParquetFile(ruta_carreras)
+    con = conectar(directorio)
+    n = 0
+    try:
+        with con:
+            for lote in archivo.iter_batches(batch_size=FILAS_POR_LECTURA):
+                d = lote.to_pydict()
+                filas = [
+                    (d["id_lote"][i], d["carrera"][i], circuito, fecha, d["motor"][i], d["alerones"][i],
+                     d["clima_inicial"][i], d["estrategia"][i], d["pitstops"][i], d["semilla"][i],
+                     d["total_time_s"][i], d["clima_final"][i], d["eventos"][i],
+                     d["creado"][i].isoformat(sep=" ") if d["creado"][i] else None, ruta_vueltas)
+                    for i in range(lote.num_rows)
+                ]
+                con.executemany(f"INSERT OR IGNORE INTO simulaciones VALUES ({', '.join('?' * len(COLUMNAS))})", filas)
+                n += len(filas)
+    finally:
+        con.close()
+    return n
+
+
+def reconstruir(directorio=None):
+    """Vuelve a crear el catálogo a partir de los archivos del almacén"""
+    ruta = ruta_catalogo(directorio)
+    for sufijo in ("", "-wal", "-shm"):
+        if os.path.exists(ruta + sufijo):
+            os.remove(ruta + sufijo)
+    base = directorio or almacen_resultados.RESULTADOS_DIR
+    n = 0
+    patron = os.path.join(base, "carreras", "circuito=*", "fecha=*", "lote-*.parquet")
+    for ruta_carreras in sorted(glob.glob(patron)):
+        carpeta_fecha = os.path.dirname(ruta_carreras)
+        fecha = os.path.basename(carpeta_fecha)[len("fecha="):]
+        circuito = os.path.basename(os.path.dirname(carpeta_fecha))[len("circuito="):]
+        ruta_vueltas = os.path.join(almacen_resultados.ruta_particion("vueltas", circuito, fecha, directorio),
+                                    os.path.basename(ruta_carreras))
+        n += registrar_lote(ruta_carreras, ruta_vueltas, circuito, fecha, directorio)
+    return n
+
+
+def _consultar(sql, parametros=(), directorio=None):
+    if not os.path.exists(ruta_catalogo(directorio)):
+        return []
+    con = conectar(directorio)
+    try:
+        return [dict(fila) for fila in con.execute(sql, parametros)]
+    finally:
+        con.close()
+
+
+def _filtros(circuito, motor=None, alerones=None, clima=None):
+    condiciones, valores = ["circuito = ?"], [circuito]
+    for columna, valor in (("motor", motor), ("alerones", alerones), ("clima_inicial", clima)):
+        if valor is not None:
+            condiciones.append(f"{columna} = ?")
+            valores.append(valor)
+    return " AND ".join(condiciones), valores
+
+
+def mejores_estrategias(circuito, motor=None, alerones=None, clima=None, limite=10, directorio=None):
+    """
+    Estrategias ya simuladas en el circuito (con el setup/clima dados),
+    ordenadas por tiempo total medio. Usa el índice por circuito y setup.
+    """
+    donde, valores = _filtros(circuito, motor, alerones, clima)
+    return _consultar(f"""
+        SELECT estrategia, motor, alerones, clima_inicial,
+               COUNT(*) AS carreras,
+               AVG(total_time_s) AS media_s,
+               MIN(total_time_s) AS mejor_s,
+               MAX(total_time_s) AS peor_s
+        FROM simulaciones
+        WHERE {donde}
+        GROUP BY estrategia, motor, alerones, clima_inicial
+        ORDER BY media_s
+        LIMIT ?""", valores + [int(limite)], directorio)
+
+
+def mejores_carreras(circuito, limite=10, directorio=None):
+    """Carreras más rápidas del circuito, con semilla y ruta para repetirlas o leerlas"""
+    return _consultar("""
+        SELECT * FROM simulaciones WHERE circuito = ?
+        ORDER BY total_time_s LIMIT ?""", (circuito, int(limite)), directorio)
+
+
+def buscar(circuito=None, estrategia=None, semilla=None, id_lote=None, limite=100, directorio=None):
+    """Simulaciones que cumplen los filtros dados (los None no filtran)"""
+    condiciones, valores = [], []
+    for columna, valor in (("circuito", circuito), ("estrategia", estrategia),
+                           ("semilla", semilla), ("id_lote", id_lote)):
+        if valor is not None:
+            condiciones.append(f"{columna} = ?")
+            valores.append(valor)
+    donde = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    return _consultar(f"SELECT * FROM simulaciones {donde} ORDER BY creado DESC LIMIT ?",
+                      valores + [int(limite)], directorio)
+
+
+# -----------------------------
+# USO POR CONSOLA
+# -----------------------------
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--reconstruir"]:
+        print(f"Catálogo reconstruido: {reconstruir()} simulaciones")
+    else:
+        circuitos = sys.argv[1:] or [f["circuito"] for f in _consultar("SELECT DISTINCT circuito FROM simulaciones")]
+        for circuito in circuitos:
+            print(f"== {circuito}")
+            for f in mejores_estrategias(circuito):
+                print(f"  {f['estrategia']:<20} {f['motor']}/{f['alerones']}/{f['clima_inicial']}: "
+                      f"media {f['media_s']:.1f} s, mejor {f['mejor_s']:.1f} s ({f['carreras']} carreras)")
@@ -0,0 +1,393 @@
+"""
+Cola local de trabajos largos de simulación (estudios Monte Carlo y barridos de estrategias)
+- Los trabajos se ejecutan en un pool de procesos: la página que los lanza
+  sigue respondiendo y un rerun de Streamlit no los interrumpe
+- Cada trabajo guarda en disco su definición y su estado (progreso y
+  resultados parciales) en resultados/trabajos/<id>/: tras recargar la
+  página se vuelve a enganchar con su id
+- Cancelación cooperativa entre bloques (archivo 'cancelar' en su carpeta)
+- Uso por consola: python cola_trabajos.py  (lista los trabajos guardados)
+"""
+
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+# -----------------------------
+# CONFIG
+# -----------------------------
+TRABAJOS_DIR = os.path.join("resultados", "trabajos")
+CARRERAS_POR_BLOQUE = 2000  # carreras entre dos escrituras de progreso (y comprobaciones de cancelación)
+MAX_CARRERAS = 2_000_000
+MAX_ESTRATEGIAS = 1000
+
+MONTECARLO = "montecarlo"
+ESTRATEGIAS = "estrategias"
+TIPOS = (MONTECARLO, ESTRATEGIAS)
+
+# Estados
+PENDIENTE = "pendiente"
+EN_CURSO = "en_curso"
+TERMINADO = "terminado"
+CANCELADO = "cancelado"
+ERROR = "error"
+INTERRUMPIDO = "interrumpido"  # el proceso que lo ejecutaba ya no existe
+FINALES = (TERMINADO, CANCELADO, ERROR, INTERRUMPIDO)
+
+MENSAJES = {
+    PENDIENTE: "En cola...",
+    EN_CURSO: "En curso",
+    TERMINADO: "Terminado",
+    CANCELADO: "Cancelado",
+    ERROR: "Error",
+    INTERRUMPIDO: "Interrumpido (se cerró el servidor)",
+}
+
+
+class TrabajoInvalido(ValueError):
+    """Definición de trabajo con campos que no existen o fuera de rango"""
+
+
+# -----------------------------
+# Archivos de un trabajo
+# -----------------------------
+def carpeta(trabajo_id, directorio=None):
+    return os.path.join(directorio or TRABAJOS_DIR, trabajo_id)
+
+
+def _escribir_json(ruta, datos):
+    """Escritura atómica: quien sondea el estado nunca lee un archivo a medias"""
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+def _leer_json(ruta):
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _cancelacion_pedida(trabajo_id, directorio):
+    return os.path.exists(os.path.join(carpeta(trabajo_id, directorio), "cancelar"))
+
+
+# -----------------------------
+# Definición de trabajos
+# -----------------------------
+def _entero(definicion, campo, defecto):
+    """int de un campo de la definición; TrabajoInvalido (con el campo) si no es un entero"""
+    valor = definicion.get(campo, defecto)
+    try:
+        if isinstance(valor, bool):
+            raise TypeError
+        return int(valor)
+    except (TypeError, ValueError):
+        raise TrabajoInvalido(f"'{campo}' debe ser un entero (recibido {valor!r})") from None
+
+
+def validar(tipo, definicion):
+    """Definición normalizada: config de carrera y tamaño del estudio"""
+    import parametros
+    from motor_simulacion import MOTOR_OPTIONS, AERO_OPTIONS, CLIMA_OPTIONS, QMC_METODOS
+
+    if tipo not in TIPOS:
+        raise TrabajoInvalido(f"tipo '{tipo}' no existe ({', '.join(TIPOS)})")
+    d = {
+        "circuito": definicion.get("circuito"),
+        "motor": definicion.get("motor", "Equilibrado"),
+        "alerones": definicion.get("alerones", "Medio"),
+        "clima": definicion.get("clima", "Seco"),
+        "clima_dinamico": bool(definicion.get("clima_dinamico", True)),
+        "carreras": _entero(definicion, "carreras", 10_000),
+        "semilla": definicion.get("semilla"),
+        "muestreo": definicion.get("muestreo"),  # None (pseudoaleatorio) o un método QMC
+    }
+    for campo, opciones in (("circuito", parametros.circuitos()), ("motor", MOTOR_OPTIONS),
+                            ("alerones", AERO_OPTIONS), ("clima", CLIMA_OPTIONS)):
+        if d[campo] not in opciones:
+            raise TrabajoInvalido(f"{campo} '{d[campo]}' no existe ({', '.join(opciones)})")
+    if d["muestreo"] is not None and d["muestreo"] not in QMC_METODOS:
+        raise TrabajoInvalido(f"muestreo '{d['muestreo']}' no existe ({', '.join(QMC_METODOS)})")
+    neumaticos = parametros.neumaticos()
+    if tipo == MONTECARLO:
+        d["tyre_sequence"] = list(definicion.get("tyre_sequence") or ())
+        if not d["tyre_sequence"]:
+            raise TrabajoInvalido("falta 'tyre_sequence' (un neumático por stint)")
+        for tyre in d["tyre_sequence"]:
+            if tyre not in neumaticos:
+                raise TrabajoInvalido(f"neumático '{tyre}' no existe ({', '.join(neumaticos)})")
+        if not 1 <= d["carreras"] <= MAX_CARRERAS:
+            raise TrabajoInvalido(f"'carreras' debe estar entre 1 y {MAX_CARRERAS}")
+    else:
+        d["pitstops"] = _entero(definicion, "pitstops", 1)
+        d["neumaticos"] = list(definicion.get("neumaticos") or neumaticos.keys())
+        for tyre in d["neumaticos"]:
+            if tyre not in neumaticos:
+                raise TrabajoInvalido(f"neumático '{tyre}' no existe ({', '.join(neumaticos)})")
+        if not 0 <= d["pitstops"] <= 3:
+            raise TrabajoInvalido("'pitstops' debe estar entre 0 y 3")
+        n_estrategias = len(d["neumaticos"]) ** (d["pitstops"] + 1)
+        if n_estrategias > MAX_ESTRATEGIAS:
+            raise TrabajoInvalido(f"{n_estrategias} estrategias: el máximo es {MAX_ESTRATEGIAS}")
+        if not 1 <= d["carreras"] * n_estrategias <= MAX_CARRERAS:
+            raise TrabajoInvalido(f"carreras x estrategias debe estar entre 1 y {MAX_CARRERAS}")
+    if d["semilla"] is None:
+        from motor_simulacion import nueva_semilla
+        d["semilla"] = nueva_semilla()
+    d["semilla"] = _entero(d, "semilla", None)
+    if d["semilla"] < 0:
+        raise TrabajoInvalido("'semilla' no puede ser negativa")
+    return d
+
+
+def estrategias_posibles(neumaticos, pitstops):
+    return [list(s) for s in itertools.product(neumaticos, repeat=pitstops + 1)]
+
+
+# -----------------------------
+# Ejecución (en los procesos del pool)
+# -----------------------------
+def _resumen(tiempos):
+    import numpy as np
+
+    p10, p50, p90 = np.percentile(tiempos, [10, 50, 90])
+    return {
+        "carreras": int(len(tiempos)), "media_s": float(tiempos.mean()), "std_s": float(tiempos.std()),
+        "p10_s": float(p10), "p50_s": float(p50), "p90_s": float(p90),
+        "mejor_s": float(tiempos.min()), "peor_s": float(tiempos.max()),
+    }
+
+
+def _bloques(definicion):
+    """(tyre_sequence, carreras, índice) de cada bloque del trabajo, en orden"""
+    if "tyre_sequence" in definicion:
+        total = definicion["carreras"]
+        for i, ini in enumerate(range(0, total, CARRERAS_POR_BLOQUE)):
+            yield definicion["tyre_sequence"], min(CARRERAS_POR_BLOQUE, total - ini), i
+    else:
+        estrategias = estrategias_posibles(definicion["neumaticos"], definicion["pitstops"])
+        for i, estrategia in enumerate(estrategias):
+            yield estrategia, definicion["carreras"], i
+
+
+def ejecutar(trabajo_id, directorio=None):
+    """
+    Ejecuta un trabajo guardado (proceso del pool). Tras cada bloque escribe
+    el estado con los resultados parciales y mira si se pidió cancelar.
+    Monte Carlo: resumen acumulado (con el error de la media, de la
+    dispersión entre bloques: cada bloque es una réplica independiente,
+    también con QMC) y, al terminar, tiempos.npy con todas las carreras.
+    Barrido: clasificación de las estrategias ya simuladas.
+    """
+    import numpy as np
+    import motor_simulacion as motor
+    import parametros
+    from cuasi_montecarlo import error_replicas
+
+    ruta = carpeta(trabajo_id, directorio)
+    trabajo = _leer_json(os.path.join(ruta, "trabajo.json"))
+    d = trabajo["definicion"]
+    es_montecarlo = trabajo["tipo"] == MONTECARLO
+    total = d["carreras"] if es_montecarlo else d["carreras"] * len(
+        estrategias_posibles(d["neumaticos"], d["pitstops"]))
+    estado = {"estado": EN_CURSO, "pid": os.getpid(), "hechas": 0, "total": total,
+              "inicio": time.time(), "parcial": None, "error": None}
+
+    def guardar():
+        estado["actualizado"] = time.time()
+        _escribir_json(os.path.join(ruta, "estado.json"), estado)
+
+    if _cancelacion_pedida(trabajo_id, directorio):
+        estado["estado"] = CANCELADO
+        guardar()
+        return CANCELADO
+    guardar()
+
+    try:
+        track = parametros.circuitos()[d["circuito"]]
+        tyres = parametros.neumaticos()
+        car_setup = {"motor": motor.MOTOR_OPTIONS[d["motor"]], "aero": motor.AERO_OPTIONS[d["alerones"]]}
+        tiempos, clasificacion = [], []
+        for tyre_sequence, n, i in _bloques(d):
+            if _cancelacion_pedida(trabajo_id, directorio):
+                estado["estado"] = CANCELADO
+                break
+            # semilla por bloque: el resultado no depende de cuándo se mire el progreso
+            rng = np.random.default_rng(np.random.SeedSequence([d["semilla"], i]))
+            res = motor.simular_lote(track, car_setup, tyre_sequence, track.pitlane_time_s, d["clima"], n,
+                                     weather_dynamic=d["clima_dinamico"], rng=rng, tyres=tyres,
+                                     qmc=d.get("muestreo"))
+            estado["hechas"] += n
+            if es_montecarlo:
+                tiempos.append(res["total_time_s"])
+                estado["parcial"] = {**_resumen(np.concatenate(tiempos)),
+                                     "error_media_s": error_replicas([t.mean() for t in tiempos], [len(t) for t in tiempos])}
+            else:
+                clasificacion.append({"estrategia": "-".join(tyre_sequence), **_resumen(res["total_time_s"])})
+                clasificacion.sort(key=lambda f: f["media_s"])
+                estado["parcial"] = clasificacion
+            guardar()
+        else:
+            estado["estado"] = TERMINADO
+        if es_montecarlo and tiempos:
+            np.save(os.path.join(ruta, "tiempos.npy"), np.concatenate(tiempos))
+    except Exception as e:
+        estado["estado"] = ERROR
+        estado["error"] = str(e)
+    guardar()
+    return estado["estado"]
+
+
+# -----------------------------
+# Cola (proceso de la aplicación)
+# -----------------------------
+class ColaTrabajos:
+    """
+    Trabajos de todo el servidor (todas las pestañas del navegador).
+    El estado se lee siempre del disco: la cola en memoria solo sabe qué
+    lanzó este proceso, para detectar los que quedaron huérfanos.
+    """
+
+    def __init__(self, procesos=None, directorio=None):
+        self.directorio = directorio
+        self.procesos = procesos or os.cpu_count() or 1
+        self._pool = None
+        self._futuros = {}
+        self._lock = threading.Lock()
+
+    def _pool_activo(self):
+        # spawn: los procesos no heredan los hilos del servidor de Streamlit
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.procesos,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    def enviar(self, tipo, definicion):
+        """Valida, guarda y encola un trabajo. Devuelve su id."""
+        definicion = validar(tipo, definicion)
+        trabajo_id = datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        ruta = carpeta(trabajo_id, self.directorio)
+        os.makedirs(ruta, exist_ok=True)
+        _escribir_json(os.path.join(ruta, "trabajo.json"), {
+            "id": trabajo_id, "tipo": tipo, "definicion": definicion,
+            "creado": time.time(), "pid_cola": os.getpid(),
+        })
+        _escribir_json(os.path.join(ruta, "estado.json"), {
+            "estado": PENDIENTE, "hechas": 0, "total": None, "parcial": None, "error": None})
+        with self._lock:
+            futuro = self._pool_activo().submit(ejecutar, trabajo_id, self.directorio)
+            self._futuros[trabajo_id] = futuro
+        futuro.add_done_callback(lambda f: self._al_terminar(trabajo_id, f))
+        return trabajo_id
+
+    def _al_terminar(self, trabajo_id, futuro):
+        """Si el proceso murió sin escribir su estado final (p. ej. pool roto), se marca como error"""
+        with self._lock:
+            self._futuros.pop(trabajo_id, None)
+        if futuro.cancelled() or futuro.exception() is None:
+            return
+        ruta = os.path.join(carpeta(trabajo_id, self.directorio), "estado.json")
+        estado = _leer_json(ruta) or {}
+        if estado.get("estado") not in FINALES:
+            _escribir_json(ruta, {**estado, "estado": ERROR, "error": repr(futuro.exception())})
+
+    def estado(self, trabajo_id):
+        """Definición y estado (con resultados parciales) de un trabajo, o None si no existe"""
+        if not trabajo_id or os.sep in trabajo_id or trabajo_id.startswith("."):
+            return None
+        ruta = carpeta(trabajo_id, self.directorio)
+        trabajo = _leer_json(os.path.join(ruta, "trabajo.json"))
+        estado = _leer_json(os.path.join(ruta, "estado.json"))
+        if trabajo is None or estado is None:
+            return None
+        if estado["estado"] not in FINALES:
+            # si el proceso que debía terminarlo ya no existe, no va a avanzar
+            pid = estado.get("pid") if estado["estado"] == EN_CURSO else trabajo.get("pid_cola")
+            if pid is not None and not _proceso_vivo(pid):
+                estado["estado"] = INTERRUMPIDO
+        return {**trabajo, **estado}
+
+    def cancelar(self, trabajo_id):
+        """Pide cancelar: si aún no empezó no llega a ejecutarse; si está en curso para tras el bloque actual"""
+        info = self.estado(trabajo_id)
+        if info is None or info["estado"] in FINALES:
+            return False
+        open(os.path.join(carpeta(trabajo_id, self.directorio), "cancelar"), "w").close()
+        with self._lock:
+            futuro = self._futuros.get(trabajo_id)
+        if futuro is not None and futuro.cancel():
+            _escribir_json(os.path.join(carpeta(trabajo_id, self.directorio), "estado.json"), {
+                **{k: info[k] for k in ("hechas", "total", "parcial", "error")}, "estado": CANCELADO})
+        return True
+
+    def tiempos(self, trabajo_id):
+        """Tiempos totales de todas las carreras de un Monte Carlo terminado (o None)"""
+        import numpy as np
+
+        ruta = os.path.join(carpeta(trabajo_id, self.directorio), "tiempos.npy")
+        return np.load(ruta) if os.path.exists(ruta) else None
+
+    def recientes(self, limite=10):
+        """Trabajos guardados, del más nuevo al más viejo"""
+        base = self.directorio or TRABAJOS_DIR
+        if not os.path.isdir(base):
+            return []
+        ids = sorted((n for n in os.listdir(base) if not n.startswith(".")), reverse=True)
+        trabajos = (self.estado(i) for i in ids)
+        return [t for t in trabajos if t is not None][:limite]
+
+    def cerrar(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+
+_cola = ColaTrabajos()
+
+
+def cola():
+    return _cola
+
+
+def descripcion(info):
+    """Texto corto de un trabajo (para listas y títulos)"""
+    d = info["definicion"]
+    if info["tipo"] == MONTECARLO:
+        que = f"Monte Carlo {'-'.join(d['tyre_sequence'])} x {d['carreras']}"
+    else:
+        que = f"Barrido {d['pitstops']} parada(s) x {d['carreras']}"
+    if d.get("muestreo"):
+        que += f" ({d['muestreo'].capitalize()})"
+    return f"{d['circuito']} · {que} · {MENSAJES[info['estado']]}"
+
+
+# -----------------------------
+# USO POR CONSOLA
+# -----------------------------
+if __name__ == "__main__":
+    trabajos = cola().recientes(limite=50)
+    if not trabajos:
+        print(f"No hay trabajos guardados ({TRABAJOS_DIR})")
+    for t in trabajos:
+        progreso = f"{t['hechas']}/{t['total']}" if t.get("total") else "-"
+        print(f"{t['id']}  {descripcion(t):<60} {progreso}")
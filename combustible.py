@@ -0,0 +1,72 @@
+"""
+Corrección de combustible para tiempos de vuelta reales (FastF1)
+- Estima el efecto del combustible por circuito (s ganados por vuelta)
+  con un único ajuste de mínimos cuadrados para toda la parrilla:
+  t = ritmo_piloto + desgaste_compuesto * TyreLife + efecto * (vueltas que quedan)
+  El desgaste se reinicia en cada parada y la carga de combustible no,
+  por eso ambos efectos se pueden separar.
+- Añade 'CorrectedLapTimeSeconds': tiempo equivalente con el tanque vacío
+"""
+
+import numpy as np
+import pandas as pd
+
+from degradacion import vueltas_de_stint
+
+# Referencia física (reglamento actual): ~110 kg al salir, ~0.03 s por kg
+COMBUSTIBLE_INICIAL_KG = 110.0
+TIEMPO_POR_KG_S = 0.03
+# El ajuste se acepta sólo dentro de [0, FACTOR_MAX_PRIOR * referencia física]
+FACTOR_MAX_PRIOR = 3.0
+MIN_VUELTAS_AJUSTE = 100
+
+
+def efecto_fisico(vueltas_totales):
+    """Segundos ganados por vuelta quemando combustible (referencia física)"""
+    return TIEMPO_POR_KG_S * COMBUSTIBLE_INICIAL_KG / max(1, vueltas_totales)
+
+
+def vueltas_totales_carrera(laps):
+    return int(pd.to_numeric(laps["LapNumber"]).max())
+
+
+def estimar_efecto_combustible(laps):
+    """
+    Devuelve dict con 'efecto_s_vuelta', 'fuente' ('ajuste' o 'fisico'),
+    'vueltas_totales' y 'vueltas_usadas'.
+    """
+    total = vueltas_totales_carrera(laps)
+    prior = efecto_fisico(total)
+    v = vueltas_de_stint(laps)
+    if len(v) < MIN_VUELTAS_AJUSTE:
+        return {"efecto_s_vuelta": prior, "fuente": "fisico", "vueltas_totales": total, "vueltas_usadas": len(v)}
+
+    # matriz de diseño: una columna por piloto, desgaste por compuesto y vueltas restantes
+    pilotos = pd.get_dummies(v["Driver"], dtype=float).to_numpy()
+    compuestos = pd.get_dummies(v["Compound"], dtype=float).to_numpy()
+    desgaste = compuestos * v["TyreLife"].to_numpy(dtype=float)[:, None]
+    restantes = (total - v["LapNumber"].to_numpy(dtype=float))[:, None]
+    X = np.hstack([pilotos, desgaste, restantes])
+    y = v["LapTimeSeconds"].to_numpy(dtype=float)
+
+    coef, _, rango, _ = np.linalg.lstsq(X, y, rcond=None)
+    efecto = float(coef[-1])
+    if rango < X.shape[1] or not (0.0 <= efecto <= FACTOR_MAX_PRIOR * prior):
+        return {"efecto_s_vuelta": prior, "fuente": "fisico", "vueltas_totales": total, "vueltas_usadas": len(v)}
+    return {"efecto_s_vuelta": efecto, "fuente": "ajuste", "vueltas_totales": total, "vueltas_usadas": len(v)}
+
+
+def corregir_tiempos(laps, efecto_s_vuelta, vueltas_totales):
+    """Añade LapTimeSeconds y CorrectedLapTimeSeconds a todas las vueltas a la vez"""
+    laps = pd.DataFrame(laps).copy()
+    if "LapTimeSeconds" not in laps.columns:
+        laps["LapTimeSeconds"] = laps["LapTime"].dt.total_seconds()
+    restantes = vueltas_totales - pd.to_numeric(laps["LapNumber"])
+    laps["CorrectedLapTimeSeconds"] = laps["LapTimeSeconds"] - efecto_s_vuelta * restantes
+    return laps
+
+
+def vueltas_corregidas(laps):
+    """Estimación + corrección en un paso. Devuelve (laps, info_estimacion)"""
+    info = estimar_efecto_combustible(laps)
+    return corregir_tiempos(laps, info["efecto_s_vuelta"], info["vueltas_totales"]), info
@@ -0,0 +1,82 @@
+"""
+Monte Carlo cuasi-aleatorio (QMC) con estimación del error
+- simular_lote(..., qmc="sobol" | "halton") sortea los cambios de clima, las
+  neutralizaciones y los trompos con tiempos de espera tomados de una
+  secuencia de baja discrepancia (motor_simulacion.relojes_qmc): cubre los
+  casos raros de forma pareja y la media converge más rápido con las
+  mismas carreras
+- Una secuencia QMC sola no dice cuánto se equivoca: se repite con R
+  aleatorizaciones independientes (scrambling, QMC aleatorizado) y el error
+  estándar de la media sale de la dispersión entre réplicas
+- El estudio Monte Carlo en segundo plano (cola_trabajos.py) usa cada
+  bloque como una réplica
+- Uso: python cuasi_montecarlo.py [circuito]  (compara con Monte Carlo normal)
+"""
+
+import numpy as np
+
+import parametros
+from motor_simulacion import MOTOR_OPTIONS, AERO_OPTIONS, simular_lote
+
+REPLICAS = 8
+
+
+def error_replicas(medias, carreras):
+    """
+    Error estándar de la media global (ponderada por carreras) a partir de
+    las medias de réplicas independientes; None con menos de 2 réplicas
+    """
+    medias, carreras = np.asarray(medias, dtype=float), np.asarray(carreras, dtype=float)
+    r = len(medias)
+    if r < 2:
+        return None
+    pesos = carreras / carreras.sum()
+    media = (pesos * medias).sum()
+    return float(np.sqrt((pesos ** 2 * (medias - media) ** 2).sum() * r / (r - 1)))
+
+
+def media_rqmc(track, car_setup, tyre_sequence, clima_key, n, replicas=REPLICAS, qmc="sobol", rng=None, tyres=None):
+    """
+    n carreras repartidas en 'replicas' aleatorizaciones independientes
+    (qmc=None: Monte Carlo normal con las mismas réplicas, para comparar).
+    Nunca más réplicas que carreras: no hay réplicas vacías.
+    Retorna dict con media_s, error_s, replicas y carreras.
+    """
+    if n < 1:
+        raise ValueError(f"n debe ser al menos 1 (recibido {n})")
+    rng = np.random.default_rng(rng)
+    replicas = min(replicas, n)
+    tamanos = [n // replicas + (1 if i < n % replicas else 0) for i in range(replicas)]
+    medias = [simular_lote(track, car_setup, tyre_sequence, track.pitlane_time_s, clima_key, m, rng=rng,
+                           tyres=tyres, qmc=qmc)["total_time_s"].mean() for m in tamanos]
+    return {
+        "media_s": float(np.average(medias, weights=tamanos)),
+        "error_s": error_replicas(medias, tamanos),
+        "replicas": replicas,
+        "carreras": n,
+    }
+
+
+if __name__ == "__main__":
+    # Error real (contra una referencia de 400000 carreras) y estimado, con y sin QMC
+    import sys
+    import time
+
+    track = parametros.circuitos()[sys.argv[1] if len(sys.argv) > 1 else "Silverstone"]
+    setup = {"motor": MOTOR_OPTIONS["Equilibrado"], "aero": AERO_OPTIONS["Medio"]}
+    estrategia, repeticiones = ["C3", "C2"], 20
+    for clima in ("Seco", "Lluvia ligera"):
+        bloques = [simular_lote(track, setup, estrategia, track.pitlane_time_s, clima, 100_000, rng=10_000 + i)
+                   ["total_time_s"].mean() for i in range(4)]
+        ref = np.mean(bloques)
+        print(f"\n{track.nombre}, {'-'.join(estrategia)}, {clima}: referencia {ref:.1f} ± "
+              f"{error_replicas(bloques, [100_000] * 4):.2f} s (400000 carreras normales)")
+        for n in (1024, 4096, 16384):
+            for qmc in (None, "sobol", "halton"):
+                t0 = time.perf_counter()
+                est = [media_rqmc(track, setup, estrategia, clima, n, qmc=qmc, rng=i) for i in range(repeticiones)]
+                s = (time.perf_counter() - t0) / repeticiones
+                real = np.sqrt(np.mean([(e["media_s"] - ref) ** 2 for e in est]))
+                estimado = np.mean([e["error_s"] for e in est])
+                print(f"  {n:>6} carreras, {qmc or 'aleatorio':<9}: error real {real:5.2f} s, "
+                      f"estimado {estimado:5.2f} s  ({s * 1000:.0f} ms)")
@@ -0,0 +1,185 @@
+"""
+Detección de stints y ajuste de degradación con vueltas reales (FastF1)
+- Segmenta la carrera de cada piloto en stints (Stint/Compound/TyreLife)
+- Descarta vueltas de entrada/salida de boxes, neutralizadas y atípicas
+- Ajusta pendiente e intercepto de TODOS los stints en una sola pasada
+  de mínimos cuadrados vectorizada (ecuaciones normales por grupo)
+- Convierte la pendiente (s/vuelta) al 'degradation_per_lap' de neumaticos.json
+  de UNA carrera: FastF1 da HARD/MEDIUM/SOFT y Pirelli asigna a cada GP tres
+  compuestos C consecutivos distintos, así que cada ajuste se traduce con la
+  asignación de su evento (asignacion_compuestos) y nunca se mezclan carreras
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from motor_simulacion import K_GRIP, K_WEAR
+from parametros import DATA_DIR, NEUMATICOS
+
+# Compuestos de seco de FastF1, del más duro al más blando (C{n}, C{n+1}, C{n+2} en cada GP)
+COMPUESTOS_SECO = ("HARD", "MEDIUM", "SOFT")
+# Los de lluvia son los mismos en todos los GP
+COMPUESTOS_LLUVIA = {
+    "INTERMEDIATE": "Intermedio",
+    "WET": "Lluvia",
+}
+
+MIN_VUELTAS_STINT = 5     # menos vueltas limpias -> pendiente poco fiable
+UMBRAL_ATIPICA = 1.07     # > 107% de la mediana del stint = tráfico/error
+
+
+def marcar_vueltas_limpias(laps):
+    """
+    Añade LapTimeSeconds y la columna booleana 'Limpia':
+    vuelta con tiempo, sin entrar/salir de boxes, en bandera verde y precisa.
+    """
+    laps = laps.copy()
+    if "LapTimeSeconds" not in laps.columns:
+        laps["LapTimeSeconds"] = laps["LapTime"].dt.total_seconds()
+    limpia = laps["LapTimeSeconds"].notna()
+    if "PitInTime" in laps.columns:
+        limpia &= laps["PitInTime"].isna() & laps["PitOutTime"].isna()
+    if "TrackStatus" in laps.columns:
+        # '1' = pista libre; cualquier otro código (amarilla, SC, VSC, roja) neutraliza
+        limpia &= laps["TrackStatus"].astype(str) == "1"
+    if "IsAccurate" in laps.columns:
+        limpia &= laps["IsAccurate"].fillna(False).astype(bool)
+    laps["Limpia"] = limpia
+    return laps
+
+
+def vueltas_de_stint(laps):
+    """
+    Vueltas aptas para ajustar degradación, con la columna 'id_stint'
+    (entero 0..n_stints-1 para toda la parrilla).
+    """
+    laps = marcar_vueltas_limpias(pd.DataFrame(laps))
+    laps = laps[laps["Limpia"] & laps["TyreLife"].notna() & laps["Compound"].notna()].copy()
+    laps = laps[laps["LapNumber"] > 1]  # salida: la vuelta 1 no representa ritmo
+    claves = ["Driver", "Stint", "Compound"]
+    laps["id_stint"] = laps.groupby(claves, sort=True).ngroup()
+    # tráfico y errores: fuera lo que supera el umbral sobre la mediana del stint
+    mediana = laps.groupby("id_stint")["LapTimeSeconds"].transform("median")
+    return laps[laps["LapTimeSeconds"] <= mediana * UMBRAL_ATIPICA]
+
+
+def ajustar_stints(laps, x_col="TyreLife", y_col="LapTimeSeconds"):
+    """
+    Ajuste lineal y = intercepto + pendiente * x para cada stint a la vez.
+    Devuelve una fila por stint: Driver, Stint, Compound, vueltas, vuelta_ini,
+    vuelta_fin, vida_max, intercepto_s, pendiente_s_vuelta, r2.
+    """
+    v = vueltas_de_stint(laps)
+    columnas = ["Driver", "Stint", "Compound", "vueltas", "vuelta_ini", "vuelta_fin",
+                "vida_max", "media_s", "intercepto_s", "pendiente_s_vuelta", "r2"]
+    if len(v) == 0:
+        return pd.DataFrame(columns=columnas)
+
+    g = v["id_stint"].to_numpy()
+    x = v[x_col].to_numpy(dtype=float)
+    y = v[y_col].to_numpy(dtype=float)
+    n_g = g.max() + 1
+
+    # sumas de las ecuaciones normales de todos los grupos en una pasada
+    n = np.bincount(g, minlength=n_g).astype(float)
+    sx = np.bincount(g, x, n_g)
+    sy = np.bincount(g, y, n_g)
+    sxx = np.bincount(g, x * x, n_g)
+    sxy = np.bincount(g, x * y, n_g)
+    syy = np.bincount(g, y * y, n_g)
+
+    det = n * sxx - sx ** 2
+    valido = (n >= MIN_VUELTAS_STINT) & (det > 1e-9)
+    det_seguro = np.where(valido, det, 1.0)
+    pendiente = np.where(valido, (n * sxy - sx * sy) / det_seguro, np.nan)
+    intercepto = np.where(valido, (sy - pendiente * sx) / np.maximum(n, 1), np.nan)
+
+    # R² = 1 - SSres/SStot, también a partir de las sumas
+    ss_tot = syy - sy ** 2 / np.maximum(n, 1)
+    ss_res = (syy - 2 * intercepto * sy - 2 * pendiente * sxy
+              + n * intercepto ** 2 + 2 * intercepto * pendiente * sx + pendiente ** 2 * sxx)
+    r2 = np.where(valido & (ss_tot > 0), 1 - ss_res / np.where(ss_tot > 0, ss_tot, 1.0), np.nan)
+
+    info = v.groupby("id_stint").agg(
+        Driver=("Driver", "first"), Stint=("Stint", "first"), Compound=("Compound", "first"),
+        vuelta_ini=("LapNumber", "min"), vuelta_fin=("LapNumber", "max"), vida_max=(x_col, "max"),
+    )
+    info["vueltas"] = n.astype(int)
+    info["media_s"] = sy / np.maximum(n, 1)
+    info["intercepto_s"] = intercepto
+    info["pendiente_s_vuelta"] = pendiente
+    info["r2"] = r2
+    return info.reset_index(drop=True)[columnas]
+
+
+def tabla_degradacion(stints):
+    """
+    Tabla compacta por compuesto (una carrera): mediana robusta de las
+    pendientes y media ponderada por vueltas de los stints válidos.
+    """
+    ok = stints[stints["pendiente_s_vuelta"].notna()].copy()
+    columnas = ["Compound", "stints", "vueltas", "pendiente_mediana_s", "pendiente_ponderada_s", "intercepto_mediano_s"]
+    if len(ok) == 0:
+        return pd.DataFrame(columns=columnas)
+    ok["pv"] = ok["pendiente_s_vuelta"] * ok["vueltas"]
+    tabla = ok.groupby("Compound").agg(
+        stints=("Driver", "size"),
+        vueltas=("vueltas", "sum"),
+        pendiente_mediana_s=("pendiente_s_vuelta", "median"),
+        pv=("pv", "sum"),
+        intercepto_mediano_s=("intercepto_s", "median"),
+    )
+    tabla["pendiente_ponderada_s"] = tabla["pv"] / tabla["vueltas"]
+    return tabla.reset_index()[columnas]
+
+
+def pendiente_a_degradacion(pendiente_s, track, tyre, tyre_wear_factor=1.0):
+    """
+    Pasa una pendiente real (s/vuelta) a 'degradation_per_lap' (grip/vuelta).
+    En el motor: t = base/sf * (1 - K_GRIP*grip) + K_WEAR*(1 - grip), así que
+    dt/dgrip = -(base*K_GRIP/sf + K_WEAR) y el grip cae degr*wear*abrasion por vuelta.
+    """
+    sensibilidad = track.tiempo_base_s * K_GRIP / tyre.speed_factor + K_WEAR
+    return pendiente_s / (sensibilidad * track.abrasion * tyre_wear_factor)
+
+
+def asignacion_compuestos(duro):
+    """
+    Compuesto FastF1 -> clave de neumaticos.json en un GP cuyo HARD es
+    C{duro} (p. ej. duro=3: HARD=C3, MEDIUM=C4, SOFT=C5)
+    """
+    asignacion = {compuesto: f"C{int(duro) + i}" for i, compuesto in enumerate(COMPUESTOS_SECO)}
+    asignacion.update(COMPUESTOS_LLUVIA)
+    return asignacion
+
+
+def degradacion_para_neumaticos(tabla, track, neumaticos, asignacion):
+    """
+    {clave neumaticos.json: degradation_per_lap} a partir de la tabla por
+    compuesto de una carrera y la asignación de ese GP (asignacion_compuestos).
+    Los compuestos sin clave en neumaticos.json (p. ej. C4/C5) se omiten.
+    """
+    nuevos = {}
+    for _, fila in tabla.iterrows():
+        clave = asignacion.get(fila["Compound"])
+        if clave is None or clave not in neumaticos:
+            continue
+        # una pendiente negativa (combustible > desgaste) no es degradación
+        pendiente = max(0.0, float(fila["pendiente_mediana_s"]))
+        nuevos[clave] = round(pendiente_a_degradacion(pendiente, track, neumaticos[clave]), 5)
+    return nuevos
+
+
+def actualizar_neumaticos(nuevos, filename="neumaticos.json"):
+    """Escribe los 'degradation_per_lap' de una carrera (degradacion_para_neumaticos) en data/neumaticos.json"""
+    ruta = os.path.join(DATA_DIR, filename)
+    with open(ruta, "r", encoding="utf-8") as f:
+        tyres_all = json.load(f)
+    for clave, degr in nuevos.items():
+        tyres_all[clave]["degradation_per_lap"] = float(degr)
+    # validar antes de escribir: el registro lo recargará al cambiar el mtime
+    NEUMATICOS.compilar(tyres_all)
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(tyres_all, f, indent=2)
@@ -0,0 +1,307 @@
+"""
+Emulador del simulador (modelo sustituto para respuestas instantáneas)
+- Aprende, por circuito y clima inicial, la relación entre la configuración
+  (motor, alerones, secuencia de neumáticos, vueltas de cada stint) y la
+  distribución de total_time_s del motor completo (media, P10, P50, P90)
+- Los rasgos salen del propio modelo físico, sin ruido: la tabla
+  determinista de tiempos por edad (motor_simulacion.tiempos_por_edad, con
+  el coste medio de los trompos) recorrida según el plan de stints,
+    · esperado con las probabilidades de clima de cada vuelta (cadena de
+      Markov de matriz_clima)
+    · P10/P50/P90 del total sobre caminos de clima fijos (misma semilla)
+    · total con cada clima fijo, paradas, stints por compuesto y setup
+  y encima una regresión lineal ridge (NumPy, sin dependencias nuevas)
+- Se entrena por consola contra simular_lote y se guarda en
+  resultados/emulador/ con la huella de los parámetros: si cambian
+  circuitos.json o neumaticos.json el modelo deja de valer (cargar -> None)
+- La simulación real sigue siendo la referencia: el emulador solo adelanta
+  la respuesta mientras se confirma
+- Uso: python emulador.py [--configuraciones N] [--carreras N] [--validar]
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+
+import parametros
+from motor_simulacion import (
+    MOTOR_OPTIONS, AERO_OPTIONS, CLIMA_KEYS, marginales_clima, matriz_clima, plan_stints, simular_lote,
+    tiempos_por_edad
+)
+
+EMULADOR_DIR = os.path.join("resultados", "emulador")
+MODELO = "modelo.json"
+OBJETIVOS = ("media_s", "p10_s", "p50_s", "p90_s")
+CAMINOS_CLIMA = 1000   # caminos de clima para los percentiles de los rasgos
+SEMILLA_CAMINOS = 12345
+LAMBDAS = (1e-3, 1e-2, 1e-1, 1.0)  # candidatos de la penalización ridge
+VALIDACION = 0.2       # fracción de configuraciones reservada para medir el error
+PROB_STINTS = (0.1, 0.45, 0.3, 0.15)  # 1..4 stints al muestrear configuraciones
+
+_costes = {}
+_caminos = {}
+_cargado = {}
+
+
+# -----------------------------
+# RASGOS
+# -----------------------------
+def tabla_costes(track, motor, alerones, tyres):
+    """(compuesto, edad 0..vueltas-1, clima): coste medio de la vuelta sin combustible (en caché)"""
+    clave = (tuple(track.como_dict().values()), motor, alerones, tyres.huella())
+    if clave not in _costes:
+        if len(_costes) > 64:
+            _costes.clear()
+        car_setup = {"motor": MOTOR_OPTIONS[motor], "aero": AERO_OPTIONS[alerones]}
+        _costes[clave] = np.stack([
+            np.stack([tiempos_por_edad(track, car_setup, k, track.vueltas, clima, tyres, con_trompos=True)
+                      for clima in CLIMA_KEYS], axis=1)
+            for k in tyres.keys()
+        ])
+    return _costes[clave]
+
+
+def caminos_clima(vueltas, clima_key):
+    """
+    (probabilidad de cada clima por vuelta, caminos de clima por vuelta):
+    marginales exactas de la cadena y CAMINOS_CLIMA caminos con semilla fija,
+    para que los rasgos sean deterministas
+    """
+    clave = (vueltas, clima_key)
+    if clave not in _caminos:
+        acumulada = np.cumsum(matriz_clima(), axis=1)
+        rng = np.random.default_rng(SEMILLA_CAMINOS)
+        clima = np.full(CAMINOS_CLIMA, CLIMA_KEYS.index(clima_key))
+        caminos = np.empty((CAMINOS_CLIMA, vueltas), dtype=np.intp)
+        # el clima de cada vuelta se sortea antes de correrla, como en el motor
+        for vuelta in range(vueltas):
+            clima = (rng.random(CAMINOS_CLIMA)[:, None] > acumulada[clima]).sum(axis=1)
+            caminos[:, vuelta] = clima
+        _caminos[clave] = (marginales_clima(vueltas, clima_key), caminos)
+    return _caminos[clave]
+
+
+def nombres_rasgos(compuestos):
+    return (["constante", "esperado_s", "camino_p10_s", "camino_p50_s", "camino_p90_s"]
+            + [f"fijo_{c}_s" for c in CLIMA_KEYS]
+            + ["paradas", "inversa_potencia_aero", "desgaste_motor"]
+            + [f"stints_{k}" for k in compuestos])
+
+
+def rasgos(track, motor, alerones, clima_key, tyre_sequence, vueltas_stint=None, tyres=None):
+    """Vector de rasgos de una configuración (ver nombres_rasgos)"""
+    if tyres is None:
+        tyres = parametros.neumaticos()
+    compuestos = list(tyres.keys())
+    plan = plan_stints(track.vueltas, len(tyre_sequence), vueltas_stint)
+    costes = tabla_costes(track, motor, alerones, tyres)
+    marginales, caminos = caminos_clima(track.vueltas, clima_key)
+    compuesto = np.repeat([compuestos.index(k) for k in tyre_sequence], plan)
+    edad = np.concatenate([np.arange(v) for v in plan])
+    por_vuelta = costes[compuesto, edad]  # (vueltas, clima)
+    totales = por_vuelta[np.arange(track.vueltas), caminos].sum(axis=1)
+    return np.array([
+        1.0,
+        (por_vuelta * marginales).sum(),
+        *np.percentile(totales, [10, 50, 90]),
+        *por_vuelta.sum(axis=0),
+        len(tyre_sequence) - 1,
+        1.0 / (MOTOR_OPTIONS[motor]["potencia"] * AERO_OPTIONS[alerones]["aero"]),
+        MOTOR_OPTIONS[motor]["tyre_wear_factor"],
+        *[tyre_sequence.count(k) for k in compuestos],
+    ])
+
+
+# -----------------------------
+# ENTRENAMIENTO
+# -----------------------------
+def muestrear_configuracion(track, compuestos, rng):
+    """Configuración al azar: setup, 1-4 stints con compuestos al azar y reparto uniforme o con cortes al azar"""
+    motor = str(rng.choice(list(MOTOR_OPTIONS)))
+    alerones = str(rng.choice(list(AERO_OPTIONS)))
+    n_stints = int(rng.choice(np.arange(1, len(PROB_STINTS) + 1), p=PROB_STINTS))
+    secuencia = [str(k) for k in rng.choice(compuestos, n_stints)]
+    vueltas_stint = None
+    if n_stints > 1 and rng.random() >= 0.4:
+        cortes = np.sort(rng.choice(np.arange(3, track.vueltas - 2), n_stints - 1, replace=False))
+        vueltas_stint = np.diff(np.concatenate(([0], cortes, [track.vueltas]))).tolist()
+    return {"motor": motor, "alerones": alerones, "tyre_sequence": secuencia, "vueltas_stint": vueltas_stint}
+
+
+def objetivos(tiempos):
+    return [float(tiempos.mean()), *np.percentile(tiempos, [10, 50, 90]).tolist()]
+
+
+def generar_datos(track, clima_key, configuraciones, carreras, rng, tyres):
+    """(rasgos, objetivos) de configuraciones al azar simuladas con el motor completo"""
+    compuestos = list(tyres.keys())
+    x, y = [], []
+    for _ in range(configuraciones):
+        c = muestrear_configuracion(track, compuestos, rng)
+        car_setup = {"motor": MOTOR_OPTIONS[c["motor"]], "aero": AERO_OPTIONS[c["alerones"]]}
+        res = simular_lote(track, car_setup, c["tyre_sequence"], track.pitlane_time_s, clima_key, carreras,
+                           rng=rng, tyres=tyres, vueltas_stint=c["vueltas_stint"])
+        x.append(rasgos(track, c["motor"], c["alerones"], clima_key, c["tyre_sequence"], c["vueltas_stint"], tyres))
+        y.append(objetivos(res["total_time_s"]))
+    return np.array(x), np.array(y)
+
+
+def ajustar_ridge(x, y, lam):
+    """Ridge sobre rasgos estandarizados (sin penalizar la constante). Retorna (media, escala, coef)"""
+    media, escala = x.mean(axis=0), x.std(axis=0)
+    escala[escala == 0] = 1.0
+    media[0], escala[0] = 0.0, 1.0
+    z = (x - media) / escala
+    penal = lam * np.eye(z.shape[1])
+    penal[0, 0] = 0.0
+    coef = np.linalg.solve(z.T @ z + penal, z.T @ y)
+    return media, escala, coef
+
+
+def aplicar(submodelo, x):
+    return ((x - np.asarray(submodelo["media"])) / np.asarray(submodelo["escala"])) @ np.asarray(submodelo["coef"])
+
+
+def errores(pred, y):
+    """Error absoluto medio y máximo por objetivo"""
+    err = np.abs(pred - y)
+    return {"mae_s": dict(zip(OBJETIVOS, err.mean(axis=0).round(2).tolist())),
+            "max_s": dict(zip(OBJETIVOS, err.max(axis=0).round(2).tolist()))}
+
+
+def entrenar(configuraciones=300, carreras=400, semilla=0, nombres_circuitos=None, climas=None,
+             tyres=None, progreso=print):
+    """
+    Un submodelo por circuito y clima inicial: simula 'configuraciones' al
+    azar ('carreras' cada una), elige la penalización con el VALIDACION
+    reservado (ese error es el que se guarda y se muestra) y reajusta con
+    todas. Retorna el modelo (dict serializable con la huella de los parámetros).
+    """
+    circuitos = parametros.circuitos()
+    if tyres is None:
+        tyres = parametros.neumaticos()
+    rng = np.random.default_rng(semilla)
+    modelo = {
+        "huella": parametros.huella(circuitos, tyres),
+        "compuestos": list(tyres.keys()),
+        "rasgos": nombres_rasgos(tyres.keys()),
+        "configuraciones": configuraciones,
+        "carreras": carreras,
+        "creado": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "circuitos": {},
+    }
+    for nombre in nombres_circuitos or circuitos.keys():
+        track = circuitos[nombre]
+        for clima_key in climas or CLIMA_KEYS:
+            t0 = time.perf_counter()
+            x, y = generar_datos(track, clima_key, configuraciones, carreras, rng, tyres)
+            n_ajuste = int(round(len(x) * (1.0 - VALIDACION)))
+            mejor = None
+            for lam in LAMBDAS:
+                media, escala, coef = ajustar_ridge(x[:n_ajuste], y[:n_ajuste], lam)
+                err = errores(aplicar({"media": media, "escala": escala, "coef": coef}, x[n_ajuste:]), y[n_ajuste:])
+                if mejor is None or err["mae_s"]["media_s"] < mejor[1]["mae_s"]["media_s"]:
+                    mejor = (lam, err)
+            lam, err = mejor
+            media, escala, coef = ajustar_ridge(x, y, lam)
+            modelo["circuitos"].setdefault(nombre, {})[clima_key] = {
+                "media": media.tolist(), "escala": escala.tolist(), "coef": coef.tolist(),
+                "lambda": lam, **err,
+            }
+            if progreso:
+                progreso(f"{nombre:<12} {clima_key:<14} λ={lam:g}  error medio (s): "
+                         + "  ".join(f"{o[:-2]} {err['mae_s'][o]:5.1f}" for o in OBJETIVOS)
+                         + f"  [{time.perf_counter() - t0:.1f} s]")
+    return modelo
+
+
+def guardar(modelo, directorio=None):
+    directorio = directorio or EMULADOR_DIR
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, MODELO)
+    tmp = ruta + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(modelo, f, ensure_ascii=False)
+    os.replace(tmp, ruta)
+    return ruta
+
+
+def cargar(directorio=None):
+    """Modelo guardado si existe y corresponde a los parámetros vigentes; si no, None"""
+    ruta = os.path.join(directorio or EMULADOR_DIR, MODELO)
+    try:
+        firma = os.stat(ruta).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if _cargado.get("ruta") != ruta or _cargado.get("firma") != firma:
+        with open(ruta, encoding="utf-8") as f:
+            _cargado.update(ruta=ruta, firma=firma, modelo=json.load(f))
+    modelo = _cargado["modelo"]
+    return modelo if modelo["huella"] == parametros.huella() else None
+
+
+# -----------------------------
+# PREDICCIÓN
+# -----------------------------
+def predecir(modelo, circuito, clima_key, motor, alerones, tyre_sequence, vueltas_stint=None):
+    """
+    Predicción instantánea: dict con media_s, p10_s, p50_s, p90_s y el error
+    medio de cada uno medido al entrenar (error_s); None si el modelo no
+    tiene ese circuito/clima
+    """
+    submodelo = modelo["circuitos"].get(circuito, {}).get(clima_key)
+    if submodelo is None:
+        return None
+    track = parametros.circuitos()[circuito]
+    x = rasgos(track, motor, alerones, clima_key, list(tyre_sequence), vueltas_stint)
+    pred = dict(zip(OBJETIVOS, aplicar(submodelo, x).tolist()))
+    # cada percentil se ajusta por separado: se mantiene el orden P10 <= P50 <= P90
+    pred["p50_s"] = max(pred["p50_s"], pred["p10_s"])
+    pred["p90_s"] = max(pred["p90_s"], pred["p50_s"])
+    pred["error_s"] = submodelo["mae_s"]
+    return pred
+
+
+def validar(modelo, configuraciones=30, carreras=4000, semilla=1, progreso=print):
+    """
+    Precisión contra el motor con configuraciones nuevas y muchas carreras
+    (objetivos casi sin ruido de muestreo). Retorna {circuito: {clima: errores}}
+    """
+    circuitos = parametros.circuitos()
+    tyres = parametros.neumaticos()
+    rng = np.random.default_rng(semilla)
+    informe = {}
+    for nombre, por_clima in modelo["circuitos"].items():
+        for clima_key, submodelo in por_clima.items():
+            x, y = generar_datos(circuitos[nombre], clima_key, configuraciones, carreras, rng, tyres)
+            err = errores(aplicar(submodelo, x), y)
+            informe.setdefault(nombre, {})[clima_key] = err
+            if progreso:
+                progreso(f"{nombre:<12} {clima_key:<14} error medio (s): "
+                         + "  ".join(f"{o[:-2]} {err['mae_s'][o]:5.1f}" for o in OBJETIVOS)
+                         + "   máximo: " + "  ".join(f"{err['max_s'][o]:5.1f}" for o in OBJETIVOS))
+    return informe
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Entrena el emulador del simulador contra el motor completo")
+    parser.add_argument("--configuraciones", type=int, default=300, help="configuraciones por circuito y clima")
+    parser.add_argument("--carreras", type=int, default=400, help="carreras por configuración")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--validar", action="store_true",
+                        help="solo medir el modelo guardado con configuraciones nuevas (4000 carreras cada una)")
+    args = parser.parse_args()
+
+    if args.validar:
+        modelo = cargar()
+        if modelo is None:
+            raise SystemExit("No hay modelo vigente: entrena primero con python emulador.py")
+        validar(modelo)
+    else:
+        t0 = time.perf_counter()
+        modelo = entrenar(args.configuraciones, args.carreras, args.semilla)
+        print(f"Modelo guardado en {guardar(modelo)} ({time.perf_counter() - t0:.0f} s, huella {modelo['huella']})")
@@ -0,0 +1,367 @@
+"""
+Fuentes de datos de sesiones de F1 (intercambiables)
+- FuenteFastF1: datos reales descargados por FastF1 (requiere red con caché frío)
+- FuenteFixtures: reproduce sesiones grabadas en disco o, si no hay grabación,
+  genera una carrera sintética realista y determinista (20 pilotos, 50-78
+  vueltas, paradas, safety car y telemetría opcional). Sirve para medir
+  tiempos de carga y de análisis sin red y siempre con los mismos datos.
+- Se elige con la variable de entorno F1_FUENTE_DATOS = fastf1 | fixtures
+"""
+
+import json
+import logging
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+FUENTE_POR_DEFECTO = "fastf1"
+CACHE_FASTF1 = os.path.join("data", "raw", "cache")
+# funciones de la API de FastF1 que cachean las vueltas (caché en disco: <ruta de la sesión>/<nombre>.ff1pkl)
+CACHE_VUELTAS_FASTF1 = ("_extended_timing_data", "timing_app_data")
+FIXTURES_DIR = os.path.join("data", "fixtures")
+
+
+class DatosNoCargados(Exception):
+    """Se pidió una parte de la sesión que no se cargó (p. ej. telemetría)"""
+
+
+# -----------------------------
+# FASTF1 (datos reales)
+# -----------------------------
+class FuenteFastF1:
+    nombre = "fastf1"
+
+    def __init__(self, cache_dir=CACHE_FASTF1):
+        self.cache_dir = cache_dir
+        self._preparada = False
+
+    def _preparar(self):
+        if self._preparada:
+            return
+        import fastf1
+
+        logging.getLogger('fastf1').setLevel(logging.CRITICAL)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fastf1.Cache.enable_cache(self.cache_dir)
+        self._preparada = True
+
+    def get_session(self, year, gp, tipo='R'):
+        import fastf1
+
+        self._preparar()
+        return fastf1.get_session(year, gp, tipo)
+
+    def vueltas_en_cache(self, session):
+        """True si las vueltas de la sesión ya están en la caché (cargarlas no descarga nada)"""
+        # api_path = '/static/<año>/<evento>/<sesión>/'; la caché quita el '/static/'
+        ruta = os.path.join(self.cache_dir, session.api_path[len("/static/"):])
+        return all(os.path.isfile(os.path.join(ruta, f"{nombre}.ff1pkl")) for nombre in CACHE_VUELTAS_FASTF1)
+
+    def calendario(self, year):
+        import fastf1
+
+        self._preparar()
+        return list(fastf1.get_event_schedule(year, include_testing=False)["EventName"])
+
+
+# -----------------------------
+# FIXTURES (grabadas o sintéticas)
+# -----------------------------
+PILOTOS_SINTETICOS = [
+    ("1", "VER", "Red Bull Racing"), ("11", "PER", "Red Bull Racing"),
+    ("44", "HAM", "Mercedes"), ("63", "RUS", "Mercedes"),
+    ("16", "LEC", "Ferrari"), ("55", "SAI", "Ferrari"),
+    ("4", "NOR", "McLaren"), ("81", "PIA", "McLaren"),
+    ("14", "ALO", "Aston Martin"), ("18", "STR", "Aston Martin"),
+    ("10", "GAS", "Alpine"), ("31", "OCO", "Alpine"),
+    ("23", "ALB", "Williams"), ("2", "SAR", "Williams"),
+    ("22", "TSU", "RB"), ("3", "RIC", "RB"),
+    ("77", "BOT", "Kick Sauber"), ("24", "ZHO", "Kick Sauber"),
+    ("20", "MAG", "Haas F1 Team"), ("27", "HUL", "Haas F1 Team"),
+]
+PUNTOS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
+GPS_SINTETICOS = [
+    'Bahrain', 'Saudi Arabia', 'Australia', 'Japan', 'China',
+    'Monaco', 'Canada', 'Spain', 'Austria', 'Silverstone',
+    'Hungary', 'Belgium', 'Netherlands', 'Monza', 'Singapore',
+    'Mexico', 'Brazil', 'Las Vegas', 'Abu Dhabi'
+]
+
+# ritmo relativo (s) y degradación (s/vuelta) por compuesto en la carrera sintética
+COMPUESTOS_SINTETICOS = {
+    "SOFT": (-0.6, 0.080),
+    "MEDIUM": (0.0, 0.050),
+    "HARD": (0.4, 0.030),
+}
+ESTRATEGIAS_SINTETICAS = [["MEDIUM", "HARD"], ["SOFT", "HARD"], ["HARD", "MEDIUM"], ["SOFT", "MEDIUM", "HARD"]]
+PERDIDA_PIT_S = 21.0
+HZ_TELEMETRIA = 4.0
+
+
+def _slug(texto):
+    return "".join(c if c.isalnum() else "_" for c in str(texto)).strip("_")
+
+
+def _semilla(year, gp):
+    return zlib.crc32(f"{year}-{gp}".encode())
+
+
+def _circuitos_conocidos():
+    import parametros
+
+    if not os.path.exists(parametros.CIRCUITOS.ruta):
+        return {}
+    return {clave: c.como_dict() for clave, c in parametros.circuitos().items()}
+
+
+def carrera_sintetica(year, gp, seed=None):
+    """
+    Genera (evento, resultados, vueltas) de una carrera sintética.
+    Todo vectorizado por piloto; la misma (year, gp) da siempre los mismos datos.
+    """
+    rng = np.random.default_rng(_semilla(year, gp) if seed is None else seed)
+    circuito = _circuitos_conocidos().get(gp, {})
+    n_vueltas = int(circuito.get("vueltas", rng.integers(50, 79)))
+    base = float(circuito.get("tiempo_base_s", rng.uniform(75.0, 100.0)))
+    efecto_combustible = 0.03 * 110.0 / n_vueltas
+
+    # safety car: la mitad de las carreras tienen una ventana de 3-5 vueltas
+    vueltas_sc = set()
+    if rng.random() < 0.5:
+        ini = int(rng.integers(8, n_vueltas - 10))
+        vueltas_sc = set(range(ini, ini + int(rng.integers(3, 6))))
+
+    lap = np.arange(1, n_vueltas + 1)
+    filas = []
+    ritmo = np.sort(rng.normal(0.0, 0.4, len(PILOTOS_SINTETICOS)))
+    for i, (num, abrev, equipo) in enumerate(PILOTOS_SINTETICOS):
+        estrategia = ESTRATEGIAS_SINTETICAS[rng.integers(len(ESTRATEGIAS_SINTETICAS))]
+        n_stints = len(estrategia)
+        cortes = np.sort(rng.choice(np.arange(12, n_vueltas - 8), n_stints - 1, replace=False))
+        stint = np.searchsorted(cortes, lap, side="left") + 1  # la vuelta de entrada pertenece al stint que termina
+        inicio_stint = np.concatenate([[1], cortes + 1])[stint - 1]
+        vida = lap - inicio_stint + 1 + 2  # neumáticos con 2 vueltas de clasificación
+        compuesto = np.array(estrategia)[stint - 1]
+        offset = np.array([COMPUESTOS_SINTETICOS[c][0] for c in compuesto])
+        degr = np.array([COMPUESTOS_SINTETICOS[c][1] for c in compuesto])
+
+        t = (base + ritmo[i] + offset + degr * vida + efecto_combustible * (n_vueltas - lap)
+             + rng.normal(0.0, 0.25, n_vueltas))
+        t[0] += 5.0  # salida
+        en_sc = np.isin(lap, list(vueltas_sc))
+        t[en_sc] *= 1.3
+        entrada = np.isin(lap, cortes)
+        salida = np.isin(lap, cortes + 1)
+        t[entrada] += PERDIDA_PIT_S * 0.4
+        t[salida] += PERDIDA_PIT_S * 0.6
+
+        fin = np.cumsum(t)
+        valida = ~(en_sc | entrada | salida | (lap == 1))
+        t_valida = np.where(valida, t, np.inf)
+        mejor_personal = valida & (t_valida <= np.minimum.accumulate(t_valida))
+        filas.append(pd.DataFrame({
+            "Driver": abrev, "DriverNumber": num, "Team": equipo,
+            "LapNumber": lap.astype(float), "Stint": stint.astype(float),
+            "Compound": compuesto, "TyreLife": vida.astype(float), "FreshTyre": False,
+            "LapTime": pd.to_timedelta(t, unit="s"),
+            "Time": pd.to_timedelta(fin + 3600.0, unit="s"),
+            "LapStartTime": pd.to_timedelta(fin - t + 3600.0, unit="s"),
+            "PitInTime": pd.to_timedelta(np.where(entrada, fin + 3600.0, np.nan), unit="s"),
+            "PitOutTime": pd.to_timedelta(np.where(salida, fin - t + 3600.0, np.nan), unit="s"),
+            "TrackStatus": np.where(en_sc, "4", "1"),
+            "IsAccurate": valida, "IsPersonalBest": mejor_personal,
+            "Deleted": False, "FastF1Generated": False,
+        }))
+    vueltas = pd.concat(filas, ignore_index=True)
+    # posición al final de cada vuelta por tiempo acumulado
+    vueltas["Position"] = vueltas.groupby("LapNumber")["Time"].rank(method="first").astype(float)
+
+    final = vueltas[vueltas["LapNumber"] == n_vueltas].sort_values("Time")
+    resultados = pd.DataFrame({
+        "DriverNumber": final["DriverNumber"].to_numpy(),
+        "Abbreviation": final["Driver"].to_numpy(),
+        "TeamName": final["Team"].to_numpy(),
+        "Position": np.arange(1, len(final) + 1, dtype=float),
+        "Points": np.array(PUNTOS + [0] * (len(final) - len(PUNTOS)), dtype=float),
+        "Status": "Finished",
+    })
+    resultados.index = resultados["DriverNumber"].to_numpy()
+
+    evento = {
+        "EventName": f"{gp} Grand Prix",
+        "EventDate": f"{year}-06-01",
+        "Country": gp,
+        "Location": gp,
+        "RoundNumber": int(zlib.crc32(gp.encode()) % 22) + 1,
+    }
+    return evento, resultados, vueltas
+
+
+def telemetria_sintetica(vueltas, driver_number, hz=HZ_TELEMETRIA, seed=0):
+    """Car data sintético de un piloto (velocidad/acelerador/freno/marcha) a 'hz' muestras/s"""
+    rng = np.random.default_rng(seed)
+    laps = vueltas[vueltas["DriverNumber"] == driver_number]
+    ini = laps["LapStartTime"].min().total_seconds()
+    fin = laps["Time"].max().total_seconds()
+    t = np.arange(ini, fin, 1.0 / hz)
+    # fase dentro de la vuelta -> perfil de velocidad con ~10 frenadas por vuelta
+    inicios = laps["LapStartTime"].dt.total_seconds().to_numpy()
+    duraciones = laps["LapTime"].dt.total_seconds().to_numpy()
+    k = np.clip(np.searchsorted(inicios, t, side="right") - 1, 0, len(inicios) - 1)
+    fase = (t - inicios[k]) / duraciones[k]
+    onda = np.sin(2 * np.pi * 10 * fase)
+    velocidad = 210 + 90 * onda + rng.normal(0, 3, len(t))
+    return pd.DataFrame({
+        "SessionTime": pd.to_timedelta(t, unit="s"),
+        "Time": pd.to_timedelta(t - ini, unit="s"),
+        "Date": pd.Timestamp("2024-06-01 13:00") + pd.to_timedelta(t, unit="s"),
+        "Speed": velocidad,
+        "RPM": 9000 + 30 * (velocidad - 120),
+        "nGear": np.clip((velocidad / 40).astype(int), 1, 8),
+        "Throttle": np.clip(50 + 60 * onda, 0, 100),
+        "Brake": onda < -0.7,
+        "DRS": 0,
+        "Source": "car",
+    })
+
+
+class SesionFixture:
+    """
+    Sesión con la misma interfaz que usan las apps de fastf1.core.Session:
+    event, drivers, results, laps, car_data y load(laps=, telemetry=, ...).
+    """
+
+    def __init__(self, year, gp, directorio=None):
+        self.year = year
+        self.gp = gp
+        self.directorio = directorio
+        self.event = None
+        self.results = None
+        self.drivers = []
+        self._laps = None
+        self._car_data = None
+
+    def get_driver(self, identifier):
+        """Fila de resultados de un piloto por número o abreviatura"""
+        identifier = str(identifier)
+        columna = "DriverNumber" if identifier.isdigit() else "Abbreviation"
+        return self.results[self.results[columna].astype(str) == identifier].iloc[0]
+
+    @property
+    def laps(self):
+        if self._laps is None:
+            raise DatosNoCargados("Vueltas no cargadas: usa load(laps=True)")
+        return self._laps
+
+    @property
+    def car_data(self):
+        if self._car_data is None:
+            raise DatosNoCargados("Telemetría no cargada: usa load(telemetry=True)")
+        return self._car_data
+
+    def _leer(self):
+        if self.directorio is not None:
+            with open(os.path.join(self.directorio, "evento.json"), "r", encoding="utf-8") as f:
+                evento = json.load(f)
+            resultados = pd.read_parquet(os.path.join(self.directorio, "resultados.parquet"))
+            vueltas = pd.read_parquet(os.path.join(self.directorio, "vueltas.parquet"))
+            return evento, resultados, vueltas
+        return carrera_sintetica(self.year, self.gp)
+
+    def load(self, laps=True, telemetry=True, weather=True, messages=True, livedata=None):
+        from fastf1.core import Laps, Telemetry
+
+        evento, resultados, vueltas = self._leer()
+        evento = dict(evento)
+        evento["EventDate"] = pd.Timestamp(evento["EventDate"])
+        self.event = pd.Series(evento)
+        self.results = resultados
+        self.drivers = list(resultados["DriverNumber"].astype(str))
+        if laps or telemetry:
+            self._laps = Laps(vueltas, session=self)
+        if telemetry:
+            self._car_data = {}
+            for num in self.drivers:
+                ruta = None if self.directorio is None else os.path.join(self.directorio, "car_data", f"{num}.parquet")
+                if ruta is not None and os.path.exists(ruta):
+                    df = pd.read_parquet(ruta)
+                else:
+                    df = telemetria_sintetica(vueltas, num, seed=_semilla(self.year, self.gp) + int(num))
+                self._car_data[num] = Telemetry(df, session=self, driver=num)
+
+
+class FuenteFixtures:
+    nombre = "fixtures"
+
+    def __init__(self, directorio=FIXTURES_DIR):
+        self.directorio = directorio
+
+    def ruta_grabacion(self, year, gp):
+        return os.path.join(self.directorio, f"{int(year)}_{_slug(gp)}")
+
+    def get_session(self, year, gp, tipo='R'):
+        ruta = self.ruta_grabacion(year, gp)
+        return SesionFixture(year, gp, ruta if os.path.isdir(ruta) else None)
+
+    def vueltas_en_cache(self, session):
+        # grabación en disco o carrera sintética: siempre local
+        return True
+
+    def calendario(self, year):
+        return list(GPS_SINTETICOS)
+
+
+def grabar_sesion(session, directorio, year, gp, telemetria=False):
+    """
+    Graba una sesión ya cargada (real o fixture) para reproducirla sin red.
+    Con telemetria=True guarda también el car data de cada piloto.
+    """
+    ruta = FuenteFixtures(directorio).ruta_grabacion(year, gp)
+    os.makedirs(ruta, exist_ok=True)
+    evento = {k: session.event[k] for k in ("EventName", "EventDate", "Country", "Location", "RoundNumber")}
+    evento["EventDate"] = str(pd.Timestamp(evento["EventDate"]).date())
+    evento["RoundNumber"] = int(evento["RoundNumber"])
+    with open(os.path.join(ruta, "evento.json"), "w", encoding="utf-8") as f:
+        json.dump(evento, f, indent=2)
+    columnas_res = ["DriverNumber", "Abbreviation", "TeamName", "Position", "Points", "Status"]
+    pd.DataFrame(session.results)[columnas_res].to_parquet(os.path.join(ruta, "resultados.parquet"))
+    vueltas = pd.DataFrame(session.laps)
+    vueltas = vueltas[[c for c in vueltas.columns if c not in ("LapStartDate",)]]
+    vueltas.to_parquet(os.path.join(ruta, "vueltas.parquet"), index=False)
+    if telemetria:
+        os.makedirs(os.path.join(ruta, "car_data"), exist_ok=True)
+        for num in session.drivers:
+            pd.DataFrame(session.car_data[num]).to_parquet(os.path.join(ruta, "car_data", f"{num}.parquet"), index=False)
+    return ruta
+
+
+# -----------------------------
+# FUENTE ACTIVA
+# -----------------------------
+FUENTES = {
+    "fastf1": FuenteFastF1,
+    "fixtures": FuenteFixtures,
+}
+
+_fuente = None
+
+
+def fuente_activa():
+    """Fuente elegida con F1_FUENTE_DATOS (una instancia por proceso)"""
+    global _fuente
+    if _fuente is None:
+        nombre = os.environ.get("F1_FUENTE_DATOS", FUENTE_POR_DEFECTO).lower()
+        if nombre not in FUENTES:
+            raise ValueError(f"F1_FUENTE_DATOS desconocida: {nombre!r} (opciones: {', '.join(FUENTES)})")
+        _fuente = FUENTES[nombre]()
+    return _fuente
+
+
+def get_session(year, gp, tipo='R'):
+    return fuente_activa().get_session(year, gp, tipo)
+
+
+def vueltas_en_cache(session):
+    return fuente_activa().vueltas_en_cache(session)
@@ -0,0 +1,125 @@
+"""
+Capa de renderizado de gráficos para las páginas Streamlit
+- Dibuja sobre matplotlib.figure.Figure (sin pyplot): la figura no queda
+  registrada en ningún gestor global y se libera al terminar
+- Caché LRU de PNG por (tipo de gráfico, tamaño, huella de los datos),
+  compartida por todo el proceso y con límite de memoria
+"""
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+LIMITE_CACHE_MB = 64
+DPI = 100
+
+
+def huella(valor):
+    """Hash estable del contenido de los datos de un gráfico"""
+    h = hashlib.sha1()
+    _actualizar_huella(h, valor)
+    return h.hexdigest()
+
+
+def _actualizar_huella(h, valor):
+    import pandas as pd
+
+    if isinstance(valor, dict):
+        # en orden de inserción: el orden de las series es el de la leyenda y el dibujo
+        h.update(b"{")
+        for clave, v in valor.items():
+            h.update(repr(clave).encode() + b":")
+            _actualizar_huella(h, v)
+        h.update(b"}")
+    elif isinstance(valor, (list, tuple)):
+        h.update(b"[")
+        for v in valor:
+            _actualizar_huella(h, v)
+        h.update(b"]")
+    elif isinstance(valor, np.ndarray):
+        h.update(str(valor.dtype).encode() + str(valor.shape).encode())
+        h.update(np.ascontiguousarray(valor).tobytes())
+    elif isinstance(valor, (pd.DataFrame, pd.Series)):
+        h.update(str(list(getattr(valor, "columns", [valor.name]))).encode())
+        h.update(pd.util.hash_pandas_object(valor, index=True).to_numpy().tobytes())
+    else:
+        h.update(repr(valor).encode())
+
+
+class CacheGraficos:
+    """LRU de imágenes PNG con límite en bytes (segura entre hilos/sesiones)"""
+
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def get(self, clave):
+        with self._lock:
+            png = self._items.get(clave)
+            if png is None:
+                self.fallos += 1
+                return None
+            self._items.move_to_end(clave)
+            self.aciertos += 1
+            return png
+
+    def put(self, clave, png):
+        if len(png) > self.limite_bytes:
+            return
+        with self._lock:
+            if clave in self._items:
+                self._bytes -= len(self._items.pop(clave))
+            self._items[clave] = png
+            self._bytes += len(png)
+            while self._bytes > self.limite_bytes:
+                _, viejo = self._items.popitem(last=False)
+                self._bytes -= len(viejo)
+
+    def estadisticas(self):
+        with self._lock:
+            return {"graficos": len(self._items), "bytes": self._bytes,
+                    "aciertos": self.aciertos, "fallos": self.fallos}
+
+
+_cache = CacheGraficos(LIMITE_CACHE_MB * 1024 * 1024)
+
+
+def renderizar(dibujar, datos, figsize):
+    """Ejecuta dibujar(fig, datos) sobre una figura nueva y devuelve el PNG"""
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=figsize, dpi=DPI)
+    FigureCanvasAgg(fig)
+    try:
+        dibujar(fig, datos)
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=DPI, bbox_inches="tight")
+        return buf.getvalue()
+    finally:
+        # cierre determinista: sin referencias a ejes/artistas tras el render
+        fig.clear()
+
+
+def grafico(tipo, datos, dibujar, figsize=(10, 5)):
+    """
+    PNG del gráfico 'tipo' para 'datos'. Si el mismo gráfico con los mismos
+    datos ya se dibujó en este proceso, se reutiliza sin volver a rasterizar.
+    """
+    clave = (tipo, tuple(figsize), huella(datos))
+    png = _cache.get(clave)
+    if png is None:
+        png = renderizar(dibujar, datos, figsize)
+        _cache.put(clave, png)
+    return png
+
+
+def estadisticas():
+    return _cache.estadisticas()
@@ -0,0 +1,189 @@
+"""
+Ejecución por lotes de escenarios de estrategia (sin interfaz)
+- Lee un archivo JSON de escenarios: circuitos, motor/alerones (MOTOR_OPTIONS,
+  AERO_OPTIONS), clima inicial, secuencias de neumáticos y nº de carreras
+- Reparte las carreras entre todos los núcleos (un proceso por núcleo)
+- Cada tarea guarda su lote en el almacén de resultados (almacen_resultados.py)
+  y se indexa en el catálogo; las tareas son grandes (hasta
+  CARRERAS_POR_TAREA carreras, un archivo por tabla) para que un estudio
+  largo no llene el almacén de archivos diminutos
+- Al terminar imprime una tabla resumen y el rendimiento en carreras/segundo
+- Uso: python lote_escenarios.py escenarios/ejemplo.json [--procesos N] [--sin-guardar]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+
+import numpy as np
+
+CARRERAS_POR_TAREA = 2000    # máximo por tarea: cada tarea es un lote del almacén (~120k vueltas)
+MIN_CARRERAS_TAREA = 50      # ... y mínimo, aunque sobren núcleos
+TAREAS_POR_PROCESO = 4       # con pocas carreras se parten más para repartir la carga
+SEMILLA_POR_DEFECTO = 2025
+
+
+def _lista(valor):
+    return valor if isinstance(valor, list) else [valor]
+
+
+def expandir_escenarios(definicion):
+    """
+    Un escenario por combinación de circuitos x motor x alerones x clima x estrategias
+    de cada entrada del archivo. Falla antes de simular si algo no existe.
+    """
+    import parametros
+    from motor_simulacion import MOTOR_OPTIONS, AERO_OPTIONS, CLIMA_OPTIONS
+
+    circuitos, neumaticos = parametros.circuitos(), parametros.neumaticos()
+    carreras_defecto = int(definicion.get("carreras_por_escenario", 100))
+    escenarios = []
+    for n, entrada in enumerate(definicion["escenarios"], start=1):
+        combinaciones = itertools.product(
+            _lista(entrada["circuitos"]), _lista(entrada.get("motor", "Equilibrado")),
+            _lista(entrada.get("alerones", "Medio")), _lista(entrada.get("clima", "Seco")),
+            entrada["estrategias"],
+        )
+        for circuito, motor, alerones, clima, estrategia in combinaciones:
+            for valor, opciones, campo in ((circuito, circuitos, "circuito"), (motor, MOTOR_OPTIONS, "motor"),
+                                           (alerones, AERO_OPTIONS, "alerones"), (clima, CLIMA_OPTIONS, "clima")):
+                if valor not in opciones:
+                    raise ValueError(f"Escenario {n}: {campo} '{valor}' no existe ({', '.join(opciones)})")
+            for tyre in estrategia:
+                if tyre not in neumaticos:
+                    raise ValueError(f"Escenario {n}: neumático '{tyre}' no existe ({', '.join(neumaticos)})")
+            escenarios.append({
+                "circuito": circuito, "motor": motor, "alerones": alerones, "clima": clima,
+                "tyre_sequence": list(estrategia),
+                "carreras": int(entrada.get("carreras", carreras_defecto)),
+                "clima_dinamico": bool(entrada.get("clima_dinamico", True)),
+            })
+    return escenarios
+
+
+def semillas_escenario(semilla_base, indice, carreras):
+    """Semillas reproducibles e independientes por (archivo, escenario, carrera)"""
+    ss = np.random.SeedSequence([semilla_base, indice])
+    return [int(s) for s in ss.generate_state(carreras, dtype=np.uint32)]
+
+
+def carreras_por_tarea(total, procesos, maximo=CARRERAS_POR_TAREA):
+    """Tamaño de tarea: lotes grandes, pero al menos TAREAS_POR_PROCESO tareas por proceso si hay carreras"""
+    return max(MIN_CARRERAS_TAREA, min(maximo, -(-total // (procesos * TAREAS_POR_PROCESO))))
+
+
+def tareas(escenarios, semilla_base, carreras_por_tarea=CARRERAS_POR_TAREA):
+    for indice, esc in enumerate(escenarios):
+        semillas = semillas_escenario(semilla_base, indice, esc["carreras"])
+        for ini in range(0, len(semillas), carreras_por_tarea):
+            yield indice, esc, semillas[ini:ini + carreras_por_tarea]
+
+
+def ejecutar_tarea(indice, escenario, semillas, guardar=True, directorio=None):
+    """
+    Simula las carreras de una tarea (en un proceso del pool). Devuelve
+    (índice del escenario, tiempos totales, vueltas simuladas); las vueltas
+    van directo al almacén, no vuelven al proceso principal.
+    """
+    import almacen_resultados
+    import motor_simulacion as motor
+    import parametros
+
+    track = parametros.circuitos()[escenario["circuito"]]
+    tyres = parametros.neumaticos()
+    car_setup = {"motor": motor.MOTOR_OPTIONS[escenario["motor"]], "aero": motor.AERO_OPTIONS[escenario["alerones"]]}
+    config = {k: escenario[k] for k in ("circuito", "motor", "alerones", "clima", "tyre_sequence")}
+
+    # con error a medias el lote se descarta (EscritorResultados.__exit__), no queda un .tmp abierto
+    destino = almacen_resultados.EscritorResultados(escenario["circuito"], directorio) if guardar else nullcontext()
+    tiempos, vueltas = [], 0
+    with destino as escritor:
+        for semilla in semillas:
+            resultado = motor.simulate_strategy_advanced(
+                track, car_setup, escenario["tyre_sequence"], track.pitlane_time_s, escenario["clima"],
+                weather_dynamic=escenario["clima_dinamico"], tyres=tyres, rng=semilla)
+            tiempos.append(resultado["total_time_s"])
+            vueltas += len(resultado["details"])
+            if escritor is not None:
+                escritor.agregar(resultado, config, semilla)
+    return indice, tiempos, vueltas
+
+
+def resumen(escenarios, tiempos_por_escenario):
+    """Filas de la tabla resumen, por circuito y de mejor a peor tiempo medio"""
+    filas = []
+    for indice, esc in enumerate(escenarios):
+        t = np.asarray(tiempos_por_escenario[indice], dtype=float)
+        filas.append({
+            "circuito": esc["circuito"], "setup": f"{esc['motor']}/{esc['alerones']}", "clima": esc["clima"],
+            "estrategia": "-".join(esc["tyre_sequence"]), "carreras": len(t),
+            "media_s": t.mean(), "p10_s": np.percentile(t, 10), "p90_s": np.percentile(t, 90),
+            "mejor_s": t.min(),
+        })
+    return sorted(filas, key=lambda f: (f["circuito"], f["media_s"]))
+
+
+def imprimir_tabla(filas):
+    cols = ["circuito", "setup", "clima", "estrategia", "carreras", "media_s", "p10_s", "p90_s", "mejor_s"]
+    texto = [[f"{f[c]:.1f}" if isinstance(f[c], float) else str(f[c]) for c in cols] for f in filas]
+    anchos = [max(len(c), *(len(t[i]) for t in texto)) for i, c in enumerate(cols)]
+    print("  ".join(c.ljust(a) if i < 4 else c.rjust(a) for i, (c, a) in enumerate(zip(cols, anchos))))
+    for t in texto:
+        print("  ".join(v.ljust(a) if i < 4 else v.rjust(a) for i, (v, a) in enumerate(zip(t, anchos))))
+
+
+def ejecutar_archivo(ruta, procesos=None, guardar=True, directorio=None):
+    with open(ruta, "r", encoding="utf-8") as f:
+        definicion = json.load(f)
+    escenarios = expandir_escenarios(definicion)
+    semilla_base = int(definicion.get("semilla", SEMILLA_POR_DEFECTO))
+    procesos = procesos or os.cpu_count() or 1
+    total = sum(e["carreras"] for e in escenarios)
+    lista_tareas = list(tareas(escenarios, semilla_base, carreras_por_tarea(total, procesos)))
+    print(f"{len(escenarios)} escenarios, {total} carreras en {len(lista_tareas)} tareas, {procesos} procesos")
+
+    tiempos = {i: [] for i in range(len(escenarios))}
+    hechas, vueltas = 0, 0
+    progreso = sys.stderr.isatty()
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = [pool.submit(ejecutar_tarea, i, esc, semillas, guardar, directorio)
+                   for i, esc, semillas in lista_tareas]
+        for futuro in as_completed(futuros):
+            indice, t, v = futuro.result()
+            tiempos[indice].extend(t)
+            hechas += len(t)
+            vueltas += v
+            if progreso:
+                transcurrido = time.perf_counter() - t0
+                print(f"\r  {hechas}/{total} carreras — {hechas / transcurrido:.1f} carreras/s",
+                      end="", file=sys.stderr, flush=True)
+    transcurrido = time.perf_counter() - t0
+    if progreso:
+        print(file=sys.stderr)
+
+    imprimir_tabla(resumen(escenarios, tiempos))
+    print(f"\n{total} carreras en {transcurrido:.1f} s: {total / transcurrido:.1f} carreras/s "
+          f"({vueltas / transcurrido:.0f} vueltas/s, {procesos} procesos)")
+    if guardar:
+        import almacen_resultados
+        print(f"Resultados guardados en {directorio or almacen_resultados.RESULTADOS_DIR}")
+    return tiempos
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ejecuta un archivo de escenarios de estrategia en paralelo")
+    parser.add_argument("escenarios", help="archivo JSON de escenarios (ver escenarios/ejemplo.json)")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos (por defecto, todos los núcleos)")
+    parser.add_argument("--sin-guardar", action="store_true", help="no escribir en el almacén de resultados")
+    args = parser.parse_args()
+    try:
+        ejecutar_archivo(args.escenarios, args.procesos, guardar=not args.sin_guardar)
+    except ValueError as e:
+        print(f"✘ {e}")
+        raise SystemExit(1)
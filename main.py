@@ -1,8 +1,10 @@
+"""Aplicación única (multipágina): login, panel principal, simulador y análisis.
+Los módulos comparten proceso, así que motor, datos y cachés se cargan una sola vez."""
+
 import streamlit as st
-import os
 
 
-# Configuración de página
+# Configuración de página (única para toda la app: las páginas no la repiten)
 
 st.set_page_config(
     page_title="F1 Simulator - Proyecto Final",
@@ -55,16 +57,29 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Páginas de los módulos (se ejecutan dentro de este mismo servidor)
+
+PAGINA_SIMULADOR = st.Page("simulador.py", title="Simulador de Carrera", icon="🏁")
+PAGINA_ANALISIS = st.Page("applista.py", title="F1 Análisis", icon="🏎️")
+
 # Suimulación de login, entrada
 
 if "logged_in" not in st.session_state:
     st.session_state.logged_in = False
 
-if not st.session_state.logged_in:
+def logo_html(ruta="assets/logo_f1.png", ancho=200):
+    # <img> en base64: st.image importaría numpy y PIL sólo para mostrar un PNG fijo
+    import base64
+
+    with open(ruta, "rb") as f:
+        datos = base64.b64encode(f.read()).decode()
+    return f"<img src='data:image/png;base64,{datos}' width='{ancho}'>"
+
+def pagina_login():
     # Mostrar logo de F1 centrado
     try:
-        st.image("assets/logo_f1.png", width=200)
-    except:
+        st.markdown(logo_html(), unsafe_allow_html=True)
+    except OSError:
         st.markdown("### 🏎️")
     
     st.markdown("<div class='title'>Simulador de Estrategias en Fórmula 1</div>", unsafe_allow_html=True)
@@ -84,25 +99,25 @@ if not st.session_state.logged_in:
                 st.session_state.logged_in = True
                 st.success(f"¡Bienvenido {nombre}! 🚀")
                 st.rerun()
-else:
+
+def panel_principal():
     # Menú inicial
 
-    st.markdown(f"<div class='userbox'>Usuario: <b>{st.session_state.nombre}</b> | Rol: {st.session_state.rol}</div>", unsafe_allow_html=True)
     st.markdown("<div class='title'>Panel Principal</div>", unsafe_allow_html=True)
     st.markdown("<div class='subtitle'>Proyecto Final - Ingeniería Aeroespacial (UDEA)</div>", unsafe_allow_html=True)
     st.divider()
 
-    # Dos botones principales
+    # Dos botones principales: cambian de página sin arrancar otro servidor
     col1, col2 = st.columns(2)
     
     with col1:
 
         if st.button("🏁 Simulador de Carrera"):
-            os.system("streamlit run simulador.py")
+            st.switch_page(PAGINA_SIMULADOR)
 
     with col2:
         if st.button("🏎️ F1 Análisis"):
-            os.system("streamlit run applista.py")
+            st.switch_page(PAGINA_ANALISIS)
 
     st.divider()
 
@@ -144,3 +159,17 @@ else:
 
     with col4:
         st.markdown("<center><small style='color:#94a3b8;'>Versión 2.0 - 2025</small></center>", unsafe_allow_html=True)
+
+# Navegación: sin login sólo existe la página de entrada
+
+if not st.session_state.logged_in:
+    pagina = st.navigation([st.Page(pagina_login, title="Inicio de sesión", icon="🏎️")])
+else:
+    st.sidebar.markdown(f"<div class='userbox'>Usuario: <b>{st.session_state.nombre}</b> | Rol: {st.session_state.rol}</div>", unsafe_allow_html=True)
+    pagina = st.navigation([
+        st.Page(panel_principal, title="Panel Principal", icon="🏠", default=True),
+        PAGINA_SIMULADOR,
+        PAGINA_ANALISIS,
+    ])
+
+pagina.run()
@@ -0,0 +1,739 @@
+"""
+Motor de simulación de carrera (sin interfaz)
+- Opciones de setup y parámetros del modelo; circuitos/neumáticos en parametros.py
+- simulate_strategy_advanced: simulación de una estrategia vuelta a vuelta
+  (clima, trompos, errores en boxes y safety car / VSC)
+- simular_lote: el mismo modelo vectorizado sobre N carreras (Monte Carlo)
+- Lo usan simulador.py (Streamlit), calibrar.py y los módulos de análisis
+"""
+
+import numpy as np
+import random
+
+import parametros
+
+# -----------------------------
+# Parámetros y opciones
+# -----------------------------
+MOTOR_OPTIONS = {
+    "Equilibrado": {"potencia": 1.00, "tyre_wear_factor": 1.00},
+    "Potente": {"potencia": 1.05, "tyre_wear_factor": 1.10},
+    "Eficiente": {"potencia": 0.97, "tyre_wear_factor": 0.90}
+}
+
+AERO_OPTIONS = {
+    "Bajo": {"aero": 0.95},
+    "Medio": {"aero": 1.00},
+    "Alto": {"aero": 1.05}
+}
+
+CLIMA_OPTIONS = {
+    "Seco": {"grip_weather": 1.00, "rain": False},
+    "Nublado": {"grip_weather": 0.97, "rain": False},
+    "Lluvia ligera": {"grip_weather": 0.88, "rain": True},
+    "Lluvia intensa": {"grip_weather": 0.75, "rain": True}
+}
+
+# Model params (ajustables)
+K_GRIP = 0.08
+K_WEAR = 1.6
+RANDOM_NOISE_STD = 0.12  # variabilidad por vuelta (s)
+PIT_ERROR_CHANCE = 0.02  # probabilidad de error en un pit (por pitstop)
+PIT_ERROR_DELAY_S = (5.0, 12.0)  # tiempo perdido en un error en boxes (uniforme)
+SPIN_CHANCE_BASE = 0.01   # probabilidad base de salida en lluvia por vuelta (aumenta si slicks)
+SPIN_DELAY_S = (15.0, 60.0)  # tiempo perdido en un trompo (uniforme)
+
+# Clima dinámico: cadena de Markov por vuelta (matriz_clima)
+CAMBIO_CLIMA = 0.03   # probabilidad por vuelta de que el clima cambie...
+FIN_LLUVIA = 0.5      # ... lloviendo: deja de llover (pasa a Seco)
+INICIO_LLUVIA = 0.3   # ... en seco: empieza a llover (ligera o intensa, al 50%)
+
+# Neutralizaciones: safety car (SC) y coche de seguridad virtual (VSC)
+# El riesgo por vuelta de cada circuito está en circuitos.json (riesgo_sc)
+SIN_NEUTRALIZAR, VSC, SC = 0, 1, 2
+NEUTRAL_NOMBRES = {VSC: "VSC", SC: "Safety car"}
+SC_FRACCION = 0.6            # fracción de las neutralizaciones que son SC (el resto, VSC)
+DURACION_NEUTRAL = {VSC: (1, 3), SC: (3, 5)}  # vueltas (mín, máx)
+SC_POR_TROMPO = 0.05         # un trompo provoca una neutralización con esta probabilidad
+RIESGO_SC_LLUVIA = 2.0       # multiplicador del riesgo del circuito con lluvia
+RITMO_NEUTRAL = np.array([0.0, 1.30, 1.40])         # vuelta mínima relativa a base_lap_time (0: sin mínimo)
+PERDIDA_BOXES_NEUTRAL = np.array([1.0, 0.65, 0.5])  # fracción del tiempo de boxes que se pierde
+VENTANA_PARADA_NEUTRAL = 8   # se adelanta la parada si faltaban <= N vueltas para la prevista
+MIN_VUELTAS_STINT = 5        # ... y el stint ya lleva al menos estas vueltas
+
+# -----------------------------
+# FUNCIONES AUXILIARES
+# -----------------------------
+def base_lap_time(track, motor_coef, aero_coef):
+    return track.tiempo_base_s / (motor_coef * aero_coef)
+
+def coste_combustible(track):
+    """
+    Segundos que suma el peso del combustible en cada vuelta (array por
+    vuelta, carga a mitad de vuelta). Es igual en todas las carreras: se
+    calcula una vez por simulación, no por carrera.
+    """
+    vueltas = np.arange(track.vueltas)
+    carga = np.maximum(0.0, track.combustible_kg - track.consumo_kg_vuelta * (vueltas + 0.5))
+    return track.tiempo_por_kg_s * carga
+
+def nueva_semilla():
+    """Semilla aleatoria para una simulación (se guarda junto al resultado)"""
+    return random.SystemRandom().randrange(2**32)
+
+def generador(rng=None):
+    """
+    Generador propio de una carrera (random.Random) a partir de una semilla:
+    misma semilla -> misma carrera, aunque otras sesiones simulen a la vez
+    (no se toca el estado global de random ni de np.random)
+    """
+    return rng if isinstance(rng, random.Random) else random.Random(rng)
+
+def tyre_suitability_penalty(tyre_key, is_raining):
+    """Devuelve multiplicador y riesgo extra si neumático es inadecuado para la lluvia"""
+    if is_raining:
+        if tyre_key in ["Intermedio", "Lluvia"]:
+            return 1.0, 0.0  # adecuado
+        else:
+            # Slicks en lluvia -> penalidad y riesgo de salida
+            return 1.15, 0.02  # +15% tiempo por vuelta y +2% de spin chance
+    else:
+        # Si usas rain tyres en seco penaliza un poco (menos temperatura ideal)
+        if tyre_key == "Lluvia":
+            return 1.08, 0.0
+        return 1.0, 0.0
+
+def matriz_clima():
+    """
+    Probabilidades de transición del clima de una vuelta a la siguiente
+    (CLIMA_KEYS x CLIMA_KEYS), las mismas que aplica el motor con weather_dynamic
+    """
+    keys = list(CLIMA_OPTIONS)
+    lluvias = [i for i, k in enumerate(keys) if CLIMA_OPTIONS[k]["rain"]]
+    q = np.eye(len(keys))
+    for i, k in enumerate(keys):
+        if CLIMA_OPTIONS[k]["rain"]:
+            q[i, i] -= CAMBIO_CLIMA * FIN_LLUVIA
+            q[i, keys.index("Seco")] += CAMBIO_CLIMA * FIN_LLUVIA
+        else:
+            q[i, i] -= CAMBIO_CLIMA * INICIO_LLUVIA
+            q[i, lluvias] += CAMBIO_CLIMA * INICIO_LLUVIA / len(lluvias)
+    return q
+
+def marginales_clima(vueltas, clima_key):
+    """
+    (vueltas, clima): probabilidad de cada clima en cada vuelta partiendo de
+    clima_key (el clima de cada vuelta se sortea antes de correrla, como en el motor)
+    """
+    keys = list(CLIMA_OPTIONS)
+    transicion = matriz_clima()
+    p = np.zeros(len(keys))
+    p[keys.index(clima_key)] = 1.0
+    marginales = np.empty((vueltas, len(keys)))
+    for vuelta in range(vueltas):
+        p = p @ transicion
+        marginales[vuelta] = p
+    return marginales
+
+def reparto_stints(laps_total, n_stints):
+    """Vueltas de cada stint: reparto uniforme, el resto a los primeros"""
+    base = laps_total // n_stints
+    remainder = laps_total % n_stints
+    return [base + (1 if i < remainder else 0) for i in range(n_stints)]
+
+def plan_stints(laps_total, n_stints, vueltas_stint=None):
+    """Vueltas de cada stint: las indicadas (validadas) o el reparto uniforme"""
+    if vueltas_stint is None:
+        return reparto_stints(laps_total, n_stints)
+    vueltas_stint = [int(v) for v in vueltas_stint]
+    if len(vueltas_stint) != n_stints or min(vueltas_stint) < 1 or sum(vueltas_stint) != laps_total:
+        raise ValueError(f"vueltas_stint debe tener {n_stints} stints de al menos 1 vuelta "
+                         f"que sumen {laps_total} (recibido {vueltas_stint})")
+    return vueltas_stint
+
+
+# -----------------------------
+# MODELO TÉRMICO DEL NEUMÁTICO
+# -----------------------------
+# dT/dv = (T_eq - T) / tau por vuelta, con T_eq = pista + calentamiento * carga
+# (- enfriamiento si llueve). Se integra con la solución exacta de cada paso,
+# T += (1 - exp(-1/tau)) * (T_eq - T): estable para cualquier tau y la misma
+# cuenta sirve para un float (motor escalar) o un array de carreras/coches.
+TEMP_PISTA_C = 35.0  # temperatura de referencia del asfalto
+
+def carga_termica(track, motor_coef, aero_coef):
+    """Energía que el coche mete en el neumático (~1 con setup equilibrado en un circuito medio)"""
+    return motor_coef * aero_coef * (0.6 + 0.5 * track.abrasion)
+
+def constantes_termicas(neumaticos, carga):
+    """
+    Constantes del modelo térmico de una lista de neumáticos (registros de
+    parametros), como arrays en el mismo orden. Si carga es un array por
+    coche, 'equilibrio' sale (coches, neumáticos); el resto, (neumáticos,).
+    """
+    def col(campo):
+        return np.array([getattr(t, campo) for t in neumaticos])
+    ideal, ventana = col("temp_ideal_c"), col("ventana_c")
+    return {
+        "inicial": col("temp_inicial_c"),
+        "equilibrio": TEMP_PISTA_C + np.multiply.outer(carga, col("calentamiento_c")),
+        "enfriamiento": col("enfriamiento_lluvia_c"),
+        "alfa": 1.0 - np.exp(-1.0 / col("constante_vueltas")),
+        "minimo": ideal - ventana,
+        "maximo": ideal + ventana,
+        "frio": col("penal_frio"),
+        "calor": col("penal_calor"),
+        "desgaste": col("desgaste_calor"),
+    }
+
+def paso_termico(temp, equilibrio, enfriamiento, rain, alfa):
+    """Temperatura tras una vuelta (rain: bool o array de bool)"""
+    return temp + alfa * (equilibrio - enfriamiento * rain - temp)
+
+def efecto_termico(temp, minimo, maximo, frio, calor):
+    """(pérdida de grip fuera de la ventana, °C por encima de la ventana)"""
+    positivo = np.maximum if isinstance(temp, np.ndarray) else max  # max: mucho más rápido con floats
+    exceso = positivo(0.0, temp - maximo)
+    return frio * positivo(0.0, minimo - temp) + calor * exceso, exceso
+
+def tiempos_por_edad(track, car_setup, tyre_key, vueltas, clima_key="Seco", tyres=None, con_trompos=False):
+    """
+    Coste determinista de un juego de neumáticos: tiempo de vuelta (s) según su
+    edad 0..vueltas-1, con el modelo de simulate_strategy_advanced a clima
+    constante, sin ruido, incidentes ni combustible (coste_combustible va
+    aparte, por vuelta de carrera). Con clima fijo la temperatura tiene
+    solución cerrada, así que no hay bucle por vuelta. con_trompos=True suma
+    el coste medio de los trompos (probabilidad x tiempo medio perdido).
+    """
+    if tyres is None:
+        tyres = parametros.neumaticos()
+    tyre = tyres[tyre_key]
+    clima = CLIMA_OPTIONS[clima_key]
+    motor_coef = car_setup["motor"]["potencia"]
+    aero_coef = car_setup["aero"]["aero"]
+    term = {k: v[0] for k, v in constantes_termicas([tyre], carga_termica(track, motor_coef, aero_coef)).items()}
+    edad = np.arange(vueltas)
+    equilibrio = term["equilibrio"] - term["enfriamiento"] * clima["rain"]
+    temp = equilibrio + (term["inicial"] - equilibrio) * (1.0 - term["alfa"]) ** (edad + 1)
+    temp_penalty, exceso = efecto_termico(temp, term["minimo"], term["maximo"], term["frio"], term["calor"])
+    degr = tyre.degradation_per_lap * car_setup["motor"]["tyre_wear_factor"] * track.abrasion
+    desgaste = np.concatenate(([0.0], np.cumsum(degr * (1.0 + term["desgaste"] * exceso))[:-1]))
+    grip = np.maximum(0.25, tyre.grip_initial * clima["grip_weather"] - desgaste - temp_penalty)
+    pen_mult, extra_spin_risk = tyre_suitability_penalty(tyre_key, clima["rain"])
+    base_time = base_lap_time(track, motor_coef, aero_coef)
+    tiempo = (base_time / tyre.speed_factor * (1 - K_GRIP * grip) + K_WEAR * (1 - grip)) * pen_mult
+    if con_trompos:
+        spin_chance = SPIN_CHANCE_BASE + extra_spin_risk + np.maximum(0.0, 0.5 - grip) * 0.05
+        tiempo += spin_chance * np.mean(SPIN_DELAY_S)
+    return tiempo
+
+def simulate_strategy_advanced(track, car_setup, tyre_sequence, pitlane_time, initial_clima_key,
+                               weather_dynamic=True, show_progress=False, tyres=None, neutralizaciones=True,
+                               vueltas_stint=None, rng=None):
+    """
+    Simulación avanzada:
+    - track: parametros.Circuito; tyres: tabla de neumáticos (por defecto
+      la vigente del registro, leída una vez para toda la carrera)
+    - Puede cambiar el clima (weather_dynamic=True)
+    - Modela temperatura de neumático (modelo térmico por compuesto),
+      combustible y penalizaciones
+    - Safety car / VSC (neutralizaciones=True): ritmo lento, parada más
+      barata y se adelanta la parada si estaba prevista en pocas vueltas
+    - vueltas_stint: vueltas previstas de cada stint (por defecto, reparto_stints)
+    - rng: random.Random o semilla (ver generador); None = carrera al azar
+    - Retorna dict con lap_times, details, total_time, events, final_clima
+    """
+    if tyres is None:
+        tyres = parametros.neumaticos()
+    rng = generador(rng)
+    laps_total = track.vueltas
+    n_stints = len(tyre_sequence)
+    # vueltas en que acaba cada stint según el plan (una neutralización puede adelantar la parada)
+    fin_plan = np.cumsum(plan_stints(laps_total, n_stints, vueltas_stint)).tolist()
+    stints_laps = []
+
+    motor_coef = car_setup["motor"]["potencia"]
+    aero_coef = car_setup["aero"]["aero"]
+    tyre_wear_factor = car_setup["motor"]["tyre_wear_factor"]
+
+    lap_times = []
+    details = []
+    lap_number = 1
+    base_time = base_lap_time(track, motor_coef, aero_coef)
+    combustible = coste_combustible(track)
+    termica = constantes_termicas([tyres[k] for k in tyre_sequence], carga_termica(track, motor_coef, aero_coef))
+    termica = [dict(zip(termica, fila)) for fila in zip(*(v.tolist() for v in termica.values()))]
+
+    # clima inicial
+    clima_key = initial_clima_key
+    clima = CLIMA_OPTIONS[clima_key]
+
+    # progress UI
+    if show_progress:
+        import streamlit as st
+        progress_bar = st.progress(0)
+        progress_text = st.empty()
+
+    # estado de neumático: temperatura (°C), desgaste acumulado y grip aproximado
+    # cada juego nuevo sale a su temperatura inicial (mantas) y tiende a la de equilibrio
+    stint_idx = 0
+    v = 0  # vueltas hechas en el stint actual
+
+    # neutralización en curso (SIN_NEUTRALIZAR, VSC o SC) y vueltas que le quedan
+    neutral = SIN_NEUTRALIZAR
+    resto_neutral = 0
+
+    # evento log (p. ej. cambios de clima, spins, pit errors, safety car)
+    events = []
+
+    for lap in range(1, laps_total + 1):
+        if v == 0:
+            tyre_key = tyre_sequence[stint_idx]
+            tyre = tyres[tyre_key]
+            # grip inicial modulada por clima
+            grip_initial = tyre.grip_initial * clima["grip_weather"]
+            degr_base = tyre.degradation_per_lap * tyre_wear_factor * track.abrasion
+            speed_factor = tyre.speed_factor
+            term = termica[stint_idx]  # constantes térmicas del compuesto
+            tyre_temp = term["inicial"]
+            desgaste = 0.0
+
+        # posible cambio climático (si está activado)
+        if weather_dynamic and rng.random() < CAMBIO_CLIMA:  # 3% chance per lap to change weather
+            # simple transition: if not raining -> 30% chance start rain; if raining -> 50% chance stop
+            if clima["rain"]:
+                # stop rain
+                if rng.random() < FIN_LLUVIA:
+                    clima_key = "Seco"
+                    clima = CLIMA_OPTIONS[clima_key]
+                    events.append({"lap": lap_number, "event": "Rain stopped -> Seco"})
+            else:
+                if rng.random() < INICIO_LLUVIA:
+                    clima_key = rng.choice(["Lluvia ligera", "Lluvia intensa"])
+                    clima = CLIMA_OPTIONS[clima_key]
+                    events.append({"lap": lap_number, "event": f"Started {clima_key}"})
+
+        # temperatura: se calienta hacia el equilibrio del compuesto; la lluvia lo enfría
+        tyre_temp = paso_termico(tyre_temp, term["equilibrio"], term["enfriamiento"], clima["rain"], term["alfa"])
+        # fuera de la ventana ideal se pierde grip; por encima, además, se desgasta más
+        temp_penalty, exceso = efecto_termico(tyre_temp, term["minimo"], term["maximo"], term["frio"], term["calor"])
+        # grip en esta vuelta (no menor que 0.25)
+        grip = max(0.25, grip_initial - desgaste - temp_penalty)
+        desgaste += degr_base * (1.0 + term["desgaste"] * exceso)
+
+        # aplicamos la penalidad por uso de neumático inadecuado y riesgo de spin
+        pen_mult, extra_spin_risk = tyre_suitability_penalty(tyre_key, clima["rain"])
+        # spin chance base aumentada si grip muy bajo
+        spin_chance = SPIN_CHANCE_BASE + extra_spin_risk + max(0.0, (0.5 - grip)) * 0.05
+
+        # compute lap time
+        lap_time = base_time * (1 / speed_factor) * (1 - K_GRIP * grip) + K_WEAR * (1 - grip)
+        lap_time *= pen_mult
+        lap_time += combustible[lap - 1]  # más lento con el tanque lleno
+        lap_time += rng.gauss(0.0, RANDOM_NOISE_STD)
+        lap_time = max(0.1, lap_time)
+
+        spin = False
+        if neutral:
+            # detrás del safety car / con VSC nadie va más rápido que el ritmo neutralizado
+            lap_time = max(lap_time, base_time * RITMO_NEUTRAL[neutral])
+        elif rng.random() < spin_chance:
+            # check spin event (only in rain or very low grip)
+            spin = True
+            spin_delay = rng.uniform(*SPIN_DELAY_S)  # seconds lost in spin/recovery
+            lap_time += spin_delay
+            events.append({"lap": lap_number, "event": f"Spin! +{spin_delay:.1f}s", "tyre": tyre_key})
+
+        lap_times.append(lap_time)
+        details.append({
+            "lap": lap_number,
+            "stint": stint_idx + 1,
+            "tyre": tyre_key,
+            "grip": round(grip, 4),
+            "temp": round(tyre_temp, 1),
+            "lap_time_s": round(lap_time, 3),
+            "clima": clima_key,
+            "neutral": NEUTRAL_NOMBRES.get(neutral)
+        })
+        lap_number += 1
+        v += 1
+
+        # update UI progress
+        if show_progress:
+            percent = int(100 * ((lap_number - 1) / (laps_total + (n_stints - 1))))  # include pits approximate
+            progress_bar.progress(min(percent, 100))
+            progress_text.markdown(f"🏎️ Stint {stint_idx+1}/{n_stints} — Vuelta {lap}/{laps_total} — Clima: **{clima_key}**")
+
+        # pitstop (if not last stint): la prevista, o antes si hay neutralización y ya tocaba pronto
+        if stint_idx < n_stints - 1:
+            faltan = fin_plan[stint_idx] - lap
+            if faltan == 0 or (neutral and faltan <= VENTANA_PARADA_NEUTRAL and v >= MIN_VUELTAS_STINT):
+                pit_time = pitlane_time * PERDIDA_BOXES_NEUTRAL[neutral]
+                if neutral:
+                    events.append({"lap": lap_number, "event": f"Pit bajo {NEUTRAL_NOMBRES[neutral]} "
+                                                               f"(-{pitlane_time - pit_time:.1f}s)"})
+                # chance of pit error
+                if rng.random() < PIT_ERROR_CHANCE:
+                    extra = rng.uniform(*PIT_ERROR_DELAY_S)
+                    pit_time += extra
+                    events.append({"lap": lap_number, "event": f"Pit error +{extra:.1f}s"})
+                # pit as an event (we store as a lap entry)
+                lap_times.append(pit_time)
+                details.append({
+                    "lap": lap_number,
+                    "stint": "PIT",
+                    "tyre": "Cambio",
+                    "grip": None,
+                    "temp": None,
+                    "lap_time_s": round(pit_time, 3),
+                    "clima": clima_key,
+                    "neutral": NEUTRAL_NOMBRES.get(neutral)
+                })
+                lap_number += 1
+                stints_laps.append(v)
+                stint_idx += 1
+                v = 0
+
+        # neutralización para la vuelta siguiente: termina la actual o empieza una nueva
+        if neutral:
+            resto_neutral -= 1
+            if resto_neutral == 0:
+                events.append({"lap": lap_number, "event": f"Fin {NEUTRAL_NOMBRES[neutral]}"})
+                neutral = SIN_NEUTRALIZAR
+        elif neutralizaciones and (
+                rng.random() < track.riesgo_sc * (RIESGO_SC_LLUVIA if clima["rain"] else 1.0)
+                or (spin and rng.random() < SC_POR_TROMPO)):
+            neutral = SC if rng.random() < SC_FRACCION else VSC
+            resto_neutral = rng.randint(*DURACION_NEUTRAL[neutral])
+            events.append({"lap": lap_number, "event": f"{NEUTRAL_NOMBRES[neutral]} ({resto_neutral} vueltas)"})
+
+    stints_laps.append(v)
+    total_time = sum(lap_times)
+    if show_progress:
+        progress_bar.empty()
+        progress_text.empty()
+    return {
+        "lap_times": lap_times,
+        "total_time_s": total_time,
+        "details": details,
+        "stints_laps": stints_laps,
+        "events": events,
+        "final_clima": clima_key
+    }
+
+
+# -----------------------------
+# SIMULACIÓN POR LOTES (VECTORIZADA)
+# -----------------------------
+CLIMA_KEYS = list(CLIMA_OPTIONS)
+CLIMA_GRIP = np.array([CLIMA_OPTIONS[k]["grip_weather"] for k in CLIMA_KEYS])
+CLIMA_RAIN = np.array([CLIMA_OPTIONS[k]["rain"] for k in CLIMA_KEYS])
+CLIMA_LLUVIAS = np.array([i for i, k in enumerate(CLIMA_KEYS) if CLIMA_OPTIONS[k]["rain"]])
+PROB_MAX_SESGO = 0.5  # tope de la probabilidad inflada de un incidente (muestreo por importancia)
+
+def sorteo_sesgado(rng, prob, sesgo, log_peso):
+    """
+    Sorteo de incidentes con la probabilidad multiplicada por 'sesgo' (hasta
+    PROB_MAX_SESGO): suma a log_peso el log de la razón de verosimilitudes
+    (real / sorteada) del resultado de cada carrera. Retorna qué carreras lo sufren.
+    """
+    q = np.minimum(prob * sesgo, PROB_MAX_SESGO)
+    ocurre = rng.random(prob.shape) < q
+    log_peso += np.log(np.where(ocurre, prob / np.where(q > 0, q, 1.0), (1.0 - prob) / (1.0 - q)))
+    return ocurre
+
+# Muestreo cuasi-aleatorio (QMC): eventos de cada tipo por carrera con coordenadas de la
+# secuencia de baja discrepancia (los siguientes, pseudoaleatorios) y uniformes de cada evento
+QMC_EVENTOS = 3
+QMC_ATRIBUTOS = {"clima": 1, "neutral": 2, "trompo": 1}  # tipo de lluvia / SC o VSC y duración / retraso
+QMC_METODOS = ("sobol", "halton")
+
+class RelojEventos:
+    """
+    Eventos raros por vuelta de un tipo (cambio de clima, neutralización,
+    trompo) sorteados por su tiempo de espera: cada carrera tiene un umbral
+    Exp(1) y acumula el riesgo -log(1 - p) de cada vuelta; el evento ocurre
+    al superarlo (misma ley que sortear cada vuelta con probabilidad p).
+    Así el k-ésimo evento de una carrera depende de UNA coordenada (más las
+    de sus atributos) en vez de una por vuelta.
+    """
+
+    def __init__(self, coordenadas, rng):
+        self.coordenadas = coordenadas  # (n, eventos, 1 + atributos) en [0, 1)
+        self.rng = rng
+        n = coordenadas.shape[0]
+        self.k = np.zeros(n, dtype=np.intp)
+        self.acumulado = np.zeros(n)
+        self.umbral = -np.log1p(-coordenadas[:, 0, 0])
+
+    def _uniformes(self, idx):
+        """Uniformes del evento k de cada carrera idx; pseudoaleatorias si ya no quedan coordenadas"""
+        k = self.k[idx]
+        u = self.rng.random((idx.size, self.coordenadas.shape[2]))
+        quedan = k < self.coordenadas.shape[1]
+        u[quedan] = self.coordenadas[idx[quedan], k[quedan]]
+        return u
+
+    def paso(self, prob):
+        """Índices de las carreras con evento en esta vuelta y los atributos (uniformes) de cada uno"""
+        self.acumulado -= np.log1p(-prob)
+        idx = np.flatnonzero(self.acumulado > self.umbral)
+        if not idx.size:
+            return idx, None
+        atributos = self._uniformes(idx)[:, 1:]
+        self.k[idx] += 1
+        self.acumulado[idx] = 0.0
+        self.umbral[idx] = -np.log1p(-self._uniformes(idx)[:, 0])
+        return idx, atributos
+
+def relojes_qmc(metodo, n, rng):
+    """
+    Un RelojEventos por tipo (QMC_ATRIBUTOS) con coordenadas de una secuencia
+    scrambled Sobol o Halton (scipy.stats.qmc), aleatorizada con rng: cada
+    llamada es una réplica independiente e insesgada (QMC aleatorizado)
+    """
+    from scipy.stats import qmc
+
+    # tiempo de espera + atributos de cada evento: 3 x (2 + 3 + 2) = 21 dimensiones
+    dims = QMC_EVENTOS * sum(1 + a for a in QMC_ATRIBUTOS.values())
+    if metodo == "sobol":
+        # potencia de 2 (el reparto equilibrado de Sobol) y se toman las n primeras (n=0: ninguna)
+        puntos = qmc.Sobol(dims, scramble=True, seed=rng).random_base2(int(np.ceil(np.log2(max(n, 1)))))[:n]
+    elif metodo == "halton":
+        puntos = qmc.Halton(dims, scramble=True, seed=rng).random(n)
+    else:
+        raise ValueError(f"qmc debe ser uno de {QMC_METODOS}, no {metodo!r}")
+    # las primeras dimensiones (las de mejor reparto) son el primer evento de cada tipo
+    columnas = np.arange(dims).reshape(QMC_EVENTOS, -1)
+    relojes, ini = {}, 0
+    for tipo, atributos in QMC_ATRIBUTOS.items():
+        relojes[tipo] = RelojEventos(puntos[:, columnas[:, ini:ini + 1 + atributos]], rng)
+        ini += 1 + atributos
+    return relojes
+
+def simular_lote(track, car_setup, tyre_sequence, pitlane_time, initial_clima_key, n,
+                 weather_dynamic=True, rng=None, tyres=None, guardar_vueltas=False, neutralizaciones=True,
+                 politica=None, vueltas_stint=None, sesgo_incidentes=None, qmc=None):
+    """
+    Mismo modelo que simulate_strategy_advanced para n carreras a la vez:
+    el estado (clima, stint, temperatura, grip, neutralización) es un array
+    por carrera y el bucle solo recorre las vueltas; el neumático de cada
+    carrera sale de su stint (las paradas adelantadas por SC/VSC hacen que
+    no todas cambien en la misma vuelta). rng: np.random.Generator (o semilla).
+    vueltas_stint: vueltas previstas de cada stint (por defecto, reparto_stints).
+    politica (politica_paradas.resolver): en vez de la secuencia fija, al
+    final de cada vuelta se para o no, y con qué compuesto, según la tabla
+    (vuelta, compuesto, edad, clima); tyre_sequence se ignora.
+    sesgo_incidentes (muestreo por importancia, > 1): trompos y errores en
+    boxes se sortean con la probabilidad multiplicada (sorteo_sesgado) y
+    cada carrera lleva su peso: las medias ponderadas por peso (y la
+    probabilidad de cualquier suceso) son insesgadas para el modelo real.
+    qmc ("sobol" o "halton"): cambios de clima, neutralizaciones y trompos
+    con tiempos de espera de una secuencia de baja discrepancia aleatorizada
+    (relojes_qmc; ruido por vuelta y errores en boxes, pseudoaleatorios):
+    misma ley, la media converge más rápido. No se combina con sesgo_incidentes.
+    Retorna dict con total_time_s (n,), spins (n,), pit_errors (n,),
+    perdida_incidentes_s (n,: tiempo perdido en trompos y errores en boxes),
+    final_clima (n, índice en CLIMA_KEYS), neutralizaciones (n,),
+    paradas (n,), paradas_neutralizadas (n,), peso (n,; None sin
+    sesgo_incidentes) y, si guardar_vueltas, lap_times (n, vueltas) en
+    float32 (cada parada suma a su vuelta).
+    """
+    if tyres is None:
+        tyres = parametros.neumaticos()
+    rng = np.random.default_rng(rng)
+    relojes = None
+    if qmc is not None:
+        if sesgo_incidentes is not None:
+            raise ValueError("qmc y sesgo_incidentes no se pueden combinar")
+        relojes = relojes_qmc(qmc, n, rng)
+    motor_coef = car_setup["motor"]["potencia"]
+    aero_coef = car_setup["aero"]["aero"]
+    tyre_wear_factor = car_setup["motor"]["tyre_wear_factor"]
+    base_time = base_lap_time(track, motor_coef, aero_coef)
+    combustible = coste_combustible(track)
+    clima = np.full(n, CLIMA_KEYS.index(initial_clima_key))
+    if politica is None:
+        n_stints = len(tyre_sequence)
+        fin_plan = np.cumsum(plan_stints(track.vueltas, n_stints, vueltas_stint))
+        inicial = 0
+    else:
+        # con política, 'stint' es el índice del compuesto en politica["compuestos"]
+        tyre_sequence = politica["compuestos"]
+        decision = politica["decision"]
+        edad_max = decision.shape[2] - 1
+        inicial = int(politica["salida"][clima[0]])
+
+    # constantes por stint de la estrategia
+    secuencia = [tyres[k] for k in tyre_sequence]
+    grip_stint = np.array([t.grip_initial for t in secuencia])
+    degr_stint = np.array([t.degradation_per_lap for t in secuencia]) * tyre_wear_factor * track.abrasion
+    tiempo_stint = base_time / np.array([t.speed_factor for t in secuencia])
+    penal = {lluvia: np.array([tyre_suitability_penalty(k, lluvia) for k in tyre_sequence])
+             for lluvia in (False, True)}
+    termica_stint = constantes_termicas(secuencia, carga_termica(track, motor_coef, aero_coef))
+
+    stint = np.full(n, inicial, dtype=np.intp)
+    en_stint = np.zeros(n)  # vueltas hechas en el stint actual
+    # constantes del stint actual de cada carrera (solo cambian en las paradas)
+    grip_initial = grip_stint[inicial] * CLIMA_GRIP[clima]
+    degr = np.full(n, degr_stint[inicial])
+    tiempo = np.full(n, tiempo_stint[inicial])
+    pen = {lluvia: np.broadcast_to(penal[lluvia][inicial], (n, 2)).copy() for lluvia in (False, True)}
+    termica = {k: np.full(n, v[inicial]) for k, v in termica_stint.items()}
+    tyre_temp = termica["inicial"].copy()
+    desgaste = np.zeros(n)  # pérdida de grip acumulada en el stint actual
+    neutral = np.zeros(n, dtype=np.intp)
+    resto_neutral = np.zeros(n, dtype=np.int32)
+    total = np.zeros(n)
+    spins = np.zeros(n, dtype=np.int32)
+    pit_errors = np.zeros(n, dtype=np.int32)
+    perdida = np.zeros(n)
+    log_peso = np.zeros(n) if sesgo_incidentes is not None else None
+    paradas = np.zeros(n, dtype=np.int32)
+    n_neutral = np.zeros(n, dtype=np.int32)
+    paradas_neutral = np.zeros(n, dtype=np.int32)
+    lap_times = np.empty((n, track.vueltas), dtype=np.float32) if guardar_vueltas else None
+    duracion = np.array([(0, 0), DURACION_NEUTRAL[VSC], DURACION_NEUTRAL[SC]])
+    neutralizadas = np.empty(0, dtype=np.intp)  # carreras neutralizadas en esta vuelta
+    nuevas = np.empty(0, dtype=np.intp)  # carreras que empiezan stint en esta vuelta
+
+    for lap in range(1, track.vueltas + 1):
+        if nuevas.size:
+            # como en el escalar: el grip inicial toma el clima del inicio del stint
+            s_nuevo = stint[nuevas]
+            grip_initial[nuevas] = grip_stint[s_nuevo] * CLIMA_GRIP[clima[nuevas]]
+            degr[nuevas] = degr_stint[s_nuevo]
+            tiempo[nuevas] = tiempo_stint[s_nuevo]
+            for lluvia in (False, True):
+                pen[lluvia][nuevas] = penal[lluvia][s_nuevo]
+            for k, v in termica_stint.items():
+                termica[k][nuevas] = v[s_nuevo]
+            tyre_temp[nuevas] = termica["inicial"][nuevas]
+            desgaste[nuevas] = 0.0
+
+        if weather_dynamic and relojes is None:
+            cambia = rng.random(n) < CAMBIO_CLIMA
+            u = rng.random(n)
+            lluvia_nueva = CLIMA_LLUVIAS[rng.integers(len(CLIMA_LLUVIAS), size=n)]
+            llueve = CLIMA_RAIN[clima]
+            clima = np.where(cambia & llueve & (u < FIN_LLUVIA), 0, clima)
+            clima = np.where(cambia & ~llueve & (u < INICIO_LLUVIA), lluvia_nueva, clima)
+        elif weather_dynamic:
+            # la misma cadena (matriz_clima): sale del estado con su probabilidad y, si empieza a llover, elige tipo
+            llueve = CLIMA_RAIN[clima]
+            cambian, u = relojes["clima"].paso(CAMBIO_CLIMA * np.where(llueve, FIN_LLUVIA, INICIO_LLUVIA))
+            if cambian.size:
+                clima[cambian] = np.where(llueve[cambian], 0,
+                                          CLIMA_LLUVIAS[(u[:, 0] * len(CLIMA_LLUVIAS)).astype(np.intp)])
+        rain = CLIMA_RAIN[clima]
+
+        tyre_temp = paso_termico(tyre_temp, termica["equilibrio"], termica["enfriamiento"], rain, termica["alfa"])
+        temp_penalty, exceso = efecto_termico(tyre_temp, termica["minimo"], termica["maximo"],
+                                              termica["frio"], termica["calor"])
+        grip = np.maximum(0.25, grip_initial - desgaste - temp_penalty)
+        desgaste += degr * (1.0 + termica["desgaste"] * exceso)
+
+        pen_mult = np.where(rain, pen[True][:, 0], pen[False][:, 0])
+        spin_chance = SPIN_CHANCE_BASE + np.where(rain, pen[True][:, 1], pen[False][:, 1]) \
+            + np.maximum(0.0, 0.5 - grip) * 0.05
+
+        lap_time = (tiempo * (1 - K_GRIP * grip) + K_WEAR * (1 - grip)) * pen_mult
+        # el combustible de la vuelta va en la media del ruido: no añade operaciones
+        lap_time += rng.normal(combustible[lap - 1], RANDOM_NOISE_STD, n)
+        np.maximum(lap_time, 0.1, out=lap_time)
+        if neutralizadas.size:
+            # neutralizado: ritmo mínimo fijo y sin trompos
+            lap_time[neutralizadas] = np.maximum(lap_time[neutralizadas],
+                                                 base_time * RITMO_NEUTRAL[neutral[neutralizadas]])
+            spin_chance[neutralizadas] = 0.0
+        if relojes is not None:
+            trompos, u = relojes["trompo"].paso(spin_chance)
+            spin = np.zeros(n, dtype=bool)
+            retraso = np.zeros(n)
+            if trompos.size:
+                spin[trompos] = True
+                retraso[trompos] = SPIN_DELAY_S[0] + (SPIN_DELAY_S[1] - SPIN_DELAY_S[0]) * u[:, 0]
+        else:
+            if log_peso is None:
+                spin = rng.random(n) < spin_chance
+            else:
+                spin = sorteo_sesgado(rng, spin_chance, sesgo_incidentes, log_peso)
+            retraso = rng.uniform(*SPIN_DELAY_S, n)
+            retraso *= spin
+        lap_time += retraso
+        perdida += retraso
+        spins += spin
+        en_stint += 1
+
+        # parada: la que diga la política para el estado de la carrera
+        if politica is not None:
+            siguiente = decision[lap, stint, np.minimum(en_stint, edad_max).astype(np.intp), clima]
+            nuevas = np.flatnonzero(siguiente >= 0)
+        # o la prevista, o antes si hay neutralización y ya tocaba pronto
+        elif n_stints > 1:
+            faltan = fin_plan[stint] - lap
+            para = (faltan == 0) & (stint < n_stints - 1)
+            if neutralizadas.size:
+                sub = neutralizadas
+                para[sub] |= (stint[sub] < n_stints - 1) & (faltan[sub] <= VENTANA_PARADA_NEUTRAL) \
+                    & (en_stint[sub] >= MIN_VUELTAS_STINT)
+            nuevas = np.flatnonzero(para)
+        if nuevas.size:
+            if log_peso is None:
+                error = rng.random(nuevas.size) < PIT_ERROR_CHANCE
+            else:
+                peso_nuevas = log_peso[nuevas]
+                error = sorteo_sesgado(rng, np.full(nuevas.size, PIT_ERROR_CHANCE), sesgo_incidentes, peso_nuevas)
+                log_peso[nuevas] = peso_nuevas
+            retraso = error * rng.uniform(*PIT_ERROR_DELAY_S, nuevas.size)
+            lap_time[nuevas] += pitlane_time * PERDIDA_BOXES_NEUTRAL[neutral[nuevas]] + retraso
+            perdida[nuevas] += retraso
+            pit_errors[nuevas] += error
+            paradas[nuevas] += 1
+            paradas_neutral[nuevas] += neutral[nuevas] > 0
+            stint[nuevas] = stint[nuevas] + 1 if politica is None else siguiente[nuevas]
+            en_stint[nuevas] = 0
+
+        total += lap_time
+        if guardar_vueltas:
+            lap_times[:, lap - 1] = lap_time
+
+        # neutralización de la vuelta siguiente
+        if neutralizaciones:
+            if neutralizadas.size:
+                resto_neutral[neutralizadas] -= 1
+                terminan = neutralizadas[resto_neutral[neutralizadas] == 0]
+                neutral[terminan] = SIN_NEUTRALIZAR
+            # riesgo del circuito o trompo (una sola tirada: P(A o B) ~ P(A) + P(B), ambas pequeñas)
+            riesgo = track.riesgo_sc * np.where(rain, RIESGO_SC_LLUVIA, 1.0) + spin * SC_POR_TROMPO
+            riesgo[neutralizadas] = 0.0  # la que sigue (o acaba de terminar) no se solapa
+            if relojes is None:
+                incidente = np.flatnonzero(rng.random(n) < riesgo)
+                if incidente.size:
+                    tipo = np.where(rng.random(incidente.size) < SC_FRACCION, SC, VSC)
+                    vueltas_neutral = rng.integers(duracion[tipo, 0], duracion[tipo, 1] + 1)
+            else:
+                incidente, u = relojes["neutral"].paso(riesgo)
+                if incidente.size:
+                    tipo = np.where(u[:, 0] < SC_FRACCION, SC, VSC)
+                    vueltas_neutral = duracion[tipo, 0] + (u[:, 1] * (duracion[tipo, 1] - duracion[tipo, 0] + 1)).astype(np.intp)
+            if incidente.size:
+                neutral[incidente] = tipo
+                resto_neutral[incidente] = vueltas_neutral
+                n_neutral[incidente] += 1
+            neutralizadas = np.flatnonzero(neutral)
+
+    return {
+        "total_time_s": total,
+        "spins": spins,
+        "pit_errors": pit_errors,
+        "perdida_incidentes_s": perdida,
+        "final_clima": clima,
+        "neutralizaciones": n_neutral,
+        "paradas": paradas,
+        "paradas_neutralizadas": paradas_neutral,
+        "peso": np.exp(log_peso) if log_peso is not None else None,
+        "lap_times": lap_times,
+    }
+
@@ -0,0 +1,265 @@
+"""
+Registro de parámetros del modelo (data/circuitos.json y data/neumaticos.json)
+- Cada archivo se valida contra su esquema al leerlo: un dato malo falla
+  al cargar, no a mitad de una simulación
+- Los datos se compilan a registros con __slots__ (acceso por atributo en
+  los bucles por vuelta) y a columnas NumPy indexadas por id entero
+- Recarga en caliente: si cambia el archivo (mtime), la siguiente consulta
+  lo vuelve a leer sin reiniciar el servidor
+- huella(): hash del contenido vigente, para saber si un modelo o tabla
+  precalculada con estos parámetros sigue valiendo
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+DATA_DIR = "data"
+
+_REQUERIDO = object()
+
+
+class ParametrosInvalidos(ValueError):
+    """Archivo de parámetros que no cumple su esquema"""
+
+
+class Campo:
+    """Tipo, rango válido y valor por defecto (si es opcional) de un campo"""
+
+    __slots__ = ("tipo", "minimo", "maximo", "defecto")
+
+    def __init__(self, tipo, minimo=None, maximo=None, defecto=_REQUERIDO):
+        self.tipo = tipo
+        self.minimo = minimo
+        self.maximo = maximo
+        self.defecto = defecto
+
+    def validar(self, valor, donde):
+        if self.tipo is str:
+            if not isinstance(valor, str):
+                raise ParametrosInvalidos(f"{donde}: se esperaba texto, no {valor!r}")
+            return valor
+        # bool es subclase de int: no se acepta como número
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            raise ParametrosInvalidos(f"{donde}: se esperaba un número, no {valor!r}")
+        if not np.isfinite(valor):
+            raise ParametrosInvalidos(f"{donde}: valor no finito")
+        if self.tipo is int and valor != int(valor):
+            raise ParametrosInvalidos(f"{donde}: se esperaba un entero, no {valor!r}")
+        valor = self.tipo(valor)
+        if self.minimo is not None and valor < self.minimo:
+            raise ParametrosInvalidos(f"{donde}: {valor} < mínimo {self.minimo}")
+        if self.maximo is not None and valor > self.maximo:
+            raise ParametrosInvalidos(f"{donde}: {valor} > máximo {self.maximo}")
+        return valor
+
+
+ESQUEMA_CIRCUITO = {
+    "nombre": Campo(str),
+    "vueltas": Campo(int, 1, 200),
+    "longitud_km": Campo(float, 0.5, 10.0),
+    "tiempo_base_s": Campo(float, 30.0, 200.0),
+    "abrasion": Campo(float, 0.0, 5.0),
+    "pitlane_time_s": Campo(float, 5.0, 60.0, defecto=22.0),
+    "adelantamiento": Campo(float, 0.0, 1.0, defecto=0.5),  # facilidad para adelantar (parrilla.py)
+    "riesgo_sc": Campo(float, 0.0, 0.2, defecto=0.01),  # prob. por vuelta de safety car / VSC
+    # combustible (referencia física de combustible.py): carga al salir, consumo y coste en tiempo
+    "combustible_kg": Campo(float, 0.0, 150.0, defecto=110.0),
+    "consumo_kg_vuelta": Campo(float, 0.0, 5.0, defecto=1.8),
+    "tiempo_por_kg_s": Campo(float, 0.0, 0.2, defecto=0.03),
+}
+
+ESQUEMA_NEUMATICO = {
+    "nombre": Campo(str),
+    "grip_initial": Campo(float, 0.0, 2.0),
+    "degradation_per_lap": Campo(float, 0.0, 0.2),
+    "speed_factor": Campo(float, 0.5, 1.5, defecto=1.0),
+    # modelo térmico (motor_simulacion.constantes_termicas): temperaturas en °C, constante en vueltas
+    "temp_inicial_c": Campo(float, 0.0, 150.0, defecto=70.0),
+    "temp_ideal_c": Campo(float, 20.0, 150.0, defecto=85.0),
+    "ventana_c": Campo(float, 0.0, 50.0, defecto=5.0),
+    "calentamiento_c": Campo(float, 0.0, 150.0, defecto=50.0),
+    "constante_vueltas": Campo(float, 0.1, 20.0, defecto=2.0),
+    "enfriamiento_lluvia_c": Campo(float, 0.0, 100.0, defecto=25.0),
+    "penal_frio": Campo(float, 0.0, 0.1, defecto=1 / 150),
+    "penal_calor": Campo(float, 0.0, 0.1, defecto=0.01),
+    "desgaste_calor": Campo(float, 0.0, 1.0, defecto=0.03),
+}
+
+
+class _Registro:
+    """Fila compilada: id entero, clave del JSON y un atributo por campo"""
+
+    __slots__ = ("id", "clave")
+    ESQUEMA = {}
+
+    def __init__(self, id, clave, valores):
+        self.id = id
+        self.clave = clave
+        for campo in self.ESQUEMA:
+            setattr(self, campo, valores[campo])
+
+    @classmethod
+    def desde_json(cls, id, clave, datos, archivo):
+        if not isinstance(datos, dict):
+            raise ParametrosInvalidos(f"{archivo}[{clave!r}]: se esperaba un objeto")
+        desconocidos = set(datos) - set(cls.ESQUEMA)
+        if desconocidos:
+            raise ParametrosInvalidos(f"{archivo}[{clave!r}]: campos desconocidos {sorted(desconocidos)}")
+        valores = {}
+        for nombre, campo in cls.ESQUEMA.items():
+            if nombre in datos:
+                valores[nombre] = campo.validar(datos[nombre], f"{archivo}[{clave!r}].{nombre}")
+            elif campo.defecto is _REQUERIDO:
+                raise ParametrosInvalidos(f"{archivo}[{clave!r}]: falta '{nombre}'")
+            else:
+                valores[nombre] = campo.defecto
+        return cls(id, clave, valores)
+
+    def como_dict(self):
+        return {campo: getattr(self, campo) for campo in self.ESQUEMA}
+
+    def reemplazar(self, **cambios):
+        """Copia validada con algunos campos cambiados (p. ej. para calibrar)"""
+        datos = self.como_dict()
+        datos.update(cambios)
+        return self.desde_json(self.id, self.clave, datos, "reemplazar")
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.clave!r}, {self.como_dict()})"
+
+
+class Circuito(_Registro):
+    __slots__ = tuple(ESQUEMA_CIRCUITO)
+    ESQUEMA = ESQUEMA_CIRCUITO
+
+
+class Neumatico(_Registro):
+    __slots__ = tuple(ESQUEMA_NEUMATICO)
+    ESQUEMA = ESQUEMA_NEUMATICO
+
+
+class TablaParametros:
+    """
+    Registros de un archivo, en el orden del JSON (id = posición).
+    Se indexa por clave (tabla['Monza']) o por id (tabla.por_id[3]);
+    columna(campo) da el array NumPy de ese campo por id.
+    """
+
+    def __init__(self, registros):
+        self.por_id = tuple(registros)
+        self.ids = {r.clave: r.id for r in self.por_id}
+        self._columnas = {}
+        self._huella = None
+
+    def __getitem__(self, clave):
+        return self.por_id[self.ids[clave]]
+
+    def __contains__(self, clave):
+        return clave in self.ids
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.por_id)
+
+    def keys(self):
+        return self.ids.keys()
+
+    def items(self):
+        return ((r.clave, r) for r in self.por_id)
+
+    def columna(self, campo):
+        arr = self._columnas.get(campo)
+        if arr is None:
+            arr = np.array([getattr(r, campo) for r in self.por_id])
+            arr.setflags(write=False)
+            self._columnas[campo] = arr
+        return arr
+
+    def huella(self):
+        """Hash del contenido (valores validados, con defectos): cambia si cambia cualquier dato"""
+        if self._huella is None:
+            contenido = json.dumps([[r.clave, r.como_dict()] for r in self.por_id], sort_keys=True)
+            self._huella = hashlib.sha1(contenido.encode()).hexdigest()
+        return self._huella
+
+    def con_cambios(self, clave, **cambios):
+        """Tabla nueva con un registro modificado (el archivo no se toca)"""
+        registros = list(self.por_id)
+        registros[self.ids[clave]] = self[clave].reemplazar(**cambios)
+        return TablaParametros(registros)
+
+
+class RegistroParametros:
+    """Un archivo JSON compilado a TablaParametros, recargado si cambia en disco"""
+
+    def __init__(self, filename, clase, directorio=None):
+        self.filename = filename
+        self.clase = clase
+        self.directorio = directorio
+        self._tabla = None
+        self._firma = None
+        self._lock = threading.Lock()
+
+    @property
+    def ruta(self):
+        return os.path.join(self.directorio or DATA_DIR, self.filename)
+
+    def _firma_archivo(self):
+        st = os.stat(self.ruta)
+        return (st.st_mtime_ns, st.st_size)
+
+    def compilar(self, datos):
+        if not isinstance(datos, dict) or not datos:
+            raise ParametrosInvalidos(f"{self.filename}: se esperaba un objeto con al menos una entrada")
+        return TablaParametros(self.clase.desde_json(i, clave, datos[clave], self.filename)
+                               for i, clave in enumerate(datos))
+
+    def recargar(self):
+        with self._lock:
+            firma = self._firma_archivo()
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                try:
+                    datos = json.load(f)
+                except json.JSONDecodeError as e:
+                    raise ParametrosInvalidos(f"{self.filename}: JSON inválido ({e})") from e
+            self._tabla = self.compilar(datos)
+            self._firma = firma
+            return self._tabla
+
+    def tabla(self):
+        """Tabla vigente; una consulta cuesta un stat() del archivo"""
+        if self._tabla is None or self._firma_archivo() != self._firma:
+            return self.recargar()
+        return self._tabla
+
+
+CIRCUITOS = RegistroParametros("circuitos.json", Circuito)
+NEUMATICOS = RegistroParametros("neumaticos.json", Neumatico)
+
+
+def circuitos():
+    return CIRCUITOS.tabla()
+
+
+def neumaticos():
+    return NEUMATICOS.tabla()
+
+
+def huella(tabla_circuitos=None, tabla_neumaticos=None):
+    """Huella corta de circuitos + neumáticos (por defecto, los vigentes)"""
+    partes = (tabla_circuitos or circuitos()).huella() + (tabla_neumaticos or neumaticos()).huella()
+    return hashlib.sha1(partes.encode()).hexdigest()[:16]
+
+
+if __name__ == "__main__":
+    # Validación de los archivos: python parametros.py
+    for registro in (CIRCUITOS, NEUMATICOS):
+        tabla = registro.recargar()
+        print(f"{registro.filename}: {len(tabla)} entradas válidas ({', '.join(tabla)})")
+    print(f"Huella de los parámetros: {huella()}")
@@ -0,0 +1,304 @@
+"""
+Simulación de parrilla completa (20 coches) con posiciones, huecos y adelantamientos
+- Mismo modelo por vuelta que motor_simulacion (grip, temperatura, combustible,
+  clima, trompos, paradas), pero cada coche con su setup, estrategia y ritmo
+- Vectorizado sobre carreras x coches: el estado es un array (n, coches) y
+  el bucle recorre las vueltas; cada vuelta ordena los tiempos acumulados
+  (argsort por fila) para saber quién va delante y a qué distancia
+- Aire sucio: a menos de AIRE_SUCIO_S del coche de delante se pierde ritmo
+- Adelantamiento: quien alcanza al de delante lo pasa con una probabilidad
+  que crece con la diferencia de ritmo y con la facilidad del circuito
+  (campo 'adelantamiento' de circuitos.json); si no, queda detrás
+- Safety car / VSC: sin adelantamientos y paradas más baratas; con SC el
+  pelotón se agrupa (se pierden los huecos ganados)
+"""
+
+import numpy as np
+
+import parametros
+from motor_simulacion import (
+    MOTOR_OPTIONS, AERO_OPTIONS, CLIMA_RAIN, CLIMA_GRIP, CLIMA_LLUVIAS, CLIMA_KEYS,
+    K_GRIP, K_WEAR, RANDOM_NOISE_STD, PIT_ERROR_CHANCE, PIT_ERROR_DELAY_S, SPIN_CHANCE_BASE, SPIN_DELAY_S,
+    CAMBIO_CLIMA, FIN_LLUVIA, INICIO_LLUVIA,
+    SIN_NEUTRALIZAR, VSC, SC, DURACION_NEUTRAL, SC_FRACCION, SC_POR_TROMPO, RIESGO_SC_LLUVIA,
+    RITMO_NEUTRAL, PERDIDA_BOXES_NEUTRAL, VENTANA_PARADA_NEUTRAL, MIN_VUELTAS_STINT,
+    base_lap_time, coste_combustible, reparto_stints, tyre_suitability_penalty,
+    carga_termica, constantes_termicas, paso_termico, efecto_termico
+)
+
+# -----------------------------
+# Parámetros del modelo de tráfico
+# -----------------------------
+N_COCHES = 20
+HUECO_PARRILLA_S = 0.25    # separación entre posiciones de salida
+AIRE_SUCIO_S = 1.0         # hueco por debajo del cual se sufre aire sucio
+PERDIDA_AIRE_SUCIO_S = 0.4  # pérdida por vuelta pegado al de delante (lineal hasta AIRE_SUCIO_S)
+HUECO_MINIMO_S = 0.2       # hueco con el que queda un coche que no consigue pasar
+ESCALA_ADELANTAMIENTO_S = 0.5  # diferencia de ritmo con la que la probabilidad llega a ~63% del máximo
+PUNTOS = (25, 18, 15, 12, 10, 8, 6, 4, 2, 1)
+
+
+def coche(nombre, tyre_sequence, motor="Equilibrado", alerones="Medio", ritmo_s=0.0):
+    """Definición de un coche: estrategia, setup y ritmo propio (s/vuelta, + = más lento)"""
+    return {"nombre": nombre, "tyre_sequence": list(tyre_sequence), "motor": motor,
+            "alerones": alerones, "ritmo_s": float(ritmo_s)}
+
+
+def parrilla_por_defecto(tyre_sequence, posicion_salida=10, clima="Seco", n_coches=N_COCHES,
+                         motor="Equilibrado", alerones="Medio", semilla=0):
+    """
+    Parrilla de rivales alrededor del coche del usuario ("Tú", ritmo 0).
+    Los rivales llevan el mismo setup (en el modelo, el setup cambia el
+    ritmo varios segundos por vuelta y taparía todo lo demás), van de 0.8 s
+    más rápidos a 1.2 s más lentos por vuelta y eligen estrategias de 1-2
+    paradas (reproducibles con la semilla). El orden de la lista es el orden de salida.
+    """
+    rng = np.random.default_rng(semilla)
+    if CLIMA_RAIN[CLIMA_KEYS.index(clima)]:
+        estrategias = [["Intermedio", "Intermedio"], ["Lluvia", "Intermedio"], ["Intermedio", "Lluvia"]]
+    else:
+        estrategias = [["C3", "C2"], ["C2", "C1"], ["C3", "C1"], ["C3", "C2", "C3"], ["C2", "C3"], ["C3", "C3", "C2"]]
+    ritmos = np.linspace(-0.8, 1.2, n_coches - 1)
+    rivales = [coche(f"Rival {i + 1}", estrategias[rng.integers(len(estrategias))], motor, alerones, ritmo)
+               for i, ritmo in enumerate(ritmos)]
+    posicion = min(max(1, int(posicion_salida)), n_coches)
+    return rivales[:posicion - 1] + [coche("Tú", tyre_sequence, motor, alerones)] + rivales[posicion - 1:]
+
+
+def _plan_estrategias(coches, vueltas, tyres):
+    """
+    Por coche y stint (rellenado hasta el coche con más stints): id del
+    neumático y vuelta en que acaba el stint según el plan; y nº de stints
+    """
+    m = len(coches)
+    n_stints = np.array([len(c["tyre_sequence"]) for c in coches])
+    tyre_id = np.zeros((m, n_stints.max()), dtype=np.intp)
+    fin_plan = np.full((m, n_stints.max()), vueltas)
+    for c, datos in enumerate(coches):
+        secuencia = datos["tyre_sequence"]
+        tyre_id[c, :len(secuencia)] = [tyres.ids[k] for k in secuencia]
+        fin_plan[c, :len(secuencia)] = np.cumsum(reparto_stints(vueltas, len(secuencia)))
+    return tyre_id, fin_plan, n_stints
+
+
+def simular_parrilla(track, coches, initial_clima_key, n=1, weather_dynamic=True, rng=None,
+                     tyres=None, guardar_posiciones=False, neutralizaciones=True):
+    """
+    Simula n carreras de toda la parrilla (coches en orden de salida).
+    Safety car / VSC (neutralizaciones=True) como en motor_simulacion, para
+    toda la carrera a la vez: sin adelantamientos, ritmo lento, paradas
+    más baratas (cada coche adelanta la suya si le tocaba pronto) y, con
+    SC, el pelotón se agrupa detrás del líder.
+    Retorna dict con arrays (n, coches): total_time_s, posicion_final (1 = gana),
+    hueco_lider_s, adelantamientos (coches pasados en pista, sin contar boxes), spins;
+    final_clima (n,), neutralizaciones (n,)
+    y, si guardar_posiciones, posiciones (n, vueltas, coches) en int8.
+    """
+    if tyres is None:
+        tyres = parametros.neumaticos()
+    rng = np.random.default_rng(rng)
+    vueltas, m = track.vueltas, len(coches)
+    filas = np.arange(n)[:, None]
+    columnas = np.arange(m)
+    tyre_id, fin_plan, n_stints = _plan_estrategias(coches, vueltas, tyres)
+
+    # constantes por coche
+    motor = np.array([MOTOR_OPTIONS[c["motor"]]["potencia"] for c in coches])
+    aero = np.array([AERO_OPTIONS[c["alerones"]]["aero"] for c in coches])
+    desgaste = np.array([MOTOR_OPTIONS[c["motor"]]["tyre_wear_factor"] for c in coches]) * track.abrasion
+    tiempo_base = base_lap_time(track, motor, aero)
+    combustible = coste_combustible(track)
+    ritmo = np.array([c["ritmo_s"] for c in coches])
+
+    # constantes por neumático (índice = id del registro)
+    grip_col = tyres.columna("grip_initial")
+    degr_col = tyres.columna("degradation_per_lap")
+    speed_col = tyres.columna("speed_factor")
+    penal = {lluvia: np.array([tyre_suitability_penalty(t.clave, lluvia) for t in tyres.por_id])
+             for lluvia in (False, True)}
+    # modelo térmico, (coches, neumáticos): el equilibrio depende del setup de cada coche
+    termica_col = {k: np.broadcast_to(v, (m, len(tyres.por_id))) for k, v in
+                   constantes_termicas(tyres.por_id, carga_termica(track, motor, aero)).items()}
+
+    clima = np.full(n, CLIMA_KEYS.index(initial_clima_key))
+    t = np.broadcast_to(np.arange(m) * HUECO_PARRILLA_S, (n, m)).copy()
+    stint = np.zeros((n, m), dtype=np.intp)
+    en_stint = np.zeros((n, m))  # vueltas hechas en el stint actual
+    nuevo_stint = np.ones((n, m), dtype=bool)
+    grip_inicial = np.zeros((n, m))
+    termica = {k: np.zeros((n, m)) for k in termica_col}
+    temp = np.zeros((n, m))
+    desgaste_acum = np.zeros((n, m))  # pérdida de grip acumulada en el stint actual
+    neutral = np.zeros(n, dtype=np.intp)
+    resto_neutral = np.zeros(n, dtype=np.int32)
+    n_neutral = np.zeros(n, dtype=np.int32)
+    duracion = np.array([(0, 0), DURACION_NEUTRAL[VSC], DURACION_NEUTRAL[SC]])
+    adelantamientos = np.zeros((n, m), dtype=np.int32)
+    spins = np.zeros((n, m), dtype=np.int32)
+    posiciones = np.empty((n, vueltas, m), dtype=np.int8) if guardar_posiciones else None
+    facilidad = track.adelantamiento
+
+    for v in range(1, vueltas + 1):
+        tid = tyre_id[columnas, stint]
+        if nuevo_stint.any():
+            # como en el escalar: el grip inicial toma el clima del inicio del stint
+            grip_inicial = np.where(nuevo_stint, grip_col[tid] * CLIMA_GRIP[clima][:, None], grip_inicial)
+            # constantes térmicas: solo se escriben las de los coches que estrenan neumáticos
+            filas_n, coches_n = np.nonzero(nuevo_stint)
+            tid_n = tid[filas_n, coches_n]
+            for k, col in termica_col.items():
+                termica[k][filas_n, coches_n] = col[coches_n, tid_n]
+            temp[filas_n, coches_n] = termica["inicial"][filas_n, coches_n]
+            desgaste_acum[filas_n, coches_n] = 0.0
+
+        if weather_dynamic:
+            cambia = rng.random(n) < CAMBIO_CLIMA
+            u = rng.random(n)
+            lluvia_nueva = CLIMA_LLUVIAS[rng.integers(len(CLIMA_LLUVIAS), size=n)]
+            llueve = CLIMA_RAIN[clima]
+            clima = np.where(cambia & llueve & (u < FIN_LLUVIA), 0, clima)
+            clima = np.where(cambia & ~llueve & (u < INICIO_LLUVIA), lluvia_nueva, clima)
+        rain = CLIMA_RAIN[clima][:, None]
+        neutralizada = neutral > 0
+
+        # ritmo libre de cada coche (sin tráfico), como en simular_lote
+        temp = paso_termico(temp, termica["equilibrio"], termica["enfriamiento"], rain, termica["alfa"])
+        penal_temp, exceso = efecto_termico(temp, termica["minimo"], termica["maximo"],
+                                            termica["frio"], termica["calor"])
+        grip = np.maximum(0.25, grip_inicial - desgaste_acum - penal_temp)
+        desgaste_acum += degr_col[tid] * desgaste * (1.0 + termica["desgaste"] * exceso)
+        mult = np.where(rain, penal[True][tid, 0], penal[False][tid, 0])
+        riesgo = np.where(rain, penal[True][tid, 1], penal[False][tid, 1])
+        vuelta = (tiempo_base / speed_col[tid] * (1 - K_GRIP * grip) + K_WEAR * (1 - grip)) * mult + ritmo
+        vuelta += rng.normal(combustible[v - 1], RANDOM_NOISE_STD, (n, m))
+        np.maximum(vuelta, 0.1, out=vuelta)
+        spin = rng.random((n, m)) < SPIN_CHANCE_BASE + riesgo + np.maximum(0.0, 0.5 - grip) * 0.05
+        if neutralizada.any():
+            # neutralizado: ritmo mínimo fijo y sin trompos
+            vuelta = np.maximum(vuelta, tiempo_base * RITMO_NEUTRAL[neutral][:, None])
+            spin &= ~neutralizada[:, None]
+        vuelta += spin * rng.uniform(*SPIN_DELAY_S, (n, m))
+        spins += spin
+        en_stint += 1
+
+        # paradas: la prevista, o antes si hay neutralización y ya tocaba pronto
+        quedan_stints = stint < n_stints - 1
+        faltan = fin_plan[columnas, stint] - v
+        en_boxes = quedan_stints & ((faltan == 0) | (neutralizada[:, None] & (faltan <= VENTANA_PARADA_NEUTRAL)
+                                                      & (en_stint >= MIN_VUELTAS_STINT)))
+        if en_boxes.any():
+            error = rng.random((n, m)) < PIT_ERROR_CHANCE
+            vuelta += en_boxes * (track.pitlane_time_s * PERDIDA_BOXES_NEUTRAL[neutral][:, None]
+                                  + error * rng.uniform(*PIT_ERROR_DELAY_S, (n, m)))
+            stint += en_boxes
+            en_stint[en_boxes] = 0
+        nuevo_stint = en_boxes
+
+        # tráfico: coches en orden de pista al empezar la vuelta
+        orden = np.argsort(t, axis=1)
+        t_ord = t[filas, orden]
+        vuelta_ord = vuelta[filas, orden]
+        boxes_ord = en_boxes[filas, orden]
+        hueco = np.diff(t_ord, axis=1)
+        vuelta_ord[:, 1:] += np.clip(1.0 - hueco / AIRE_SUCIO_S, 0.0, 1.0) * PERDIDA_AIRE_SUCIO_S \
+            * ~boxes_ord[:, 1:] * ~neutralizada[:, None]
+        libre = t_ord + vuelta_ord
+
+        # el primero no tiene a nadie delante; los demás se resuelven de delante hacia atrás
+        # 'barrera' = paso por meta del último coche ya resuelto (los que entran a boxes no bloquean)
+        # neutralizado no se adelanta; con SC además se cierra el hueco hasta el coche de delante
+        facilidad_v = np.where(neutralizada, 0.0, facilidad)
+        agrupa = neutral == SC
+        nuevo = libre.copy()
+        ganadas = np.zeros((n, m), dtype=np.int32)
+        barrera = np.where(boxes_ord[:, 0], -np.inf, libre[:, 0])
+        for p in range(1, m):
+            f = libre[:, p]
+            alcanza = (f < barrera + HUECO_MINIMO_S) & ~boxes_ord[:, p]
+            ventaja = barrera + HUECO_MINIMO_S - f
+            prob = probabilidad_adelantamiento(np.where(alcanza, ventaja, 0.0), facilidad_v)
+            pasa = alcanza & (rng.random(n) < prob)
+            detras = (alcanza & ~pasa) | (agrupa & ~boxes_ord[:, p] & np.isfinite(barrera))
+            nuevo[:, p] = np.where(detras, barrera + HUECO_MINIMO_S, f)
+            # una misma vuelta puede pasar a varios coches: cuenta todos los que quedan detrás
+            # (sin los que estaban en boxes, que no son adelantamientos)
+            idx = np.flatnonzero(pasa & (f < barrera))
+            if idx.size:
+                ganadas[idx, p] = ((nuevo[idx, :p] > f[idx, None]) & ~boxes_ord[idx, :p]).sum(axis=1)
+            barrera = np.where(boxes_ord[:, p], barrera, np.maximum(barrera, nuevo[:, p]))
+
+        t[filas, orden] = nuevo
+        adelantamientos[filas, orden] += ganadas
+        if guardar_posiciones:
+            posiciones[:, v - 1, :] = _posiciones(t, filas)
+
+        # neutralización de la vuelta siguiente (una para toda la carrera)
+        if neutralizaciones:
+            resto_neutral -= neutralizada
+            neutral[neutralizada & (resto_neutral == 0)] = SIN_NEUTRALIZAR
+            riesgo_sc = track.riesgo_sc * np.where(rain[:, 0], RIESGO_SC_LLUVIA, 1.0) + spin.sum(axis=1) * SC_POR_TROMPO
+            incidente = np.flatnonzero((rng.random(n) < riesgo_sc) & ~neutralizada)
+            if incidente.size:
+                tipo = np.where(rng.random(incidente.size) < SC_FRACCION, SC, VSC)
+                neutral[incidente] = tipo
+                resto_neutral[incidente] = rng.integers(duracion[tipo, 0], duracion[tipo, 1] + 1)
+                n_neutral[incidente] += 1
+
+    return {
+        "total_time_s": t,
+        "posicion_final": _posiciones(t, filas) + 1,
+        "hueco_lider_s": t - t.min(axis=1, keepdims=True),
+        "adelantamientos": adelantamientos,
+        "spins": spins,
+        "final_clima": clima,
+        "neutralizaciones": n_neutral,
+        "posiciones": posiciones,
+    }
+
+
+def probabilidad_adelantamiento(ventaja, facilidad):
+    """Probabilidad de pasar al de delante con 'ventaja' s de ritmo sobre él (0 si no lo alcanza)"""
+    return facilidad * (1.0 - np.exp(-ventaja / ESCALA_ADELANTAMIENTO_S))
+
+
+def _posiciones(t, filas):
+    """Posición (0 = primero) de cada coche según su tiempo acumulado"""
+    pos = np.empty(t.shape, dtype=np.int8)
+    pos[filas, np.argsort(t, axis=1)] = np.arange(t.shape[1])
+    return pos
+
+
+def resumen_parrilla(coches, resultado):
+    """Una fila por coche: posición media, % victorias/podios, puntos medios y adelantamientos"""
+    pos = resultado["posicion_final"]
+    puntos = np.zeros(len(coches) + 1)
+    puntos[1:len(PUNTOS) + 1] = PUNTOS[:len(coches)]
+    filas = []
+    for c, datos in enumerate(coches):
+        p = pos[:, c]
+        filas.append({
+            "coche": datos["nombre"],
+            "salida": c + 1,
+            "estrategia": "-".join(datos["tyre_sequence"]),
+            "setup": f"{datos['motor']}/{datos['alerones']}",
+            "posicion_media": float(p.mean()),
+            "victoria_pct": float((p == 1).mean() * 100),
+            "podio_pct": float((p <= 3).mean() * 100),
+            "puntos_medios": float(puntos[p].mean()),
+            "adelantamientos": float(resultado["adelantamientos"][:, c].mean()),
+        })
+    return sorted(filas, key=lambda f: f["posicion_media"])
+
+
+if __name__ == "__main__":
+    # Ejemplo: python parrilla.py  (Monza, parrilla por defecto, 1000 carreras)
+    import time
+
+    track = parametros.circuitos()["Monza"]
+    coches = parrilla_por_defecto(["C3", "C2"], posicion_salida=10)
+    t0 = time.perf_counter()
+    res = simular_parrilla(track, coches, "Seco", n=1000, rng=1)
+    print(f"1000 carreras x {len(coches)} coches en {time.perf_counter() - t0:.2f} s")
+    for f in resumen_parrilla(coches, res):
+        print(f"{f['coche']:<9} salida {f['salida']:>2}  {f['estrategia']:<9} pos media {f['posicion_media']:5.2f}  "
+              f"podio {f['podio_pct']:5.1f}%  adel. {f['adelantamientos']:.2f}")
@@ -0,0 +1,136 @@
+"""
+Política de paradas según el clima (programación dinámica)
+- Una estrategia fija (secuencia de neumáticos decidida antes de salir) falla
+  en cuanto cambia el clima: slicks con lluvia pagan el 1.15x de
+  tyre_suitability_penalty y el riesgo de trompo
+- Aquí la decisión depende del estado al final de cada vuelta:
+  (vuelta, compuesto montado, edad del neumático, clima) -> seguir, o parar
+  y con qué compuesto; y el compuesto de salida depende del clima inicial
+- Inducción hacia atrás sobre la cadena de Markov del clima del motor
+  (motor_simulacion.matriz_clima) con el coste por vuelta determinista
+  (tiempos_por_edad con el coste medio de los trompos + combustible + boxes)
+- Aproximación: el coste de una vuelta depende solo del clima de esa vuelta
+  (temperatura y grip del neumático como si siempre hubiera hecho ese clima)
+  y no se modelan SC/VSC; al ejecutar la política el motor sí lo tiene todo
+- La tabla la ejecuta motor_simulacion.simular_lote(..., politica=...)
+- Uso: python politica_paradas.py [circuito]
+"""
+
+import numpy as np
+
+import parametros
+from motor_simulacion import (
+    MOTOR_OPTIONS, AERO_OPTIONS, CLIMA_KEYS, PIT_ERROR_CHANCE, PIT_ERROR_DELAY_S,
+    coste_combustible, matriz_clima, simular_lote, tiempos_por_edad
+)
+
+SEGUIR = -1  # valor de la tabla de decisiones cuando no se para
+
+
+def costes_vuelta(track, car_setup, compuestos, tyres=None):
+    """(compuestos, edad 0..vueltas, clima): coste medio de una vuelta sin combustible"""
+    if tyres is None:
+        tyres = parametros.neumaticos()
+    edades = track.vueltas + 1
+    return np.stack([
+        np.stack([tiempos_por_edad(track, car_setup, k, edades, clima, tyres, con_trompos=True)
+                  for clima in CLIMA_KEYS], axis=1)
+        for k in compuestos
+    ])
+
+
+def resolver(track, car_setup, compuestos=None, tyres=None):
+    """
+    Política óptima (en media) por inducción hacia atrás. Retorna dict con
+    compuestos (claves), salida (clima inicial -> índice del compuesto),
+    decision (vuelta, compuesto, edad, clima) int8 con SEGUIR o el índice del
+    compuesto nuevo, y valor_s (clima inicial -> tiempo total esperado).
+    """
+    if tyres is None:
+        tyres = parametros.neumaticos()
+    compuestos = list(compuestos or tyres.keys())
+    vueltas = track.vueltas
+    coste = costes_vuelta(track, car_setup, compuestos, tyres)  # (K, A, W)
+    combustible = coste_combustible(track)
+    transicion_t = matriz_clima().T
+    boxes = track.pitlane_time_s + PIT_ERROR_CHANCE * np.mean(PIT_ERROR_DELAY_S)
+
+    k, edades, w = coste.shape
+    decision = np.full((vueltas + 1, k, edades, w), SEGUIR, dtype=np.int8)
+    valor = np.zeros((k, edades, w))  # tiempo esperado que falta al acabar la última vuelta
+    for vuelta in range(vueltas - 1, -1, -1):
+        # esperado de la vuelta siguiente (con el clima que venga) + lo que falte después,
+        # llegando con el neumático de edad 'a': seguir -> edad a + 1
+        siguiente = np.full((k, edades, w), np.inf)
+        siguiente[:, :-1] = (coste[:, :-1] + valor[:, 1:]) @ transicion_t + combustible[vuelta]
+        # parar: boxes + el mejor compuesto nuevo (edad 0), igual para cualquier neumático montado
+        mejor_nuevo = siguiente[:, 0].argmin(axis=0)  # (W,)
+        parar = boxes + siguiente[mejor_nuevo, 0, np.arange(w)]
+        if vuelta == 0:
+            return {
+                "compuestos": compuestos,
+                "salida": mejor_nuevo,
+                "decision": decision,
+                "valor_s": siguiente[mejor_nuevo, 0, np.arange(w)],
+            }
+        para = parar < siguiente
+        decision[vuelta] = np.where(para, mejor_nuevo.astype(np.int8), SEGUIR)
+        valor = np.where(para, parar, siguiente)
+
+
+def evaluar(track, car_setup, politica, clima_key, n=2000, rng=None, tyres=None, estrategias=()):
+    """
+    Monte Carlo con el motor completo (clima dinámico, SC/VSC, trompos) de la
+    política y, para comparar, de estrategias fijas. Misma semilla para todas.
+    Retorna lista de filas {estrategia, media_s, p10_s, p90_s, paradas_medias}
+    """
+    semilla = np.random.default_rng(rng).integers(2**32)
+    filas = []
+    for nombre, secuencia in [("Política", None)] + [("-".join(e), e) for e in estrategias]:
+        res = simular_lote(track, car_setup, secuencia, track.pitlane_time_s, clima_key, n, rng=semilla,
+                           tyres=tyres, politica=politica if secuencia is None else None)
+        t = res["total_time_s"]
+        filas.append({"estrategia": nombre, "media_s": float(t.mean()), "p10_s": float(np.percentile(t, 10)),
+                      "p90_s": float(np.percentile(t, 90)), "paradas_medias": float(res["paradas"].mean())})
+    return filas
+
+
+def ventanas(politica, compuesto, clima_key):
+    """
+    Para un compuesto montado y un clima: por vuelta, edad mínima a la que la
+    política para (None si no para) y con qué compuesto. Lista de
+    (vuelta, edad, compuesto nuevo) para mostrar la política en texto.
+    """
+    k = politica["compuestos"].index(compuesto)
+    tabla = politica["decision"][:, k, :, CLIMA_KEYS.index(clima_key)]
+    filas = []
+    for vuelta in range(1, tabla.shape[0]):
+        paradas = np.flatnonzero(tabla[vuelta, :vuelta + 1] != SEGUIR)
+        if paradas.size:
+            edad = int(paradas[0])
+            filas.append((vuelta, edad, politica["compuestos"][tabla[vuelta, edad]]))
+        else:
+            filas.append((vuelta, None, None))
+    return filas
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    circuitos = parametros.circuitos()
+    track = circuitos[sys.argv[1] if len(sys.argv) > 1 else "Silverstone"]
+    setup = {"motor": MOTOR_OPTIONS["Equilibrado"], "aero": AERO_OPTIONS["Medio"]}
+    t0 = time.perf_counter()
+    pol = resolver(track, setup)
+    print(f"Política resuelta en {(time.perf_counter() - t0) * 1000:.0f} ms "
+          f"({pol['decision'].size} estados de {track.vueltas} vueltas)")
+    for w, clima in enumerate(CLIMA_KEYS):
+        print(f"  sale con {clima:<14}: {pol['compuestos'][pol['salida'][w]]:<10} "
+              f"esperado {pol['valor_s'][w] / 60.0:.2f} min")
+    for clima in ("Seco", "Lluvia ligera"):
+        print(f"\nEvaluación con el motor completo, clima inicial {clima} (5000 carreras):")
+        for f in evaluar(track, setup, pol, clima, n=5000, rng=0,
+                         estrategias=(["C3", "C2"], ["C2", "C1"], ["Intermedio", "Intermedio"])):
+            print(f"  {f['estrategia']:<22} media {f['media_s'] / 60.0:6.2f} min  P90 {f['p90_s'] / 60.0:6.2f} min  "
+                  f"paradas {f['paradas_medias']:.2f}")
@@ -0,0 +1,88 @@
+"""
+Riesgo de cola por incidentes con muestreo por importancia
+- Los trompos (SPIN_CHANCE_BASE y el riesgo extra de los slicks con lluvia)
+  y los errores en boxes (PIT_ERROR_CHANCE) son raros pero deciden el peor
+  caso: con Monte Carlo normal casi ninguna carrera llega a la cola
+- simular_lote(..., sesgo_incidentes=s) sortea esos incidentes con la
+  probabilidad multiplicada por s y da a cada carrera su peso (razón de
+  verosimilitudes): muchas más carreras caen en la cola y el peso corrige
+  cuánto cuenta cada una
+- Probabilidades (perder más de X s por incidentes) insesgadas, con su
+  error estándar; percentiles altos (P99, P99.9) con la distribución
+  ponderada (autonormalizada: consistente, no exactamente insesgada)
+- Uso: python riesgo_cola.py [circuito]  (compara con Monte Carlo normal)
+"""
+
+import numpy as np
+
+import parametros
+from motor_simulacion import MOTOR_OPTIONS, AERO_OPTIONS, simular_lote
+
+SESGO_POR_DEFECTO = 3.0         # buen compromiso para colas de 0.1%-1% (más sesgo: pesos muy dispersos)
+UMBRALES_S = (30, 60, 90, 150)  # tiempo perdido en incidentes
+CUANTILES = (0.99, 0.999)
+CARRERAS = 5000
+
+
+def cuantil_ponderado(valores, pesos, q):
+    """Cuantil q de la distribución ponderada (pesos normalizados a 1)"""
+    orden = np.argsort(valores)
+    acumulado = np.cumsum(pesos[orden])
+    return float(valores[orden][np.searchsorted(acumulado, q * acumulado[-1])])
+
+
+def metricas_cola(resultado, umbrales_s=UMBRALES_S, cuantiles=CUANTILES):
+    """
+    Métricas de cola de un resultado de simular_lote (con o sin
+    sesgo_incidentes). Retorna dict con carreras, muestras_efectivas,
+    prob_perdida [(umbral, probabilidad, error estándar)], cuantiles_total_s
+    y cuantiles_perdida_s [(q, valor)].
+    """
+    total, perdida = resultado["total_time_s"], resultado["perdida_incidentes_s"]
+    pesos = resultado["peso"] if resultado["peso"] is not None else np.ones(len(total))
+    n = len(total)
+    prob = []
+    for umbral in umbrales_s:
+        x = pesos * (perdida > umbral)
+        prob.append((umbral, float(x.mean()), float(x.std() / np.sqrt(n))))
+    return {
+        "carreras": n,
+        "muestras_efectivas": float(pesos.sum() ** 2 / (pesos ** 2).sum()),
+        "prob_perdida": prob,
+        "cuantiles_total_s": [(q, cuantil_ponderado(total, pesos, q)) for q in cuantiles],
+        "cuantiles_perdida_s": [(q, cuantil_ponderado(perdida, pesos, q)) for q in cuantiles],
+    }
+
+
+def estimar_cola(track, car_setup, tyre_sequence, clima_key, n=CARRERAS, sesgo=SESGO_POR_DEFECTO, rng=None,
+                 tyres=None, umbrales_s=UMBRALES_S, cuantiles=CUANTILES):
+    """Motor completo con incidentes sesgados (sesgo=None: Monte Carlo normal) y sus métricas de cola"""
+    res = simular_lote(track, car_setup, tyre_sequence, track.pitlane_time_s, clima_key, n, rng=rng,
+                       tyres=tyres, sesgo_incidentes=sesgo)
+    return metricas_cola(res, umbrales_s, cuantiles)
+
+
+if __name__ == "__main__":
+    # Error relativo de P(perder > X s) con y sin sesgo, repitiendo la estimación con semillas distintas
+    import sys
+    import time
+
+    track = parametros.circuitos()[sys.argv[1] if len(sys.argv) > 1 else "Silverstone"]
+    setup = {"motor": MOTOR_OPTIONS["Equilibrado"], "aero": AERO_OPTIONS["Medio"]}
+    estrategia, repeticiones, n = ["C3", "C2"], 100, 2000
+    for clima in ("Seco", "Lluvia ligera"):
+        ref = estimar_cola(track, setup, estrategia, clima, n=200_000, sesgo=None, rng=12345)
+        print(f"\n{track.nombre}, {'-'.join(estrategia)}, {clima}: referencia con 200000 carreras normales")
+        print("  " + "  ".join(f"P(>{u} s) {p:.4f}" for u, p, _ in ref["prob_perdida"]))
+        errores = {}
+        for sesgo in (None, SESGO_POR_DEFECTO):
+            t0 = time.perf_counter()
+            est = np.array([[p for _, p, _ in estimar_cola(track, setup, estrategia, clima, n, sesgo, rng=i)["prob_perdida"]]
+                            for i in range(repeticiones)])
+            s = (time.perf_counter() - t0) / repeticiones
+            errores[sesgo] = est.std(axis=0) / np.array([p for _, p, _ in ref["prob_perdida"]])
+            print(f"  {'normal' if sesgo is None else f'sesgo {sesgo:g}':<10} {n} carreras ({s * 1000:.0f} ms): error relativo "
+                  + "  ".join(f"{e * 100:5.1f}%" for e in errores[sesgo]))
+        # carreras normales necesarias para el mismo error: la varianza baja con 1/n
+        equivalentes = n * (errores[None] / errores[SESGO_POR_DEFECTO]) ** 2
+        print(f"  con sesgo, {n} carreras equivalen a " + "  ".join(f"{e:7.0f}" for e in equivalentes) + " normales")
@@ -0,0 +1,369 @@
+"""
+Servicio local HTTP/JSON del modelo de estrategia (sin Streamlit)
+- Escucha solo en 127.0.0.1; biblioteca estándar (http.server), sin dependencias
+- Las peticiones concurrentes con la misma configuración (circuito, setup,
+  clima, estrategia) se agrupan (ventana corta, y mientras el lote anterior
+  de esa configuración sigue en curso) y se resuelven en UNA llamada
+  vectorizada a motor_simulacion.simular_lote
+- Los lotes se ejecutan en un pool de procesos (uno por núcleo)
+- Métricas de latencia y rendimiento en GET /metricas
+- Uso: python servicio.py [--puerto 8765] [--procesos N]
+
+Rutas:
+  GET  /salud      -> {"ok": true}
+  GET  /opciones   -> circuitos, neumáticos, motor, alerones y clima válidos
+  GET  /metricas   -> peticiones, lotes, latencias (p50/p95/p99) y carreras/s
+  POST /simular    -> {"circuito", "estrategia": [...], "motor", "alerones",
+                       "clima", "carreras", "clima_dinamico", "semilla"}
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+HOST = "127.0.0.1"
+PUERTO_POR_DEFECTO = 8765
+VENTANA_S = 0.005            # espera para agrupar peticiones iguales
+MAX_CARRERAS_LOTE = 200_000  # tamaño máximo de un lote agrupado
+MAX_CARRERAS_PETICION = 100_000
+CARRERAS_POR_DEFECTO = 1000
+LATENCIAS_GUARDADAS = 2048
+
+
+class PeticionInvalida(ValueError):
+    """Petición con campos que no existen o fuera de rango (HTTP 400)"""
+
+
+# -----------------------------
+# Simulación (se ejecuta en los procesos del pool)
+# -----------------------------
+def simular_configuracion(config, n, semilla=None):
+    """Tiempos totales de n carreras con una configuración (un solo lote vectorizado)"""
+    import motor_simulacion as motor
+    import parametros
+
+    track = parametros.circuitos()[config["circuito"]]
+    car_setup = {"motor": motor.MOTOR_OPTIONS[config["motor"]], "aero": motor.AERO_OPTIONS[config["alerones"]]}
+    res = motor.simular_lote(track, car_setup, list(config["estrategia"]), track.pitlane_time_s,
+                             config["clima"], n, weather_dynamic=config["clima_dinamico"], rng=semilla)
+    return res["total_time_s"]
+
+
+def _texto(pedido, campo, defecto=None):
+    valor = pedido.get(campo, defecto)
+    if not isinstance(valor, str):
+        raise PeticionInvalida(f"'{campo}' debe ser un texto")
+    return valor
+
+
+def _entero(pedido, campo, defecto, minimo, maximo=None):
+    valor = pedido.get(campo, defecto)
+    # bool es subclase de int en Python, pero true/false no es un número de carreras ni una semilla
+    if isinstance(valor, bool) or not isinstance(valor, int):
+        raise PeticionInvalida(f"'{campo}' debe ser un entero")
+    if valor < minimo:
+        raise PeticionInvalida(f"'{campo}' no puede ser menor que {minimo}")
+    if maximo is not None and valor > maximo:
+        raise PeticionInvalida(f"'{campo}' no puede ser mayor que {maximo}")
+    return valor
+
+
+def validar(pedido):
+    """
+    Configuración normalizada (clave de agrupación), nº de carreras y semilla.
+    Comprueba tipos y rangos de todos los campos antes de simular: cualquier
+    error de la petición es PeticionInvalida (400), nunca un fallo del pool (500).
+    """
+    import motor_simulacion as motor
+    import parametros
+
+    if not isinstance(pedido, dict):
+        raise PeticionInvalida("se esperaba un objeto JSON")
+    estrategia = pedido.get("estrategia")
+    if not estrategia:
+        raise PeticionInvalida("falta 'estrategia' (lista de neumáticos, uno por stint)")
+    if not isinstance(estrategia, list) or not all(isinstance(t, str) for t in estrategia):
+        raise PeticionInvalida("'estrategia' debe ser una lista de neumáticos (textos)")
+    clima_dinamico = pedido.get("clima_dinamico", True)
+    if not isinstance(clima_dinamico, bool):
+        raise PeticionInvalida("'clima_dinamico' debe ser true o false")
+    config = {
+        "circuito": _texto(pedido, "circuito"),
+        "motor": _texto(pedido, "motor", "Equilibrado"),
+        "alerones": _texto(pedido, "alerones", "Medio"),
+        "clima": _texto(pedido, "clima", "Seco"),
+        "estrategia": tuple(estrategia),
+        "clima_dinamico": clima_dinamico,
+    }
+    for campo, opciones in (("circuito", parametros.circuitos()), ("motor", motor.MOTOR_OPTIONS),
+                            ("alerones", motor.AERO_OPTIONS), ("clima", motor.CLIMA_OPTIONS)):
+        if config[campo] not in opciones:
+            raise PeticionInvalida(f"{campo} '{config[campo]}' no existe ({', '.join(opciones)})")
+    neumaticos = parametros.neumaticos()
+    for tyre in config["estrategia"]:
+        if tyre not in neumaticos:
+            raise PeticionInvalida(f"neumático '{tyre}' no existe ({', '.join(neumaticos)})")
+    carreras = _entero(pedido, "carreras", CARRERAS_POR_DEFECTO, 1, MAX_CARRERAS_PETICION)
+    semilla = None if pedido.get("semilla") is None else _entero(pedido, "semilla", None, 0)
+    return config, carreras, semilla
+
+
+def resumen_tiempos(tiempos):
+    p10, p50, p90 = np.percentile(tiempos, [10, 50, 90])
+    return {
+        "carreras": int(len(tiempos)),
+        "media_s": float(tiempos.mean()),
+        "std_s": float(tiempos.std()),
+        "p10_s": float(p10), "p50_s": float(p50), "p90_s": float(p90),
+        "mejor_s": float(tiempos.min()), "peor_s": float(tiempos.max()),
+    }
+
+
+# -----------------------------
+# Agrupación de peticiones
+# -----------------------------
+class _Grupo:
+    def __init__(self, clave):
+        self.clave = clave
+        self.pedidos = []  # (carreras, Future)
+        self.carreras = 0
+
+
+class Agrupador:
+    """
+    La primera petición de una clave abre un grupo y lo lanza tras VENTANA_S,
+    o cuando termine el lote en curso de esa clave si lo hay (con carga, los
+    lotes crecen solos). Todas las que se sumaron mientras tanto van en el
+    mismo lote, cuyo resultado se reparte en trozos consecutivos.
+    Las peticiones con semilla van solas (su resultado debe ser repetible),
+    igual que todas si agrupar=False.
+    """
+
+    def __init__(self, pool, metricas, ventana_s=VENTANA_S, max_carreras=MAX_CARRERAS_LOTE, agrupar=True):
+        self.pool = pool
+        self.metricas = metricas
+        self.agrupar = agrupar
+        self.ventana_s = ventana_s
+        self.max_carreras = max_carreras
+        self._abiertos = {}
+        self._en_curso = {}  # clave -> Event del lote que se está simulando
+        self._lock = threading.Lock()
+
+    def simular(self, config, carreras, semilla=None):
+        if semilla is not None or not self.agrupar:
+            futuro = self.pool.submit(simular_configuracion, config, carreras, semilla)
+            self.metricas.lote(1, carreras)
+            return futuro.result()
+
+        clave = tuple(sorted(config.items()))
+        futuro = Future()
+        with self._lock:
+            grupo = self._abiertos.get(clave)
+            lider = grupo is None or grupo.carreras + carreras > self.max_carreras
+            if lider:
+                grupo = _Grupo(clave)
+                self._abiertos[clave] = grupo
+            grupo.pedidos.append((carreras, futuro))
+            grupo.carreras += carreras
+        if lider:
+            time.sleep(self.ventana_s)
+            self._lanzar(grupo, config)
+        return futuro.result()
+
+    def _lanzar(self, grupo, config):
+        while True:
+            with self._lock:
+                anterior = self._en_curso.get(grupo.clave)
+                if anterior is None:
+                    # a partir de aquí nadie más se suma: la siguiente petición abre otro grupo
+                    if self._abiertos.get(grupo.clave) is grupo:
+                        del self._abiertos[grupo.clave]
+                    terminado = self._en_curso[grupo.clave] = threading.Event()
+                    break
+            anterior.wait()
+        self.metricas.lote(len(grupo.pedidos), grupo.carreras)
+        try:
+            tiempos = self.pool.submit(simular_configuracion, config, grupo.carreras).result()
+        except Exception as e:
+            for _, futuro in grupo.pedidos:
+                futuro.set_exception(e)
+            return
+        finally:
+            with self._lock:
+                del self._en_curso[grupo.clave]
+            terminado.set()
+        ini = 0
+        for carreras, futuro in grupo.pedidos:
+            futuro.set_result(tiempos[ini:ini + carreras])
+            ini += carreras
+
+
+# -----------------------------
+# Métricas
+# -----------------------------
+class Metricas:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        self.inicio = time.time()
+        self.peticiones = 0
+        self.errores = 0
+        self.carreras = 0
+        self.lotes = 0
+        self.peticiones_en_lotes = 0
+        self.carreras_en_lotes = 0
+        self._latencias = deque(maxlen=LATENCIAS_GUARDADAS)
+
+    def peticion(self, latencia_s, carreras=0, error=False):
+        with self._lock:
+            self.peticiones += 1
+            self.errores += int(error)
+            self.carreras += carreras
+            self._latencias.append(latencia_s)
+
+    def lote(self, peticiones, carreras):
+        with self._lock:
+            self.lotes += 1
+            self.peticiones_en_lotes += peticiones
+            self.carreras_en_lotes += carreras
+
+    def informe(self):
+        with self._lock:
+            latencias = np.array(self._latencias) * 1000
+            activo_s = max(time.time() - self.inicio, 1e-9)
+            informe = {
+                "activo_s": round(activo_s, 1),
+                "peticiones": self.peticiones,
+                "errores": self.errores,
+                "carreras": self.carreras,
+                "lotes": self.lotes,
+                "peticiones_por_lote": round(self.peticiones_en_lotes / self.lotes, 2) if self.lotes else 0.0,
+                "carreras_por_lote": round(self.carreras_en_lotes / self.lotes, 1) if self.lotes else 0.0,
+                "carreras_por_s": round(self.carreras / activo_s, 1),
+            }
+        if len(latencias):
+            p50, p95, p99 = np.percentile(latencias, [50, 95, 99])
+            informe["latencia_ms"] = {"p50": round(p50, 2), "p95": round(p95, 2), "p99": round(p99, 2),
+                                      "max": round(float(latencias.max()), 2)}
+        return informe
+
+
+# -----------------------------
+# Servidor HTTP
+# -----------------------------
+class _Manejador(BaseHTTPRequestHandler):
+    servicio = None  # ServicioSimulacion, fijado al crear el servidor
+
+    def log_message(self, formato, *args):
+        pass  # sin log por petición: las métricas ya cuentan todo
+
+    def _responder(self, codigo, cuerpo):
+        datos = json.dumps(cuerpo).encode()
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_GET(self):
+        if self.path == "/salud":
+            self._responder(200, {"ok": True})
+        elif self.path == "/metricas":
+            self._responder(200, self.servicio.metricas.informe())
+        elif self.path == "/opciones":
+            self._responder(200, self.servicio.opciones())
+        else:
+            self._responder(404, {"error": f"ruta desconocida: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/simular":
+            self._responder(404, {"error": f"ruta desconocida: {self.path}"})
+            return
+        t0 = time.perf_counter()
+        try:
+            largo = int(self.headers.get("Content-Length", 0))
+            pedido = json.loads(self.rfile.read(largo) or b"{}")
+            config, carreras, semilla = validar(pedido)
+            tiempos = self.servicio.agrupador.simular(config, carreras, semilla)
+            respuesta = resumen_tiempos(tiempos)
+        except (PeticionInvalida, json.JSONDecodeError) as e:
+            self.servicio.metricas.peticion(time.perf_counter() - t0, error=True)
+            self._responder(400, {"error": str(e)})
+            return
+        except Exception as e:
+            self.servicio.metricas.peticion(time.perf_counter() - t0, error=True)
+            self._responder(500, {"error": str(e)})
+            return
+        latencia = time.perf_counter() - t0
+        self.servicio.metricas.peticion(latencia, carreras)
+        respuesta["latencia_ms"] = round(latencia * 1000, 2)
+        self._responder(200, respuesta)
+
+
+class ServicioSimulacion:
+    """
+    Servidor + pool + agrupador. Para pruebas se puede arrancar en un hilo
+    con puerto 0 (puerto libre elegido por el sistema, ver .puerto).
+    """
+
+    def __init__(self, puerto=PUERTO_POR_DEFECTO, procesos=None, ventana_s=VENTANA_S, agrupar=True):
+        self.metricas = Metricas()
+        self.pool = ProcessPoolExecutor(max_workers=procesos or os.cpu_count() or 1)
+        self.agrupador = Agrupador(self.pool, self.metricas, ventana_s, agrupar=agrupar)
+        manejador = type("Manejador", (_Manejador,), {"servicio": self})
+        self.servidor = ThreadingHTTPServer((HOST, puerto), manejador)
+        self.servidor.daemon_threads = True
+        self._hilo = None
+
+    @property
+    def puerto(self):
+        return self.servidor.server_address[1]
+
+    @property
+    def url(self):
+        return f"http://{HOST}:{self.puerto}"
+
+    def opciones(self):
+        import motor_simulacion as motor
+        import parametros
+
+        return {"circuitos": list(parametros.circuitos()), "neumaticos": list(parametros.neumaticos()),
+                "motor": list(motor.MOTOR_OPTIONS), "alerones": list(motor.AERO_OPTIONS),
+                "clima": list(motor.CLIMA_OPTIONS)}
+
+    def iniciar_en_hilo(self):
+        self._hilo = threading.Thread(target=self.servidor.serve_forever, name="servicio", daemon=True)
+        self._hilo.start()
+        return self
+
+    def servir(self):
+        self.servidor.serve_forever()
+
+    def cerrar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+        self.pool.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio HTTP/JSON local del simulador")
+    parser.add_argument("--puerto", type=int, default=PUERTO_POR_DEFECTO)
+    parser.add_argument("--procesos", type=int, default=None, help="procesos del pool (por defecto, todos los núcleos)")
+    args = parser.parse_args()
+    servicio = ServicioSimulacion(args.puerto, args.procesos)
+    print(f"Servicio de simulación en {servicio.url} (Ctrl+C para salir)")
+    try:
+        servicio.servir()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servicio.cerrar()
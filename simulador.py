@@ -2,244 +2,67 @@
 Simulador Nivel 2 - versión avanzada (clima dinámico, temperatura/desgaste, penalizaciones, podio)
 - Interfaz Streamlit
 - Permite comparar 1 o 2 estrategias y ver un ranking final
-- Guarda CSV si lo deseas
+- Opcional: la estrategia principal contra una parrilla de 20 coches (parrilla.py)
+- Guarda las simulaciones (con su semilla) en el almacén de resultados
+- Mejores estrategias precalculadas para la configuración (tablas_estrategia.py)
+- Predicción instantánea con el emulador entrenado (emulador.py) antes de simular
+- Análisis de undercut/overcut entre dos coches (undercut.py)
+- Política de paradas según el clima por programación dinámica (politica_paradas.py)
+- Riesgo de cola por incidentes con muestreo por importancia (riesgo_cola.py)
+- Estudios largos (Monte Carlo, barrido de estrategias) en segundo plano con cola_trabajos
 """
 
 import streamlit as st
-import json
-import os
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from datetime import datetime
-import random
+import graficos
+import parametros
+import catalogo
+import cola_trabajos
+import emulador
+import tablas_estrategia
+from motor_simulacion import (
+    MOTOR_OPTIONS, AERO_OPTIONS, CLIMA_OPTIONS, simulate_strategy_advanced,
+    nueva_semilla
+)
 
 # -----------------------------
 # CONFIG Y CARGA DE DATOS
 # -----------------------------
-DATA_DIR = "data"
-RESULTS_DIR = "resultados"
-os.makedirs(RESULTS_DIR, exist_ok=True)
-
-def load_json(filename):
-    with open(os.path.join(DATA_DIR, filename), "r", encoding="utf-8") as f:
-        return json.load(f)
-
-circuitos = load_json("circuitos.json")
-neumaticos = load_json("neumaticos.json")
-
-# -----------------------------
-# Parámetros y opciones
-# -----------------------------
-MOTOR_OPTIONS = {
-    "Equilibrado": {"potencia": 1.00, "tyre_wear_factor": 1.00},
-    "Potente": {"potencia": 1.05, "tyre_wear_factor": 1.10},
-    "Eficiente": {"potencia": 0.97, "tyre_wear_factor": 0.90}
-}
-
-AERO_OPTIONS = {
-    "Bajo": {"aero": 0.95},
-    "Medio": {"aero": 1.00},
-    "Alto": {"aero": 1.05}
-}
-
-CLIMA_OPTIONS = {
-    "Seco": {"grip_weather": 1.00, "rain": False},
-    "Nublado": {"grip_weather": 0.97, "rain": False},
-    "Lluvia ligera": {"grip_weather": 0.88, "rain": True},
-    "Lluvia intensa": {"grip_weather": 0.75, "rain": True}
-}
-
-# Model params (ajustables)
-K_GRIP = 0.08
-K_WEAR = 1.6
-RANDOM_NOISE_STD = 0.12  # variabilidad por vuelta (s)
-PIT_ERROR_CHANCE = 0.02  # probabilidad de error en un pit (por pitstop)
-SPIN_CHANCE_BASE = 0.01   # probabilidad base de salida en lluvia por vuelta (aumenta si slicks)
-
-# -----------------------------
-# FUNCIONES AUXILIARES
-# -----------------------------
-def base_lap_time(track, motor_coef, aero_coef):
-    return track["tiempo_base_s"] / (motor_coef * aero_coef)
-
-def tyre_suitability_penalty(tyre_key, is_raining):
-    """Devuelve multiplicador y riesgo extra si neumático es inadecuado para la lluvia"""
-    if is_raining:
-        if tyre_key in ["Intermedio", "Lluvia"]:
-            return 1.0, 0.0  # adecuado
-        else:
-            # Slicks en lluvia -> penalidad y riesgo de salida
-            return 1.15, 0.02  # +15% tiempo por vuelta y +2% de spin chance
-    else:
-        # Si usas rain tyres en seco penaliza un poco (menos temperatura ideal)
-        if tyre_key == "Lluvia":
-            return 1.08, 0.0
-        return 1.0, 0.0
-
-def simulate_strategy_advanced(track, car_setup, tyre_sequence, pitlane_time, initial_clima_key,
-                               weather_dynamic=True, show_progress=False):
-    """
-    Simulación avanzada:
-    - Puede cambiar el clima (weather_dynamic=True)
-    - Modela temperatura de neumático y penalizaciones
-    - Retorna dict con lap_times, details, total_time, events, final_clima
-    """
-    laps_total = track["vueltas"]
-    n_stints = len(tyre_sequence)
-    base = laps_total // n_stints
-    remainder = laps_total % n_stints
-    stints_laps = [base + (1 if i < remainder else 0) for i in range(n_stints)]
-
-    motor_coef = car_setup["motor"]["potencia"]
-    aero_coef = car_setup["aero"]["aero"]
-    tyre_wear_factor = car_setup["motor"]["tyre_wear_factor"]
-
-    lap_times = []
-    details = []
-    lap_number = 1
-    base_time = base_lap_time(track, motor_coef, aero_coef)
-
-    # clima inicial
-    clima_key = initial_clima_key
-    clima = CLIMA_OPTIONS[clima_key]
-
-    # progress UI
-    if show_progress:
-        progress_bar = st.progress(0)
-        progress_text = st.empty()
-
-    # estado de neumático: temperatura (°C) y grip aproximado
-    # asumimos temp óptima 85°C; temperatura sube si llegas a usar duro con altas cargas etc.
-    # Simplificamos: temp starts at 70
-    tyre_temp = 70.0
-
-    # evento log (p. ej. cambios de clima, spins, pit errors)
-    events = []
-
-    for stint_idx, tyre_key in enumerate(tyre_sequence):
-        tyre = neumaticos[tyre_key]
-        # grip inicial modulada por clima
-        grip_initial = tyre["grip_initial"] * clima["grip_weather"]
-        degr_base = tyre["degradation_per_lap"] * tyre_wear_factor * track["abrasion"]
-        speed_factor = tyre.get("speed_factor", 1.0)
-        laps_in_stint = stints_laps[stint_idx]
-
-        for v in range(1, laps_in_stint + 1):
-            # posible cambio climático (si está activado)
-            if weather_dynamic and random.random() < 0.03:  # 3% chance per lap to change weather
-                # simple transition: if not raining -> 30% chance start rain; if raining -> 50% chance stop
-                if clima["rain"]:
-                    # stop rain
-                    if random.random() < 0.5:
-                        clima_key = "Seco"
-                        clima = CLIMA_OPTIONS[clima_key]
-                        events.append({"lap": lap_number, "event": "Rain stopped -> Seco"})
-                else:
-                    if random.random() < 0.3:
-                        clima_key = random.choice(["Lluvia ligera", "Lluvia intensa"])
-                        clima = CLIMA_OPTIONS[clima_key]
-                        events.append({"lap": lap_number, "event": f"Started {clima_key}"})
-
-            # actualizar tyre_temp de forma simplificada
-            # temp aumenta con cada vuelta y con mayor aero/power; baja si lluvia
-            tyre_temp += 0.8 * motor_coef * aero_coef  # sube por uso
-            if clima["rain"]:
-                tyre_temp -= 2.5  # lluvia enfría algo
-            # acercar a un mínimo máximo
-            tyre_temp = max(40.0, min(120.0, tyre_temp))
-
-            # grip se ve afectado por tyre_temp (óptimo ~85)
-            temp_penalty = max(0.0, abs(tyre_temp - 85.0) / 150.0)  # penaliza desviaciones
-            # grip en esta vuelta (no menor que 0.25)
-            grip = max(0.25, grip_initial - degr_base * (v - 1) - temp_penalty)
-
-            # aplicamos la penalidad por uso de neumático inadecuado y riesgo de spin
-            pen_mult, extra_spin_risk = tyre_suitability_penalty(tyre_key, clima["rain"])
-            # spin chance base aumentada si grip muy bajo
-            spin_chance = SPIN_CHANCE_BASE + extra_spin_risk + max(0.0, (0.5 - grip)) * 0.05
-
-            # compute lap time
-            lap_time = base_time * (1 / speed_factor) * (1 - K_GRIP * grip) + K_WEAR * (1 - grip)
-            lap_time *= pen_mult
-            lap_time += float(np.random.normal(0, RANDOM_NOISE_STD))
-            lap_time = max(0.1, lap_time)
-
-            # check spin event (only in rain or very low grip)
-            spin = False
-            if random.random() < spin_chance:
-                spin = True
-                spin_delay = random.uniform(15.0, 60.0)  # seconds lost in spin/recovery
-                lap_time += spin_delay
-                events.append({"lap": lap_number, "event": f"Spin! +{spin_delay:.1f}s", "tyre": tyre_key})
-
-            lap_times.append(lap_time)
-            details.append({
-                "lap": lap_number,
-                "stint": stint_idx + 1,
-                "tyre": tyre_key,
-                "grip": round(grip, 4),
-                "temp": round(tyre_temp, 1),
-                "lap_time_s": round(lap_time, 3),
-                "clima": clima_key
-            })
-            lap_number += 1
-
-            # update UI progress
-            if show_progress:
-                percent = int(100 * ((lap_number - 1) / (laps_total + (n_stints - 1))))  # include pits approximate
-                progress_bar.progress(percent)
-                progress_text.markdown(f"🏎️ Stint {stint_idx+1}/{n_stints} — Vuelta {v}/{laps_in_stint} — Clima: **{clima_key}**")
-
-        # pitstop (if not last stint)
-        if stint_idx < n_stints - 1:
-            # chance of pit error
-            pit_time = pitlane_time
-            if random.random() < PIT_ERROR_CHANCE:
-                extra = random.uniform(5.0, 12.0)
-                pit_time += extra
-                events.append({"lap": lap_number, "event": f"Pit error +{extra:.1f}s"})
-            # pit as an event (we store as a lap entry)
-            lap_times.append(pit_time)
-            details.append({
-                "lap": lap_number,
-                "stint": "PIT",
-                "tyre": "Cambio",
-                "grip": None,
-                "temp": None,
-                "lap_time_s": round(pit_time, 3),
-                "clima": clima_key
-            })
-            lap_number += 1
-            # pit causes tyre temp reset (fresh tyres)
-            tyre_temp = 70.0
-
-    total_time = sum(lap_times)
-    if show_progress:
-        progress_bar.empty()
-        progress_text.empty()
-    return {
-        "lap_times": lap_times,
-        "total_time_s": total_time,
-        "details": details,
-        "stints_laps": stints_laps,
-        "events": events,
-        "final_clima": clima_key
-    }
+def dibujar_ritmo_simulado(fig, d):
+    ax = fig.subplots()
+    ax.plot(d["lap_times"], marker='o', linewidth=1)
+    ax.set_title(f"Ritmo por vuelta - {d['nombre']}")
+    ax.set_xlabel("Evento (vuelta/pit)")
+    ax.set_ylabel("Tiempo (s)")
+    ax.grid(True)
+
+def dibujar_posiciones(fig, d):
+    ax = fig.subplots()
+    ax.step(range(len(d["posiciones"]) + 1), [d["salida"], *d["posiciones"]], where="post")
+    ax.invert_yaxis()
+    ax.set_title("Posición por vuelta (una carrera de ejemplo)")
+    ax.set_xlabel("Vuelta")
+    ax.set_ylabel("Posición")
+    ax.grid(True)
+
+CARRERAS_PARRILLA = 500
 
 # -----------------------------
 # INTERFAZ STREAMLIT
 # -----------------------------
-st.set_page_config(page_title="Simulador F1 - Avanzado", page_icon="🏁", layout="centered")
 st.markdown("<h1 style='color:#3b82f6;text-align:center;'>Simulador Avanzado - F1</h1>", unsafe_allow_html=True)
 st.divider()
 
+# Parámetros vigentes (se recargan solos si cambian circuitos.json / neumaticos.json)
+circuitos = parametros.circuitos()
+neumaticos = parametros.neumaticos()
+
 # Selección base (misma para principal y comparador)
 colA, colB = st.columns([2, 1])
 with colA:
     circuito_name = st.selectbox("Selecciona circuito", list(circuitos.keys()))
     track = circuitos[circuito_name]
-    st.write(f"Vueltas: **{track['vueltas']}** — Longitud: {track['longitud_km']} km")
+    st.write(f"Vueltas: **{track.vueltas}** — Longitud: {track.longitud_km} km")
 with colB:
     motor_choice = st.selectbox("Tipo de motor", list(MOTOR_OPTIONS.keys()))
     aero_choice = st.selectbox("Nivel de alerones", list(AERO_OPTIONS.keys()))
@@ -269,12 +92,17 @@ if compare:
 else:
     alt_tyres = None
 
+# Carrera contra una parrilla completa (parrilla.py): posición final, no solo tiempo
+con_parrilla = st.checkbox("Simular también contra una parrilla de 20 coches (posición, huecos y adelantamientos)")
+if con_parrilla:
+    posicion_salida = st.slider("Posición de salida", min_value=1, max_value=20, value=10)
+
 st.divider()
 col_run, col_save = st.columns([2,1])
 with col_run:
     run_sim = st.button("🏁 Ejecutar simulación avanzada")
 with col_save:
-    save_csv = st.button("💾 Guardar última(s) simulación(es)")
+    save_csv = st.button("💾 Guardar en almacén de resultados")
 
 # mostrar resumen config
 st.markdown("#### Configuración seleccionada:")
@@ -289,32 +117,80 @@ st.json({
     "Neumáticos alterna": alt_tyres if compare else "N/A"
 })
 
+# Mejores estrategias ya simuladas con esta configuración (catálogo, sin re-simular)
+st.markdown(f"#### 🏆 Mejores estrategias conocidas — {circuito_name}")
+mejores = catalogo.mejores_estrategias(circuito_name, motor_choice, aero_choice, clima_choice, limite=5)
+if mejores:
+    for i, m in enumerate(mejores, start=1):
+        st.markdown(f"**{i}. {m['estrategia']}** — media {m['media_s'] / 60.0:.2f} min, "
+                    f"mejor {m['mejor_s'] / 60.0:.2f} min ({m['carreras']} carrera(s) guardada(s))")
+else:
+    st.caption("Aún no hay simulaciones guardadas con este circuito, motor, alerones y clima")
+
+# Tablas precalculadas de toda la rejilla (motor, alerones, clima, paradas): se sirven sin simular
+st.markdown(f"#### 📋 Mejores estrategias precalculadas — {pitstops} parada(s)")
+precalculadas = tablas_estrategia.consultar(circuito_name, motor_choice, aero_choice, clima_choice, pitstops)
+if precalculadas:
+    principal = "-".join(tyre_sequence)
+    for i, f in enumerate(precalculadas, start=1):
+        marca = " ← tu estrategia principal" if f["estrategia"] == principal else ""
+        st.markdown(f"**{i}. {f['estrategia']}** — media {f['media_s'] / 60.0:.2f} min, "
+                    f"P10–P90 {f['p10_s'] / 60.0:.2f} – {f['p90_s'] / 60.0:.2f} min{marca}")
+else:
+    st.caption("No hay tablas precalculadas con los parámetros vigentes: ejecuta python tablas_estrategia.py")
+
+# Predicción instantánea del emulador (sin simular); la simulación real la confirma después
+st.markdown("#### ⚡ Predicción instantánea (emulador)")
+modelo_emulador = emulador.cargar()
+predicciones = {}
+if modelo_emulador is None:
+    st.caption("No hay emulador entrenado con los parámetros vigentes: ejecuta python emulador.py")
+else:
+    estrategias_pred = [("Estrategia Principal", tyre_sequence)] + ([("Estrategia Alternativa", alt_tyres)] if compare else [])
+    for nombre, secuencia in estrategias_pred:
+        pred = emulador.predecir(modelo_emulador, circuito_name, clima_choice, motor_choice, aero_choice, secuencia)
+        if pred is None:
+            continue
+        predicciones[nombre] = pred
+        cols_e = st.columns(3)
+        cols_e[0].metric(f"{nombre}: media", f"{pred['media_s'] / 60.0:.2f} min", f"± {pred['error_s']['media_s']:.0f} s",
+                         delta_color="off")
+        cols_e[1].metric("P10 – P90", f"{pred['p10_s'] / 60.0:.2f} – {pred['p90_s'] / 60.0:.2f} min")
+        cols_e[2].metric("Mediana", f"{pred['p50_s'] / 60.0:.2f} min")
+    st.caption(f"Modelo sustituto entrenado el {modelo_emulador['creado']} con "
+               f"{modelo_emulador['configuraciones']} configuraciones por circuito y clima; "
+               "el error es el medio medido contra el motor con configuraciones reservadas.")
+
 # Ejecutar
 if run_sim:
     st.info("Ejecutando simulaciones... espera unos segundos.")
     car_setup = {"motor": MOTOR_OPTIONS[motor_choice], "aero": AERO_OPTIONS[aero_choice]}
 
-    # Ejecutar principal
-    result_main = simulate_strategy_advanced(track, car_setup, tyre_sequence, track.get("pitlane_time_s",22.0), clima_choice, weather_dynamic=True, show_progress=True)
+    # Ejecutar principal (cada simulación con su semilla, que se guarda con el resultado)
+    seed_main = nueva_semilla()
+    result_main = simulate_strategy_advanced(track, car_setup, tyre_sequence, track.pitlane_time_s, clima_choice, weather_dynamic=True, show_progress=True, tyres=neumaticos, rng=seed_main)
 
     # Ejecutar alternativa si aplica
     result_alt = None
     if compare and alt_tyres:
-        # pequeña pausa para que no interfieran random seeds demasiado parecidos
-        result_alt = simulate_strategy_advanced(track, car_setup, alt_tyres, track.get("pitlane_time_s",22.0), clima_choice, weather_dynamic=True, show_progress=True)
+        seed_alt = nueva_semilla()
+        result_alt = simulate_strategy_advanced(track, car_setup, alt_tyres, track.pitlane_time_s, clima_choice, weather_dynamic=True, show_progress=True, tyres=neumaticos, rng=seed_alt)
 
     # Mostrar resultados individuales
     def show_result_block(name, result):
         total_min = result["total_time_s"] / 60.0
         st.success(f"Resultado — {name}: **{total_min:.2f} minutos** ({result['total_time_s']:.1f} s)")
+        pred = predicciones.get(name)
+        if pred:
+            dentro = pred["p10_s"] <= result["total_time_s"] <= pred["p90_s"]
+            st.caption(f"Emulador: media {pred['media_s'] / 60.0:.2f} min, P10–P90 {pred['p10_s'] / 60.0:.2f} – "
+                       f"{pred['p90_s'] / 60.0:.2f} min → esta carrera cae "
+                       + ("dentro de la banda" if dentro else "fuera de la banda (P10–P90: 1 de cada 5 carreras lo hace)"))
         # gráfico ritmo
-        fig, ax = plt.subplots(figsize=(10,3))
-        ax.plot(result["lap_times"], marker='o', linewidth=1)
-        ax.set_title(f"Ritmo por vuelta - {name}")
-        ax.set_xlabel("Evento (vuelta/pit)")
-        ax.set_ylabel("Tiempo (s)")
-        ax.grid(True)
-        st.pyplot(fig)
+        st.image(graficos.grafico("ritmo_simulado", {
+            "nombre": name,
+            "lap_times": np.asarray(result["lap_times"], dtype=float),
+        }, dibujar_ritmo_simulado, figsize=(10, 3)), use_column_width=True)
         # events
         if result["events"]:
             st.markdown("**Eventos relevantes:**")
@@ -323,6 +199,7 @@ if run_sim:
         else:
             st.markdown("**Eventos relevantes:** Ninguno")
         # tabla detalle top
+        import pandas as pd
         df = pd.DataFrame(result["details"])
         st.markdown("Detalle (primeras 20 filas):")
         st.dataframe(df.head(20))
@@ -351,30 +228,296 @@ if run_sim:
         minutes = r[1] / 60.0
         st.markdown(f"**{i}. {r[0]}** — {minutes:.2f} min — Neumáticos: {r[2]}")
 
-    # Guardar resultados en session_state para descarga
-    st.session_state["last_sim_main"] = {"config": {"circuito": circuito_name, "motor": motor_choice, "alerones": aero_choice, "clima": clima_choice, "pitstops": pitstops, "tyre_sequence": tyre_sequence}, "result": result_main}
+    if con_parrilla:
+        import pandas as pd
+        import parrilla
+        st.markdown(f"## 🏎️ Parrilla completa — {parrilla.N_COCHES} coches, {CARRERAS_PARRILLA} carreras")
+        coches = parrilla.parrilla_por_defecto(tyre_sequence, posicion_salida, clima_choice,
+                                               motor=motor_choice, alerones=aero_choice)
+        res_parrilla = parrilla.simular_parrilla(track, coches, clima_choice, n=CARRERAS_PARRILLA, rng=seed_main,
+                                                 tyres=neumaticos, guardar_posiciones=True)
+        tabla_parrilla = parrilla.resumen_parrilla(coches, res_parrilla)
+        mio = next(f for f in tabla_parrilla if f["coche"] == "Tú")
+        cols_p = st.columns(4)
+        cols_p[0].metric("Posición media", f"{mio['posicion_media']:.1f}", f"sale {posicion_salida}º", delta_color="off")
+        cols_p[1].metric("Podio", f"{mio['podio_pct']:.0f}%")
+        cols_p[2].metric("Puntos medios", f"{mio['puntos_medios']:.1f}")
+        cols_p[3].metric("Adelantamientos", f"{mio['adelantamientos']:.1f}")
+        idx_mio = posicion_salida - 1
+        st.image(graficos.grafico("posiciones_parrilla", {
+            "posiciones": res_parrilla["posiciones"][0, :, idx_mio] + 1,
+            "salida": posicion_salida,
+        }, dibujar_posiciones, figsize=(10, 3)), use_column_width=True)
+        st.dataframe(pd.DataFrame(tabla_parrilla), hide_index=True)
+
+    # Guardar resultados en session_state para el almacén
+    st.session_state["last_sim_main"] = {"config": {"circuito": circuito_name, "motor": motor_choice, "alerones": aero_choice, "clima": clima_choice, "pitstops": pitstops, "tyre_sequence": tyre_sequence}, "result": result_main, "seed": seed_main}
     if result_alt:
-        st.session_state["last_sim_alt"] = {"config": {"circuito": circuito_name, "motor": motor_choice, "alerones": aero_choice, "clima": clima_choice, "pitstops": pitstops, "tyre_sequence": alt_tyres}, "result": result_alt}
+        st.session_state["last_sim_alt"] = {"config": {"circuito": circuito_name, "motor": motor_choice, "alerones": aero_choice, "clima": clima_choice, "pitstops": pitstops, "tyre_sequence": alt_tyres}, "result": result_alt, "seed": seed_alt}
+    else:
+        # la alternativa de una ejecución anterior no corresponde a esta configuración
+        st.session_state.pop("last_sim_alt", None)
 
-# Guardar CSV
+# Guardar en el almacén (Parquet particionado por circuito/fecha, ver almacen_resultados.py)
 if save_csv:
-    saved = []
-    if "last_sim_main" in st.session_state:
-        d = st.session_state["last_sim_main"]
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        fname = f"sim_{d['config']['circuito']}_main_{timestamp}.csv"
-        pd.DataFrame(d["result"]["details"]).to_csv(os.path.join(RESULTS_DIR, fname), index=False)
-        saved.append(fname)
-    if "last_sim_alt" in st.session_state:
-        d = st.session_state["last_sim_alt"]
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        fname = f"sim_{d['config']['circuito']}_alt_{timestamp}.csv"
-        pd.DataFrame(d["result"]["details"]).to_csv(os.path.join(RESULTS_DIR, fname), index=False)
-        saved.append(fname)
-    if saved:
-        st.success(f"Guardado(s): {', '.join(saved)}")
+    import almacen_resultados
+    corridas = [st.session_state[k] for k in ("last_sim_main", "last_sim_alt") if k in st.session_state]
+    if corridas:
+        id_lote = almacen_resultados.guardar_carreras(
+            corridas[0]["config"]["circuito"],
+            [(d["result"], d["config"], d["seed"]) for d in corridas],
+        )
+        st.success(f"Guardado(s) {len(corridas)} simulación(es) en el lote {id_lote} ({almacen_resultados.RESULTADOS_DIR})")
     else:
         st.warning("No hay simulaciones en memoria para guardar. Ejecuta una simulación primero.")
 
+# -----------------------------
+# UNDERCUT / OVERCUT ENTRE DOS COCHES (undercut.py)
+# -----------------------------
+def dibujar_matriz_undercut(fig, d):
+    ax = fig.subplots()
+    im = ax.imshow(d["prob"] * 100, cmap="RdYlGn", vmin=0, vmax=100, aspect="auto")
+    etiquetas = [f"V{v} {c}" for v, c in d["opciones"]]
+    ax.set_xticks(range(len(etiquetas)), etiquetas, rotation=90, fontsize=7)
+    ax.set_yticks(range(len(etiquetas)), etiquetas, fontsize=7)
+    ax.set_xlabel("Parada del coche de delante")
+    ax.set_ylabel("Parada del perseguidor")
+    ax.set_title("Probabilidad (%) de que el perseguidor acabe delante")
+    fig.colorbar(im, ax=ax)
+
+st.divider()
+st.markdown("### 🔀 Undercut / overcut entre dos coches")
+st.caption("Todas las combinaciones de vuelta de parada y compuesto de los dos coches en la ventana, "
+           "con el circuito, setup y clima de arriba (clima fijo).")
+col_vuelta, col_hueco, col_ventana = st.columns(3)
+with col_vuelta:
+    vuelta_actual = st.slider("Vuelta actual", min_value=1, max_value=track.vueltas - 2,
+                              value=min(20, track.vueltas - 2))
+with col_hueco:
+    hueco_undercut = st.number_input("Hueco del perseguidor (s)", min_value=0.0, max_value=30.0, value=1.5, step=0.1)
+with col_ventana:
+    ventana_undercut = st.slider("Ventana de parada (vueltas)", min_value=1, max_value=15, value=8)
+col_delante, col_detras = st.columns(2)
+with col_delante:
+    tyre_delante = st.selectbox("Neumático del coche de delante", tyre_keys, key="undercut_tyre_delante")
+    edad_delante = st.number_input("Vueltas con ese neumático", min_value=0, max_value=track.vueltas,
+                                   value=vuelta_actual, key="undercut_edad_delante")
+with col_detras:
+    tyre_detras = st.selectbox("Neumático del perseguidor", tyre_keys, key="undercut_tyre_detras")
+    edad_detras = st.number_input("Vueltas con ese neumático", min_value=0, max_value=track.vueltas,
+                                  value=vuelta_actual, key="undercut_edad_detras")
+compuestos_undercut = st.multiselect("Compuestos para la parada", tyre_keys,
+                                     default=["Intermedio", "Lluvia"] if CLIMA_OPTIONS[clima_choice]["rain"]
+                                     else [k for k in ("C1", "C2", "C3") if k in tyre_keys])
+
+if st.button("🔀 Analizar undercut") and compuestos_undercut:
+    import pandas as pd
+    import undercut
+    res_undercut = undercut.analizar_undercut(
+        track, undercut.estado_coche(tyre_delante, edad_delante, motor_choice, aero_choice),
+        undercut.estado_coche(tyre_detras, edad_detras, motor_choice, aero_choice),
+        hueco_undercut, vuelta_actual, ventana_undercut, compuestos_undercut, clima_choice, rng=0, tyres=neumaticos)
+    tabla_undercut = undercut.resumen_undercut(res_undercut)
+    mejor = tabla_undercut[0]
+    st.success(f"Mejor parada del perseguidor: **vuelta {mejor['parada']} con {mejor['compuesto']}** — "
+               f"{mejor['prob_peor_caso'] * 100:.0f}% de acabar delante si el rival responde con "
+               f"{mejor['respuesta_rival']} ({mejor['prob_media'] * 100:.0f}% de media)")
+    st.image(graficos.grafico("matriz_undercut", {
+        "opciones": res_undercut["opciones"],
+        "prob": res_undercut["prob_detras_delante"],
+    }, dibujar_matriz_undercut, figsize=(10, 8)), use_column_width=True)
+    st.dataframe(pd.DataFrame(tabla_undercut), hide_index=True)
+
+# -----------------------------
+# POLÍTICA DE PARADAS SEGÚN EL CLIMA (politica_paradas.py)
+# -----------------------------
+def dibujar_politica(fig, d):
+    from matplotlib.colors import ListedColormap
+    ax = fig.subplots()
+    tabla = np.asarray(d["tabla"], dtype=float)
+    tabla[np.triu_indices(tabla.shape[0], 1, tabla.shape[1])] = np.nan  # edad > vuelta: imposible
+    colores = ["#e2e8f0", "#ef4444", "#f97316", "#facc15", "#22c55e", "#3b82f6", "#a855f7"]
+    cmap = ListedColormap(colores[:len(d["compuestos"]) + 1])
+    im = ax.imshow(tabla.T + 1, origin="lower", aspect="auto", cmap=cmap, vmin=-0.5, vmax=len(d["compuestos"]) + 0.5,
+                   interpolation="nearest")
+    barra = fig.colorbar(im, ax=ax, ticks=range(len(d["compuestos"]) + 1))
+    barra.ax.set_yticklabels(["Seguir"] + [f"Parar: {c}" for c in d["compuestos"]])
+    ax.set_title(d["titulo"])
+    ax.set_xlabel("Vuelta")
+    ax.set_ylabel("Vueltas con el neumático")
+
+st.divider()
+st.markdown("### 🌦️ Política de paradas según el clima")
+st.caption("Programación dinámica sobre (vuelta, compuesto, edad del neumático, clima): en cada vuelta decide "
+           "si parar y con qué compuesto según el clima que haga, en vez de una secuencia fija. "
+           "Se evalúa con el motor completo contra la estrategia principal.")
+clave_politica = (circuito_name, motor_choice, aero_choice, clima_choice, tuple(tyre_sequence))
+if st.button("🌦️ Calcular política"):
+    import politica_paradas
+    car_setup = {"motor": MOTOR_OPTIONS[motor_choice], "aero": AERO_OPTIONS[aero_choice]}
+    politica = politica_paradas.resolver(track, car_setup, tyres=neumaticos)
+    st.session_state["politica"] = {
+        "clave": clave_politica,
+        "politica": politica,
+        "evaluacion": politica_paradas.evaluar(track, car_setup, politica, clima_choice, n=2000, rng=0,
+                                               tyres=neumaticos, estrategias=[tyre_sequence]),
+    }
+calculada = st.session_state.get("politica")
+if calculada and calculada["clave"] == clave_politica:
+    import pandas as pd
+    import politica_paradas
+    politica = calculada["politica"]
+    w = list(CLIMA_OPTIONS).index(clima_choice)
+    st.success(f"Salida con **{politica['compuestos'][politica['salida'][w]]}** ({clima_choice}) — "
+               f"tiempo esperado {politica['valor_s'][w] / 60.0:.2f} min (sin SC/VSC)")
+    evaluacion = pd.DataFrame(calculada["evaluacion"])
+    for col in ("media_s", "p10_s", "p90_s"):
+        evaluacion[col.replace("_s", "_min")] = evaluacion.pop(col) / 60.0
+    st.dataframe(evaluacion, hide_index=True)
+    col_comp, col_clima = st.columns(2)
+    with col_comp:
+        compuesto_ver = st.selectbox("Neumático montado", politica["compuestos"],
+                                     index=int(politica["salida"][w]), key="politica_compuesto")
+    with col_clima:
+        clima_ver = st.selectbox("Clima de la vuelta", list(CLIMA_OPTIONS), index=w, key="politica_clima")
+    k = politica["compuestos"].index(compuesto_ver)
+    st.image(graficos.grafico("politica_paradas", {
+        "tabla": politica["decision"][:, k, :, list(CLIMA_OPTIONS).index(clima_ver)],
+        "compuestos": politica["compuestos"],
+        "titulo": f"Decisión al final de cada vuelta — {compuesto_ver}, {clima_ver}",
+    }, dibujar_politica, figsize=(10, 4)), use_column_width=True)
+
+# -----------------------------
+# RIESGO DE COLA POR INCIDENTES (riesgo_cola.py)
+# -----------------------------
+st.divider()
+st.markdown("### 🎯 Riesgo de cola por incidentes")
+st.caption("Trompos y errores en boxes sorteados con probabilidad inflada y cada carrera reponderada "
+           "(muestreo por importancia): probabilidades insesgadas de perder mucho tiempo con muchas "
+           "menos carreras que un Monte Carlo normal. Estrategia principal.")
+if st.button("🎯 Estimar riesgo de cola"):
+    import pandas as pd
+    import riesgo_cola
+    car_setup = {"motor": MOTOR_OPTIONS[motor_choice], "aero": AERO_OPTIONS[aero_choice]}
+    riesgo = riesgo_cola.estimar_cola(track, car_setup, tyre_sequence, clima_choice, rng=0, tyres=neumaticos)
+    cols_r = st.columns(len(riesgo["cuantiles_total_s"]) + 1)
+    for col, (q, valor) in zip(cols_r, riesgo["cuantiles_total_s"]):
+        col.metric(f"P{q * 100:g} del tiempo total", f"{valor / 60.0:.2f} min")
+    cols_r[-1].metric("Muestras efectivas", f"{riesgo['muestras_efectivas']:.0f}", f"de {riesgo['carreras']} carreras",
+                      delta_color="off")
+    st.dataframe(pd.DataFrame([
+        {"pierde más de (s)": u, "probabilidad %": p * 100, "± error %": e * 100}
+        for u, p, e in riesgo["prob_perdida"]
+    ]), hide_index=True)
+
+# -----------------------------
+# ESTUDIOS LARGOS EN SEGUNDO PLANO (cola_trabajos.py)
+# -----------------------------
+st.divider()
+st.markdown("### ⏳ Estudios en segundo plano")
+st.caption("Se ejecutan fuera de la página: siguen aunque cambies opciones o recargues; "
+           "el estudio seguido queda en la URL para volver a engancharse.")
+
+cola = cola_trabajos.cola()
+MUESTREOS = {"Aleatorio": None, "Sobol (QMC)": "sobol", "Halton (QMC)": "halton"}
+col_tipo, col_n, col_muestreo, col_lanzar = st.columns([2, 1, 1, 1])
+with col_tipo:
+    tipo_estudio = st.radio("Estudio", ["Monte Carlo de la estrategia principal",
+                                        f"Barrido de estrategias ({pitstops} parada(s))"])
+with col_n:
+    carreras_estudio = st.number_input("Carreras" if tipo_estudio.startswith("Monte") else "Carreras por estrategia",
+                                       min_value=100, max_value=1_000_000, value=20_000, step=1000)
+with col_muestreo:
+    muestreo_estudio = st.selectbox("Muestreo", list(MUESTREOS),
+                                    help="QMC: secuencia de baja discrepancia aleatorizada; la media converge "
+                                         "más rápido con las mismas carreras")
+with col_lanzar:
+    lanzar = st.button("🚀 Lanzar estudio")
+
+if lanzar:
+    definicion = {"circuito": circuito_name, "motor": motor_choice, "alerones": aero_choice,
+                  "clima": clima_choice, "carreras": int(carreras_estudio), "muestreo": MUESTREOS[muestreo_estudio]}
+    try:
+        if tipo_estudio.startswith("Monte"):
+            trabajo_id = cola.enviar(cola_trabajos.MONTECARLO, {**definicion, "tyre_sequence": tyre_sequence})
+        else:
+            trabajo_id = cola.enviar(cola_trabajos.ESTRATEGIAS, {**definicion, "pitstops": pitstops})
+        st.query_params["trabajo"] = trabajo_id
+    except cola_trabajos.TrabajoInvalido as e:
+        st.error(f"❌ {e}")
+
+recientes = cola.recientes(limite=10)
+if recientes:
+    por_id = {t["id"]: t for t in recientes}
+    ids = [None] + list(por_id)
+    actual = st.query_params.get("trabajo")
+    elegido = st.selectbox("Estudio a seguir", ids, index=ids.index(actual) if actual in ids else 0,
+                           format_func=lambda i: "—" if i is None else f"{i} — {cola_trabajos.descripcion(por_id[i])}")
+    if elegido is None:
+        st.query_params.pop("trabajo", None)
+    elif elegido != actual:
+        st.query_params["trabajo"] = elegido
+
+
+def mostrar_trabajo(info):
+    """Progreso y resultados (parciales mientras corre) de un estudio"""
+    st.markdown(f"**{cola_trabajos.descripcion(info)}**")
+    if info.get("total"):
+        st.progress(min(1.0, info["hechas"] / info["total"]), text=f"{info['hechas']}/{info['total']} carreras")
+    if info.get("error"):
+        st.error(f"❌ {info['error']}")
+    parcial = info.get("parcial")
+    if not parcial:
+        return
+    if info["tipo"] == cola_trabajos.MONTECARLO:
+        cols_mc = st.columns(4)
+        error = parcial.get("error_media_s")
+        cols_mc[0].metric("Media", f"{parcial['media_s'] / 60.0:.2f} min",
+                          f"± {error:.1f} s" if error is not None else None, delta_color="off")
+        cols_mc[1].metric("P10", f"{parcial['p10_s'] / 60.0:.2f} min")
+        cols_mc[2].metric("P90", f"{parcial['p90_s'] / 60.0:.2f} min")
+        cols_mc[3].metric("Desv. estándar", f"{parcial['std_s']:.1f} s")
+    else:
+        st.markdown("Mejores estrategias hasta ahora:")
+        for i, f in enumerate(parcial[:10], start=1):
+            st.markdown(f"**{i}. {f['estrategia']}** — media {f['media_s'] / 60.0:.2f} min, "
+                        f"P90 {f['p90_s'] / 60.0:.2f} min ({f['carreras']} carreras)")
+
+
+@st.fragment(run_every=1.0)
+def seguir_trabajo(trabajo_id):
+    """Sondea el estado en disco y relanza la página cuando el estudio termina"""
+    info = cola.estado(trabajo_id)
+    if info is None:
+        return
+    mostrar_trabajo(info)
+    if info["estado"] not in cola_trabajos.FINALES:
+        if st.button("⏹️ Cancelar estudio", key=f"cancelar_{trabajo_id}"):
+            cola.cancelar(trabajo_id)
+    else:
+        st.rerun()
+
+
+def dibujar_histograma(fig, d):
+    ax = fig.subplots()
+    ax.hist(d["tiempos"] / 60.0, bins=60)
+    ax.set_title("Distribución del tiempo total")
+    ax.set_xlabel("Tiempo total (min)")
+    ax.set_ylabel("Carreras")
+    ax.grid(True)
+
+
+trabajo_id = st.query_params.get("trabajo")
+info = cola.estado(trabajo_id)
+if info is not None:
+    if info["estado"] in cola_trabajos.FINALES:
+        mostrar_trabajo(info)
+        tiempos = cola.tiempos(trabajo_id) if info["tipo"] == cola_trabajos.MONTECARLO else None
+        if tiempos is not None:
+            st.image(graficos.grafico("histograma_estudio", {"id": trabajo_id, "tiempos": tiempos},
+                                      dibujar_histograma, figsize=(10, 3)), use_column_width=True)
+    else:
+        seguir_trabajo(trabajo_id)
+
 st.divider()
 st.markdown("<small style='color:#94a3b8;'>Nivel 2: clima dinámico, temperatura de neumáticos y podio - Proyecto F1</small>", unsafe_allow_html=True)
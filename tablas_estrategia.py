@@ -0,0 +1,179 @@
+"""
+Tablas precalculadas de las mejores estrategias por circuito
+- Para cada circuito de circuitos.json la rejilla es finita: motor x
+  alerones x clima inicial x nº de paradas (0..MAX_PARADAS). En cada celda:
+    · criba: tiempo esperado de TODAS las secuencias de neumáticos con la
+      tabla determinista de tiempos por edad (politica_paradas.costes_vuelta)
+      y las probabilidades de clima de cada vuelta (cadena de matriz_clima)
+    · las CANDIDATOS mejores de la criba se simulan con el motor completo
+      (simular_lote, CARRERAS carreras, misma semilla para todas: números
+      aleatorios comunes) y se guardan ordenadas con su distribución
+- Un archivo JSON compacto por circuito en resultados/tablas/ con la huella
+  de los parámetros: solo se recalcula un circuito si la huella cambió
+  (o con --forzar); consultar() no simula nada
+- Las celdas se reparten entre todos los núcleos (un proceso por núcleo)
+- Uso: python tablas_estrategia.py [--procesos N] [--carreras N] [--forzar]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import parametros
+
+TABLAS_DIR = os.path.join("resultados", "tablas")
+MAX_PARADAS = 3     # igual que el selector de pitstops del simulador
+CANDIDATOS = 5      # secuencias por nº de paradas que pasan de la criba al Monte Carlo
+CARRERAS = 2000     # carreras por candidata
+SEMILLA_POR_DEFECTO = 2025
+
+_cargadas = {}
+
+
+def ruta_tabla(circuito, directorio=None):
+    return os.path.join(directorio or TABLAS_DIR, f"{circuito}.json")
+
+
+def cribar(track, costes, compuestos, clima_key, pitstops):
+    """
+    Tiempo esperado (sin combustible, igual para todas) de cada secuencia
+    con 'pitstops' paradas y reparto uniforme de stints. costes: (compuesto,
+    edad, clima) de politica_paradas.costes_vuelta. Lista de (secuencia, s), de mejor a peor.
+    """
+    from motor_simulacion import marginales_clima, reparto_stints
+
+    marginales = marginales_clima(track.vueltas, clima_key)
+    plan = reparto_stints(track.vueltas, pitstops + 1)
+    inicio = np.concatenate(([0], np.cumsum(plan)[:-1]))
+    # coste esperado de cada stint con cada compuesto: (stint, compuesto)
+    por_stint = np.array([
+        np.einsum("kaw,aw->k", costes[:, :largo], marginales[ini:ini + largo])
+        for ini, largo in zip(inicio, plan)
+    ])
+    filas = []
+    for secuencia in itertools.product(range(len(compuestos)), repeat=pitstops + 1):
+        esperado = por_stint[np.arange(pitstops + 1), secuencia].sum() + pitstops * track.pitlane_time_s
+        filas.append(([compuestos[k] for k in secuencia], float(esperado)))
+    return sorted(filas, key=lambda f: f[1])
+
+
+def _resumen(tiempos):
+    p10, p50, p90 = np.percentile(tiempos, [10, 50, 90])
+    return {"media_s": round(float(tiempos.mean()), 2), "std_s": round(float(tiempos.std()), 2),
+            "p10_s": round(float(p10), 2), "p50_s": round(float(p50), 2), "p90_s": round(float(p90), 2)}
+
+
+def calcular_celda(circuito, motor, alerones, carreras=CARRERAS, semilla=SEMILLA_POR_DEFECTO):
+    """
+    Todas las celdas de un circuito y setup (se ejecuta en los procesos del
+    pool). Retorna (motor, alerones, {clima: {paradas: filas}}) con las filas
+    ordenadas por tiempo medio del motor completo.
+    """
+    import motor_simulacion as motor_sim
+    from politica_paradas import costes_vuelta
+
+    track = parametros.circuitos()[circuito]
+    tyres = parametros.neumaticos()
+    car_setup = {"motor": motor_sim.MOTOR_OPTIONS[motor], "aero": motor_sim.AERO_OPTIONS[alerones]}
+    compuestos = list(tyres.keys())
+    costes = costes_vuelta(track, car_setup, compuestos, tyres)
+    celdas = {}
+    for w, clima_key in enumerate(motor_sim.CLIMA_KEYS):
+        celdas[clima_key] = {}
+        for pitstops in range(MAX_PARADAS + 1):
+            # misma semilla para todas las candidatas de la celda: la diferencia entre ellas
+            # es la estrategia, no la suerte de cada una
+            rng_celda = np.random.SeedSequence([semilla, w, pitstops]).generate_state(1)[0]
+            filas = []
+            for secuencia, esperado in cribar(track, costes, compuestos, clima_key, pitstops)[:CANDIDATOS]:
+                res = motor_sim.simular_lote(track, car_setup, secuencia, track.pitlane_time_s, clima_key,
+                                             carreras, rng=rng_celda, tyres=tyres)
+                filas.append({"estrategia": "-".join(secuencia), "esperado_s": round(esperado, 2),
+                              **_resumen(res["total_time_s"])})
+            celdas[clima_key][str(pitstops)] = sorted(filas, key=lambda f: f["media_s"])
+    return motor, alerones, celdas
+
+
+def vigente(circuito, huella=None, directorio=None):
+    """True si la tabla del circuito existe y se calculó con los parámetros vigentes"""
+    try:
+        with open(ruta_tabla(circuito, directorio), encoding="utf-8") as f:
+            return json.load(f)["huella"] == (huella or parametros.huella())
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        return False
+
+
+def precalcular(procesos=None, carreras=CARRERAS, semilla=SEMILLA_POR_DEFECTO, forzar=False,
+                directorio=None, progreso=print):
+    """
+    Recalcula las tablas de los circuitos sin tabla o con la huella antigua
+    (todos con forzar=True). Retorna la lista de circuitos recalculados.
+    """
+    from motor_simulacion import MOTOR_OPTIONS, AERO_OPTIONS
+
+    directorio = directorio or TABLAS_DIR
+    huella = parametros.huella()
+    pendientes = [c for c in parametros.circuitos().keys() if forzar or not vigente(c, huella, directorio)]
+    if not pendientes:
+        return []
+    tablas = {c: {} for c in pendientes}
+    tareas = [(c, m, a) for c in pendientes for m in MOTOR_OPTIONS for a in AERO_OPTIONS]
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=procesos or os.cpu_count() or 1) as pool:
+        futuros = {pool.submit(calcular_celda, c, m, a, carreras, semilla): c for c, m, a in tareas}
+        for hechas, futuro in enumerate(as_completed(futuros), start=1):
+            motor, alerones, celdas = futuro.result()
+            tablas[futuros[futuro]].setdefault(motor, {})[alerones] = celdas
+            if progreso:
+                progreso(f"  {hechas}/{len(tareas)} setups ({time.perf_counter() - t0:.0f} s)")
+    os.makedirs(directorio, exist_ok=True)
+    for circuito, tabla in tablas.items():
+        ruta = ruta_tabla(circuito, directorio)
+        tmp = ruta + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"huella": huella, "circuito": circuito, "carreras": carreras, "candidatos": CANDIDATOS,
+                       "creado": time.strftime("%Y-%m-%d %H:%M:%S"), "tablas": tabla}, f, ensure_ascii=False)
+        os.replace(tmp, ruta)
+    return pendientes
+
+
+def consultar(circuito, motor, alerones, clima, pitstops, directorio=None):
+    """
+    Mejores estrategias precalculadas de una celda (filas con estrategia,
+    media_s, std_s, p10_s, p50_s, p90_s, esperado_s; de mejor a peor) o
+    None si no hay tabla vigente para el circuito
+    """
+    ruta = ruta_tabla(circuito, directorio)
+    try:
+        firma = os.stat(ruta).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if _cargadas.get(ruta, (None,))[0] != firma:
+        with open(ruta, encoding="utf-8") as f:
+            _cargadas[ruta] = (firma, json.load(f))
+    datos = _cargadas[ruta][1]
+    if datos["huella"] != parametros.huella():
+        return None
+    return datos["tablas"].get(motor, {}).get(alerones, {}).get(clima, {}).get(str(pitstops))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precalcula las tablas de mejores estrategias por circuito")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos (por defecto, uno por núcleo)")
+    parser.add_argument("--carreras", type=int, default=CARRERAS, help="carreras por estrategia candidata")
+    parser.add_argument("--semilla", type=int, default=SEMILLA_POR_DEFECTO)
+    parser.add_argument("--forzar", action="store_true", help="recalcular aunque la huella no haya cambiado")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    hechos = precalcular(args.procesos, args.carreras, args.semilla, args.forzar)
+    if hechos:
+        print(f"Tablas de {', '.join(hechos)} en {TABLAS_DIR} ({time.perf_counter() - t0:.0f} s, "
+              f"huella {parametros.huella()})")
+    else:
+        print(f"Tablas al día (huella {parametros.huella()}): nada que recalcular")
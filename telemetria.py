@@ -0,0 +1,78 @@
+"""
+Trazas de telemetría (FastF1) reducidas a resolución de pantalla
+- LTTB (Largest-Triangle-Three-Buckets): conserva picos y frenadas
+  al reducir cientos de miles de puntos a ~1000 por traza
+- trazas_vuelta: velocidad/acelerador/freno/marcha de una vuelta
+"""
+
+import numpy as np
+
+CANALES = ["Speed", "Throttle", "Brake", "nGear"]
+PUNTOS_PANTALLA = 1000  # ~ancho en píxeles de una figura de 12" a 100 dpi
+
+
+def lttb(x, y, n_out):
+    """
+    Reduce la serie (x, y) a n_out puntos con LTTB.
+    Devuelve los índices elegidos (ordenados) para poder reutilizarlos.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # n_out-2 cubos entre el primer y el último punto (que siempre se conservan)
+    bordes = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        ini, fin = bordes[i], max(bordes[i + 1], bordes[i] + 1)
+        # promedio del cubo siguiente (o el último punto)
+        if i + 2 < len(bordes):
+            sig_ini, sig_fin = bordes[i + 1], max(bordes[i + 2], bordes[i + 1] + 1)
+            xc, yc = x[sig_ini:sig_fin].mean(), y[sig_ini:sig_fin].mean()
+        else:
+            xc, yc = x[-1], y[-1]
+        xa, ya = x[a], y[a]
+        # área del triángulo (a, candidato, promedio siguiente) para todo el cubo
+        areas = np.abs((xa - xc) * (y[ini:fin] - ya) - (xa - x[ini:fin]) * (yc - ya))
+        a = ini + int(np.argmax(areas))
+        idx[i + 1] = a
+    return idx
+
+
+def reducir(x, y, n_out=PUNTOS_PANTALLA):
+    """(x, y) reducidos con LTTB, ignorando muestras sin valor"""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    ok = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[ok], y[ok]
+    idx = lttb(x, y, n_out)
+    return x[idx].astype(np.float32), y[idx].astype(np.float32)
+
+
+def vuelta_de_piloto(laps, driver, lap_number=None):
+    """Vuelta concreta del piloto; la más rápida si lap_number es None"""
+    laps_piloto = laps.pick_drivers(driver)
+    if lap_number is None:
+        return laps_piloto.pick_fastest()
+    return laps_piloto[laps_piloto["LapNumber"] == lap_number].iloc[0]
+
+
+def trazas_vuelta(laps, driver, lap_number=None, n_out=PUNTOS_PANTALLA):
+    """
+    Telemetría de coche de una vuelta, cada canal reducido por separado
+    sobre la distancia recorrida. Devuelve {canal: (distancia, valores)}
+    y la clave 'LapNumber' con la vuelta realmente usada.
+    """
+    lap = vuelta_de_piloto(laps, driver, lap_number)
+    tel = lap.get_car_data().add_distance()
+    distancia = tel["Distance"].to_numpy(dtype=float)
+    trazas = {"LapNumber": int(lap["LapNumber"])}
+    for canal in CANALES:
+        if canal in tel.columns:
+            trazas[canal] = reducir(distancia, tel[canal].to_numpy(dtype=float), n_out)
+    return trazas
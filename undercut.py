@@ -0,0 +1,163 @@
+"""
+Análisis de undercut / overcut entre dos coches
+- Dos coches en pista en la vuelta actual: el de delante y el perseguidor a
+  'hueco_s', cada uno con su neumático, las vueltas que lleva y su setup
+- Cada coche para una vez dentro de la ventana (vuelta de parada x compuesto
+  nuevo) y sigue hasta el final; se simulan TODAS las combinaciones de los
+  dos coches a la vez, como un array (combinaciones, carreras)
+- El coste de cada vuelta sale de la tabla determinista del motor
+  (motor_simulacion.tiempos_por_edad + combustible + boxes): cada carrera
+  solo añade ruido, errores en boxes, aire sucio y el intento de
+  adelantamiento con las reglas de parrilla.py
+- Clima fijo, sin trompos ni neutralizaciones (lo que se compara es la parada)
+- Solo se simula la diferencia de tiempos entre los dos coches, que es lo
+  que decide el tráfico y el resultado
+- Resultado: matriz de probabilidad de que el perseguidor acabe delante
+- Uso: python undercut.py
+"""
+
+import numpy as np
+
+import parametros
+from motor_simulacion import (
+    MOTOR_OPTIONS, AERO_OPTIONS, CLIMA_OPTIONS, RANDOM_NOISE_STD, PIT_ERROR_CHANCE, PIT_ERROR_DELAY_S,
+    coste_combustible, tiempos_por_edad
+)
+from parrilla import AIRE_SUCIO_S, PERDIDA_AIRE_SUCIO_S, HUECO_MINIMO_S, probabilidad_adelantamiento
+
+VENTANA_VUELTAS = 8  # paradas posibles: de la vuelta siguiente a N vueltas después
+CARRERAS = 200       # carreras por combinación
+COMPUESTOS_SECO = ("C1", "C2", "C3")
+COMPUESTOS_LLUVIA = ("Intermedio", "Lluvia")
+
+
+def estado_coche(neumatico, edad, motor="Equilibrado", alerones="Medio", ritmo_s=0.0):
+    """Coche en pista: neumático actual, vueltas que lleva con él, setup y ritmo propio (s/vuelta, + = más lento)"""
+    return {"neumatico": neumatico, "edad": int(edad), "motor": motor, "alerones": alerones,
+            "ritmo_s": float(ritmo_s)}
+
+
+def opciones_parada(track, vuelta_actual, ventana=VENTANA_VUELTAS, compuestos=COMPUESTOS_SECO):
+    """(vuelta de parada, compuesto) posibles: se para al final de la vuelta indicada"""
+    ultima = min(vuelta_actual + ventana, track.vueltas - 1)
+    return [(v, c) for v in range(vuelta_actual + 1, ultima + 1) for c in compuestos]
+
+
+def tiempos_deterministas(track, coche, vuelta_actual, opciones, clima_key="Seco", tyres=None):
+    """
+    (opciones, vueltas que quedan): tiempo sin ruido de cada vuelta restante
+    con cada opción de parada, boxes incluido en la vuelta de la parada
+    """
+    if tyres is None:
+        tyres = parametros.neumaticos()
+    car_setup = {"motor": MOTOR_OPTIONS[coche["motor"]], "aero": AERO_OPTIONS[coche["alerones"]]}
+    vueltas = np.arange(vuelta_actual + 1, track.vueltas + 1)
+    restantes = len(vueltas)
+    actual = tiempos_por_edad(track, car_setup, coche["neumatico"], coche["edad"] + restantes, clima_key, tyres)
+    nuevos = {c: tiempos_por_edad(track, car_setup, c, restantes, clima_key, tyres) for _, c in opciones}
+    base = coste_combustible(track)[vueltas - 1] + coche["ritmo_s"]
+    tabla = np.empty((len(opciones), restantes))
+    for i, (parada, compuesto) in enumerate(opciones):
+        antes = vueltas <= parada
+        tabla[i] = np.where(antes, actual[coche["edad"] + np.arange(restantes)],
+                            nuevos[compuesto][np.maximum(0, vueltas - parada - 1)])
+        tabla[i, parada - vuelta_actual - 1] += track.pitlane_time_s
+    return tabla + base
+
+
+def analizar_undercut(track, delante, detras, hueco_s, vuelta_actual, ventana=VENTANA_VUELTAS,
+                      compuestos=None, clima_key="Seco", n=CARRERAS, rng=None, tyres=None):
+    """
+    Simula hasta el final de carrera cada combinación de paradas de los dos
+    coches (delante/detras: estado_coche). rng: np.random.Generator (o semilla).
+    Retorna dict con opciones [(vuelta, compuesto)], prob_detras_delante
+    (opción del perseguidor x opción del de delante: probabilidad de que el
+    perseguidor acabe delante) y hueco_final_s (media de t_detras - t_delante:
+    negativo = el perseguidor acaba delante).
+    """
+    if tyres is None:
+        tyres = parametros.neumaticos()
+    if compuestos is None:
+        compuestos = COMPUESTOS_LLUVIA if CLIMA_OPTIONS[clima_key]["rain"] else COMPUESTOS_SECO
+    if not 0 <= vuelta_actual < track.vueltas - 1:
+        raise ValueError(f"vuelta_actual debe estar entre 0 y {track.vueltas - 2}")
+    rng = np.random.default_rng(rng)
+    opciones = opciones_parada(track, vuelta_actual, ventana, compuestos)
+    o = len(opciones)
+    vuelta_parada = np.array([v for v, _ in opciones])
+
+    # combinación p = (opción del perseguidor, opción del de delante), en filas
+    op_detras = np.repeat(np.arange(o), o)
+    op_delante = np.tile(np.arange(o), o)
+    delta = (tiempos_deterministas(track, detras, vuelta_actual, opciones, clima_key, tyres)[op_detras]
+             - tiempos_deterministas(track, delante, vuelta_actual, opciones, clima_key, tyres)[op_delante])
+    para_delante = vuelta_parada[op_delante][:, None]
+    para_detras = vuelta_parada[op_detras][:, None]
+
+    # el resultado y el tráfico solo dependen de d = t_detras - t_delante: se simula
+    # esa diferencia (ruido de los dos coches = una normal con desviación * sqrt(2))
+    d = np.full((o * o, n), float(hueco_s))
+    ruido = RANDOM_NOISE_STD * np.sqrt(2.0)
+    for r, vuelta in enumerate(range(vuelta_actual + 1, track.vueltas + 1)):
+        boxes_a, boxes_b = para_delante == vuelta, para_detras == vuelta
+        d_libre = d + rng.normal(delta[:, r:r + 1], ruido, d.shape)
+        if boxes_a.any() or boxes_b.any():
+            for boxes, signo_error in ((boxes_b, 1.0), (boxes_a, -1.0)):
+                error = boxes & (rng.random(d.shape) < PIT_ERROR_CHANCE)
+                d_libre += signo_error * error * rng.uniform(*PIT_ERROR_DELAY_S, d.shape)
+
+        # mismo tráfico que parrilla.py, con dos coches: el que va detrás sufre aire sucio
+        # y, si alcanza al otro, lo pasa o se queda a HUECO_MINIMO_S (quien entra a boxes no bloquea)
+        detras_sigue = d >= 0
+        signo = np.where(detras_sigue, 1.0, -1.0)
+        boxes_f = np.where(detras_sigue, boxes_b, boxes_a)
+        libre_boxes = boxes_f | np.where(detras_sigue, boxes_a, boxes_b)
+        hueco = signo * d_libre + np.clip(1.0 - signo * d / AIRE_SUCIO_S, 0.0, 1.0) * PERDIDA_AIRE_SUCIO_S * ~boxes_f
+        alcanza = np.flatnonzero((hueco < HUECO_MINIMO_S) & ~libre_boxes)
+        if alcanza.size:
+            g = hueco.ravel()[alcanza]
+            pasa = rng.random(alcanza.size) < probabilidad_adelantamiento(HUECO_MINIMO_S - g, track.adelantamiento)
+            hueco.ravel()[alcanza] = np.where(pasa, g, HUECO_MINIMO_S)
+        d = signo * hueco
+
+    diferencia = d.reshape(o, o, n)
+    return {
+        "opciones": opciones,
+        "prob_detras_delante": (diferencia < 0).mean(axis=2),
+        "hueco_final_s": diferencia.mean(axis=2),
+    }
+
+
+def resumen_undercut(resultado):
+    """
+    Una fila por opción del perseguidor, de mejor a peor: probabilidad de
+    acabar delante si el rival responde con su mejor parada (peor caso) y
+    en media sobre todas sus respuestas
+    """
+    opciones, prob = resultado["opciones"], resultado["prob_detras_delante"]
+    filas = []
+    for i, (vuelta, compuesto) in enumerate(opciones):
+        respuesta = int(prob[i].argmin())
+        filas.append({
+            "parada": vuelta,
+            "compuesto": compuesto,
+            "prob_peor_caso": float(prob[i, respuesta]),
+            "respuesta_rival": f"V{opciones[respuesta][0]} {opciones[respuesta][1]}",
+            "prob_media": float(prob[i].mean()),
+            "hueco_medio_s": float(resultado["hueco_final_s"][i].mean()),
+        })
+    return sorted(filas, key=lambda f: (-f["prob_peor_caso"], -f["prob_media"]))
+
+
+if __name__ == "__main__":
+    # Ejemplo: python undercut.py  (Monza, vuelta 20, los dos con C3 de 20 vueltas a 1.5 s)
+    import time
+
+    track = parametros.circuitos()["Monza"]
+    t0 = time.perf_counter()
+    res = analizar_undercut(track, estado_coche("C3", 20), estado_coche("C3", 20), 1.5, 20, rng=1)
+    o = len(res["opciones"])
+    print(f"{o} x {o} combinaciones x {CARRERAS} carreras en {time.perf_counter() - t0:.2f} s")
+    for f in resumen_undercut(res)[:10]:
+        print(f"Parada V{f['parada']:<3} {f['compuesto']:<3} delante {f['prob_peor_caso'] * 100:5.1f}% "
+              f"(rival: {f['respuesta_rival']})  media {f['prob_media'] * 100:5.1f}%  hueco {f['hueco_medio_s']:+.1f} s")